@@ -0,0 +1,52 @@
+"""add_entity_hierarchy_indexes
+
+Revision ID: 5bc448ea427f
+Revises: a1709c643048
+Create Date: 2025-11-11 01:30:12.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5bc448ea427f'
+down_revision = 'a1709c643048'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Índices parciais para percorrer a hierarquia de entidades (CTE recursiva).
+
+    Cada passo da recursão busca os relacionamentos ativos de uma entidade,
+    subindo (entity_id -> parent_entity_id) ou descendo (parent_entity_id -> entity_id).
+    Os índices cobrem só as linhas ativas e incluem as colunas usadas no passo,
+    permitindo index-only scans.
+    """
+
+    # ========================================================================
+    # SUBINDO: filho -> pai
+    # ========================================================================
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_entity_relationships_ancestors
+            ON public.entity_relationships USING btree (entity_id)
+            INCLUDE (parent_entity_id, id)
+            WHERE is_active = true
+    """)
+
+    # ========================================================================
+    # DESCENDO: pai -> filhos
+    # ========================================================================
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_entity_relationships_descendants
+            ON public.entity_relationships USING btree (parent_entity_id)
+            INCLUDE (entity_id, id)
+            WHERE is_active = true
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS public.idx_entity_relationships_descendants")
+    op.execute("DROP INDEX IF EXISTS public.idx_entity_relationships_ancestors")
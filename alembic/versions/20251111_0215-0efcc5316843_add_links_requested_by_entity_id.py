@@ -0,0 +1,79 @@
+"""add_links_requested_by_entity_id
+
+Revision ID: 0efcc5316843
+Revises: 5bc448ea427f
+Create Date: 2025-11-11 02:15:47.902611
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0efcc5316843'
+down_revision = '5bc448ea427f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Guarda quem solicitou um vínculo em uma coluna própria.
+
+    Até aqui o solicitante só existia no texto de observations
+    ("Requested by entity <uuid>. ..."), e a caixa de enviados fazia
+    LIKE '%entity <uuid>%' sobre todos os vínculos pendentes.
+    """
+
+    # ========================================================================
+    # 1. COLUNA
+    # ========================================================================
+    op.execute("""
+        ALTER TABLE public.links
+            ADD COLUMN IF NOT EXISTS requested_by_entity_id uuid
+            REFERENCES public.entities(id) ON DELETE SET NULL
+    """)
+
+    op.execute("""
+        COMMENT ON COLUMN public.links.requested_by_entity_id
+            IS 'Entidade que solicitou o vínculo (fluxo de request)'
+    """)
+
+    # ========================================================================
+    # 2. BACKFILL A PARTIR DE observations
+    # ========================================================================
+    op.execute("""
+        UPDATE public.links l
+        SET requested_by_entity_id = parsed.requester_id
+        FROM (
+            SELECT
+                id,
+                (substring(observations FROM 'Requested by entity ([0-9a-fA-F-]{36})'))::uuid AS requester_id
+            FROM public.links
+            WHERE requested_by_entity_id IS NULL
+              AND observations ~ 'Requested by entity [0-9a-fA-F-]{36}'
+        ) parsed
+        WHERE l.id = parsed.id
+          AND EXISTS (SELECT 1 FROM public.entities e WHERE e.id = parsed.requester_id)
+    """)
+
+    # ========================================================================
+    # 3. ÍNDICES PARCIAIS DAS CAIXAS DE SOLICITAÇÕES (keyset por created_at, id)
+    # ========================================================================
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_links_pending_requests_sent
+            ON public.links USING btree (requested_by_entity_id, created_at DESC, id DESC)
+            WHERE status = 'pending_request'
+    """)
+
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_links_pending_requests_received
+            ON public.links USING btree (entity_id, created_at DESC, id DESC)
+            WHERE status = 'pending_request'
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS public.idx_links_pending_requests_received")
+    op.execute("DROP INDEX IF EXISTS public.idx_links_pending_requests_sent")
+    op.execute("ALTER TABLE IF EXISTS public.links DROP COLUMN IF EXISTS requested_by_entity_id")
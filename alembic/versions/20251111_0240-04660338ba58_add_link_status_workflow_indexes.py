@@ -0,0 +1,73 @@
+"""add_link_status_workflow_indexes
+
+Revision ID: 04660338ba58
+Revises: 0efcc5316843
+Create Date: 2025-11-11 02:40:05.118730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '04660338ba58'
+down_revision = '0efcc5316843'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Índices para os fluxos de vínculos (request, claim, grant, approve, revoke).
+
+    Caminhos de acesso cobertos:
+    - checagem de permissão (PermissionResolver / check_link_permission):
+      entity_id + vehicle_id + status = 'active'
+    - VehicleEntityLinkService.get_vehicle_links / get_active_vehicle_links_count:
+      vehicle_id + status <> 'terminated'
+    - VehicleEntityLinkService.get_entity_links:
+      entity_id + status <> 'terminated'
+    - reivindicações pendentes: status = 'pending_validation'
+
+    As caixas de solicitações (pending_request) já têm índices próprios
+    (migration 0efcc5316843). Verificação: python verify_link_indexes.py
+    """
+
+    # ========================================================================
+    # 1. CHECAGEM DE PERMISSÃO: vínculos ativos do par (entidade, veículo)
+    # ========================================================================
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_links_active_entity_vehicle
+            ON public.links USING btree (entity_id, vehicle_id)
+            INCLUDE (link_type_id, start_date, end_date)
+            WHERE status = 'active'
+    """)
+
+    # ========================================================================
+    # 2. VÍNCULOS DE UM VEÍCULO / DE UMA ENTIDADE POR STATUS
+    # ========================================================================
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_links_vehicle_status
+            ON public.links USING btree (vehicle_id, status)
+    """)
+
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_links_entity_status
+            ON public.links USING btree (entity_id, status)
+    """)
+
+    # ========================================================================
+    # 3. REIVINDICAÇÕES PENDENTES DE VALIDAÇÃO
+    # ========================================================================
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_links_pending_validation
+            ON public.links USING btree (created_at)
+            WHERE status = 'pending_validation'
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS public.idx_links_pending_validation")
+    op.execute("DROP INDEX IF EXISTS public.idx_links_entity_status")
+    op.execute("DROP INDEX IF EXISTS public.idx_links_vehicle_status")
+    op.execute("DROP INDEX IF EXISTS public.idx_links_active_entity_vehicle")
@@ -0,0 +1,94 @@
+"""add_entity_contacts_normalized_value
+
+Revision ID: 7d2e9b41c6a5
+Revises: 04660338ba58
+Create Date: 2025-11-11 03:10:21.604417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2e9b41c6a5'
+down_revision = '04660338ba58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Valor normalizado dos contatos + índice único por contato ativo.
+
+    Login e "buscar entidade por email/telefone" faziam comparação direta em
+    contact_value, sem índice (varredura da tabela inteira) e sensível a
+    maiúsculas, espaços e máscara de telefone.
+
+    Normalização (mesma regra de normalize_contact_value em entity_service):
+    - phone / whatsapp: só dígitos ("+55 (11) 99999-0000" -> "5511999990000")
+    - demais tipos: minúsculas, sem espaços nas pontas
+    """
+
+    # ========================================================================
+    # 1. COLUNA GERADA normalized_value
+    # ========================================================================
+    op.execute("""
+        ALTER TABLE public.entity_contacts
+            ADD COLUMN IF NOT EXISTS normalized_value text
+            GENERATED ALWAYS AS (
+                CASE
+                    WHEN contact_type IN ('phone', 'whatsapp')
+                        THEN regexp_replace(contact_value, '[^0-9]', '', 'g')
+                    ELSE lower(btrim(contact_value))
+                END
+            ) STORED
+    """)
+
+    # ========================================================================
+    # 2. DEDUPLICAÇÃO DOS CONTATOS ATIVOS
+    # ========================================================================
+    # Para cada (contact_type, normalized_value) ativo repetido, mantém um
+    # contato: o que é primário de alguma entidade, depois o verificado,
+    # depois o mais recente. Os demais são encerrados (não apagados).
+    op.execute("""
+        WITH ranked AS (
+            SELECT
+                c.id,
+                row_number() OVER (
+                    PARTITION BY c.contact_type, c.normalized_value
+                    ORDER BY
+                        EXISTS (
+                            SELECT 1 FROM public.entities e
+                            WHERE e.primary_email_contact_id = c.id
+                               OR e.primary_phone_contact_id = c.id
+                        ) DESC,
+                        c.is_verified DESC NULLS LAST,
+                        c.created_at DESC,
+                        c.id DESC
+                ) AS position
+            FROM public.entity_contacts c
+            WHERE c.is_active = true
+        )
+        UPDATE public.entity_contacts c
+        SET is_active = false,
+            is_primary = false,
+            end_date = CURRENT_DATE
+        FROM ranked
+        WHERE c.id = ranked.id
+          AND ranked.position > 1
+    """)
+
+    # ========================================================================
+    # 3. ÍNDICE ÚNICO DE LOOKUP (só contatos ativos)
+    # ========================================================================
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_entity_contacts_active_lookup
+            ON public.entity_contacts USING btree (contact_type, normalized_value)
+            INCLUDE (entity_id, use_for_login)
+            WHERE is_active = true
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS public.idx_entity_contacts_active_lookup")
+    op.execute("ALTER TABLE IF EXISTS public.entity_contacts DROP COLUMN IF EXISTS normalized_value")
@@ -0,0 +1,80 @@
+"""add_entities_device_fingerprint_hash
+
+Revision ID: 3b8f0c27d914
+Revises: 7d2e9b41c6a5
+Create Date: 2025-11-11 03:35:48.271093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8f0c27d914'
+down_revision = '7d2e9b41c6a5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Hash estável do dispositivo para entidades anônimas.
+
+    device_fingerprint é um JSONB sem índice, e campos como osVersion,
+    appVersion e networkType mudam entre aberturas do app. O hash usa só o
+    deviceId (sha256 em hex, mesma regra de device_fingerprint_hash em
+    entity_service), e o índice único garante uma entidade anônima ativa
+    por dispositivo.
+    """
+
+    # ========================================================================
+    # 1. COLUNA
+    # ========================================================================
+    op.execute("""
+        ALTER TABLE public.entities
+            ADD COLUMN IF NOT EXISTS device_fingerprint_hash text
+    """)
+
+    op.execute("""
+        COMMENT ON COLUMN public.entities.device_fingerprint_hash
+            IS 'sha256(deviceId) do device_fingerprint (entidades anônimas)'
+    """)
+
+    # ========================================================================
+    # 2. BACKFILL: uma entidade por dispositivo (a mais recente)
+    # ========================================================================
+    # As entidades repetidas de reinstalações ficam sem hash (não são apagadas)
+    op.execute("""
+        WITH ranked AS (
+            SELECT
+                id,
+                encode(sha256(convert_to(device_fingerprint->>'deviceId', 'UTF8')), 'hex') AS fingerprint_hash,
+                row_number() OVER (
+                    PARTITION BY device_fingerprint->>'deviceId'
+                    ORDER BY created_at DESC, id DESC
+                ) AS position
+            FROM public.entities
+            WHERE is_anonymous = true
+              AND active = true
+              AND coalesce(device_fingerprint->>'deviceId', '') <> ''
+        )
+        UPDATE public.entities e
+        SET device_fingerprint_hash = ranked.fingerprint_hash
+        FROM ranked
+        WHERE e.id = ranked.id
+          AND ranked.position = 1
+    """)
+
+    # ========================================================================
+    # 3. ÍNDICE ÚNICO (só anônimas ativas: ao converter, o dispositivo é liberado)
+    # ========================================================================
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_entities_anonymous_device
+            ON public.entities USING btree (device_fingerprint_hash)
+            WHERE is_anonymous = true AND active = true AND device_fingerprint_hash IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS public.idx_entities_anonymous_device")
+    op.execute("ALTER TABLE IF EXISTS public.entities DROP COLUMN IF EXISTS device_fingerprint_hash")
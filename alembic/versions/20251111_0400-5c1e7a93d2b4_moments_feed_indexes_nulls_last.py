@@ -0,0 +1,48 @@
+"""moments_feed_indexes_nulls_last
+
+Revision ID: 5c1e7a93d2b4
+Revises: 3b8f0c27d914
+Create Date: 2025-11-11 04:00:12.604219
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e7a93d2b4'
+down_revision = '3b8f0c27d914'
+branch_labels = None
+depends_on = None
+
+FEED_INDEXES = (
+    ("idx_moments_feed", ""),
+    ("idx_moments_vehicle_feed", "vehicle_id, "),
+    ("idx_moments_entity_feed", "entity_id, "),
+)
+
+
+def upgrade() -> None:
+    """
+    Índices do GET /moments-feed na ordem do feed (created_at DESC NULLS LAST, id DESC).
+
+    moments.created_at aceita NULL; o feed lista esses momentos no fim, em
+    um segundo trecho do keyset, e os dois trechos usam o mesmo índice.
+    """
+    for name, prefix in FEED_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS public.{name}")
+        op.execute(f"""
+            CREATE INDEX IF NOT EXISTS {name}
+                ON public.moments USING btree ({prefix}created_at DESC NULLS LAST, id DESC)
+                WHERE active = true
+        """)
+
+
+def downgrade() -> None:
+    for name, prefix in FEED_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS public.{name}")
+        op.execute(f"""
+            CREATE INDEX IF NOT EXISTS {name}
+                ON public.moments USING btree ({prefix}created_at DESC, id DESC)
+                WHERE active = true
+        """)
@@ -0,0 +1,40 @@
+"""add_entities_device_secret_hash
+
+Revision ID: 8a4d2f61b7e3
+Revises: 5c1e7a93d2b4
+Create Date: 2025-11-11 04:20:37.915062
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4d2f61b7e3'
+down_revision = '5c1e7a93d2b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Segredo do dispositivo das entidades anônimas.
+
+    O deviceId é escolhido pelo cliente e não é secreto: sozinho ele não
+    pode dar um token da entidade. POST /auth/anonymous devolve um segredo
+    aleatório quando emite o primeiro token do dispositivo, guarda só o
+    sha256 dele aqui e passa a exigir o segredo nos próximos tokens.
+    """
+    op.execute("""
+        ALTER TABLE public.entities
+            ADD COLUMN IF NOT EXISTS device_secret_hash text
+    """)
+
+    op.execute("""
+        COMMENT ON COLUMN public.entities.device_secret_hash
+            IS 'sha256 do segredo do dispositivo (entidades anônimas, POST /auth/anonymous)'
+    """)
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE IF EXISTS public.entities DROP COLUMN IF EXISTS device_secret_hash")
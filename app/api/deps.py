@@ -0,0 +1,156 @@
+"""
+Dependências compartilhadas pelos endpoints
+"""
+from typing import Optional
+from fastapi import Depends, Header, HTTPException, Query, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.orm import Session
+import uuid
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.security import Principal, resolve_principal
+from app.services.permission_service import permission_resolver
+
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+def _not_authenticated(detail: str = "Not authenticated") -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def get_optional_principal(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+) -> Optional[Principal]:
+    """
+    Principal do header Authorization: Bearer <jwt>, ou None sem header
+
+    O FastAPI resolve a dependência uma vez por request (mesmo que várias
+    dependências a usem), e resolve_principal guarda os tokens já
+    verificados: a assinatura é conferida uma vez por token, não por request.
+    """
+    if credentials is None:
+        return None
+
+    principal = resolve_principal(credentials.credentials)
+    if principal is None:
+        raise _not_authenticated("Invalid or expired token")
+    return principal
+
+
+def get_current_principal(
+    principal: Optional[Principal] = Depends(get_optional_principal),
+) -> Principal:
+    """Principal da requisição (token Bearer obrigatório)"""
+    if principal is None:
+        raise _not_authenticated()
+    return principal
+
+
+def get_current_entity_id(
+    principal: Optional[Principal] = Depends(get_optional_principal),
+    entity_id: Optional[str] = Header(None, alias="X-Entity-ID"),
+) -> uuid.UUID:
+    """
+    Entidade que está fazendo a requisição
+
+    Usa o token Bearer (POST /auth/login, POST /auth/anonymous). O header
+    X-Entity-ID só é aceito com AUTH_ALLOW_LEGACY_ENTITY_ID (clientes
+    antigos, durante a migração): ele não prova identidade nenhuma.
+    """
+    if principal is not None:
+        return principal.entity_id
+
+    if not settings.AUTH_ALLOW_LEGACY_ENTITY_ID or not entity_id:
+        raise _not_authenticated()
+
+    try:
+        return uuid.UUID(entity_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid X-Entity-ID header",
+        )
+
+
+def acting_entity_id(param: str = "entity_id", required: bool = True):
+    """
+    Cria uma dependência com a entidade que faz a ação, para os endpoints
+    que recebiam esse id na query (?entity_id=, ?inviter_entity_id=, ...)
+
+    A entidade vem do token. O parâmetro antigo continua aceito: com token,
+    se vier, precisa ser a própria entidade (403 se não for); sem token, só
+    vale com AUTH_ALLOW_LEGACY_ENTITY_ID. Com required=False, sem entidade
+    retorna None (leituras que também atendem quem não participa).
+
+    Exemplo:
+        @router.post("")
+        def create_conversation(..., entity_id: uuid.UUID = Depends(acting_entity_id())):
+    """
+
+    def dependency(
+        principal: Optional[Principal] = Depends(get_optional_principal),
+        legacy_entity_id: Optional[uuid.UUID] = Query(
+            None, alias=param, description="Obsoleto: a entidade vem do token Bearer"
+        ),
+    ) -> Optional[uuid.UUID]:
+        if principal is not None:
+            if legacy_entity_id is not None and legacy_entity_id != principal.entity_id:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail=f"{param} does not match the authenticated entity",
+                )
+            return principal.entity_id
+
+        if settings.AUTH_ALLOW_LEGACY_ENTITY_ID and legacy_entity_id is not None:
+            return legacy_entity_id
+        if not required:
+            return None
+        raise _not_authenticated()
+
+    return dependency
+
+
+def require_same_entity(
+    entity_id: uuid.UUID,
+    current_entity_id: uuid.UUID = Depends(get_current_entity_id),
+) -> uuid.UUID:
+    """Rotas /.../{entity_id}/...: só a própria entidade (403 para as outras)"""
+    if entity_id != current_entity_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowed for this entity",
+        )
+    return entity_id
+
+
+def require_vehicle_permission(permission_code: str):
+    """
+    Cria uma dependência que exige uma permissão no veículo da rota
+
+    Usa o path param vehicle_id e a entidade da requisição (get_current_entity_id), e
+    responde 403 se a entidade não tiver a permissão (via PermissionResolver).
+
+    Exemplo:
+        @router.put("/{vehicle_id}")
+        def update_vehicle(..., entity_id = Depends(require_vehicle_permission("vehicle.edit"))):
+    """
+
+    def dependency(
+        vehicle_id: uuid.UUID,
+        entity_id: uuid.UUID = Depends(get_current_entity_id),
+        db: Session = Depends(get_db),
+    ) -> uuid.UUID:
+        if not permission_resolver.has_permission(db, entity_id, vehicle_id, permission_code):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Permission '{permission_code}' required for this vehicle",
+            )
+        return entity_id
+
+    return dependency
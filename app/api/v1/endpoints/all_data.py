@@ -1,11 +1,14 @@
 """
 Endpoints para servir TODOS os dados (igual ao Supabase)
 """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 from app.core.database import get_db
-from typing import List
+from app.core.pagination import encode_cursor, decode_cursor
+from typing import List, Optional
+from datetime import datetime
+import uuid
 
 router = APIRouter()
 
@@ -138,156 +141,69 @@ def get_moment(moment_id: str, db: Session = Depends(get_db)):
 
 
 @router.get("/vehicles-with-details")
-def get_vehicles_with_details(db: Session = Depends(get_db)):
-    """Retorna todos os veiculos com detalhes (brands, models, plates, colors, fuels)"""
-    query = text("""
-        SELECT 
-            v.*,
-            json_build_object(
-                'id', b.id,
-                'brand', b.brand
-            ) as brands,
-            json_build_object(
-                'id', m.id,
-                'model', m.model
-            ) as models,
-            json_build_object(
-                'id', mv.id,
-                'version', mv.version
-            ) as model_versions,
-            json_build_object(
-                'id', vc.id,
-                'category', vc.category
-            ) as vehicle_categories,
-            COALESCE(
-                json_agg(DISTINCT jsonb_build_object(
-                    'id', p.id,
-                    'plate', p.plate,
-                    'state', p.state,
-                    'active', p.active
-                )) FILTER (WHERE p.id IS NOT NULL),
-                '[]'::json
-            ) as plates,
-            COALESCE(
-                json_agg(DISTINCT jsonb_build_object(
-                    'id', c.id,
-                    'color', c.color,
-                    'active', c.active
-                )) FILTER (WHERE c.id IS NOT NULL),
-                '[]'::json
-            ) as colors,
-            COALESCE(
-                json_agg(DISTINCT jsonb_build_object(
-                    'id', vf.id,
-                    'active', vf.active,
-                    'fuels', jsonb_build_object(
-                        'id', f.id,
-                        'name', f.name,
-                        'type', f.type
-                    )
-                )) FILTER (WHERE vf.id IS NOT NULL),
-                '[]'::json
-            ) as vehicle_fuels
-        FROM vehicles v
-        LEFT JOIN brands b ON v.brand_id = b.id
-        LEFT JOIN models m ON v.model_id = m.id
-        LEFT JOIN model_versions mv ON v.version_id = mv.id
-        LEFT JOIN vehicle_categories vc ON v.category_id = vc.id
-        LEFT JOIN plates p ON v.id = p.vehicle_id AND p.active = true
-        LEFT JOIN colors c ON v.id = c.vehicle_id AND c.active = true
-        LEFT JOIN vehicle_fuels vf ON v.id = vf.vehicle_id AND vf.active = true
-        LEFT JOIN fuels f ON vf.fuel_id = f.id
-        WHERE v.active = true
-        GROUP BY v.id, b.id, b.brand, m.id, m.model, mv.id, mv.version, vc.id, vc.category
-        ORDER BY v.created_at DESC
-    """)
-    
-    result = db.execute(query)
-    columns = result.keys()
-    return [dict(zip(columns, row)) for row in result.fetchall()]
+def get_vehicles_with_details(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Cursor retornado no header X-Next-Cursor"),
+    db: Session = Depends(get_db)
+):
+    """
+    Retorna os veiculos com detalhes (brands, models, plates, colors, fuels)
+
+    Os documentos são lidos prontos da projeção vehicle_details_projection
+    (ver scripts/vehicle_details_projection.sql), mantida por triggers.
+
+    Paginação por keyset em (created_at, vehicle_id), com os veículos sem
+    created_at no fim: quando houver mais resultados, o cursor da próxima
+    página vem no header X-Next-Cursor.
+    """
+    position = decode_cursor(
+        cursor, 2, (lambda value: None if value is None else datetime.fromisoformat(value), uuid.UUID)
+    )
+
+    # Dois trechos da ordem (com data, depois sem), cada um com busca no
+    # índice (created_at DESC NULLS LAST, vehicle_id DESC)
+    params = {"limit": limit + 1}
+    segments = []
+    if position is None or position[0] is not None:
+        if position is None:
+            segments.append("created_at IS NOT NULL")
+        else:
+            segments.append("(created_at, vehicle_id) < (CAST(:after_created_at AS timestamptz), CAST(:after_id AS uuid))")
+            params["after_created_at"], params["after_id"] = position[0].isoformat(), str(position[1])
+        segments.append("created_at IS NULL")
+    else:
+        segments.append("created_at IS NULL AND vehicle_id < CAST(:after_id AS uuid)")
+        params["after_id"] = str(position[1])
+
+    query = text(" UNION ALL ".join(f"""
+        (SELECT document, created_at, vehicle_id
+         FROM vehicle_details_projection
+         WHERE active = true AND {condition}
+         ORDER BY created_at DESC NULLS LAST, vehicle_id DESC
+         LIMIT :limit)
+    """ for condition in segments) + " ORDER BY created_at DESC NULLS LAST, vehicle_id DESC LIMIT :limit")
+
+    rows = db.execute(query, params).fetchall()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1][1], rows[-1][2])
+
+    return [row[0] for row in rows]
 
 
 @router.get("/vehicles-with-details/{vehicle_id}")
 def get_vehicle_with_details(vehicle_id: str, db: Session = Depends(get_db)):
     """Retorna um veículo específico com todos os detalhes (brands, models, plates, colors, fuels, entity links)"""
     query = text("""
-        SELECT
-            v.*,
-            json_build_object(
-                'id', b.id,
-                'brand', b.brand
-            ) as brands,
-            json_build_object(
-                'id', m.id,
-                'model', m.model
-            ) as models,
-            json_build_object(
-                'id', mv.id,
-                'version', mv.version
-            ) as model_versions,
-            json_build_object(
-                'id', vc.id,
-                'category', vc.category
-            ) as vehicle_categories,
-            COALESCE(
-                json_agg(DISTINCT jsonb_build_object(
-                    'id', p.id,
-                    'plate', p.plate,
-                    'state', p.state,
-                    'active', p.active
-                )) FILTER (WHERE p.id IS NOT NULL),
-                '[]'::json
-            ) as plates,
-            COALESCE(
-                json_agg(DISTINCT jsonb_build_object(
-                    'id', c.id,
-                    'color', c.color,
-                    'active', c.active
-                )) FILTER (WHERE c.id IS NOT NULL),
-                '[]'::json
-            ) as colors,
-            COALESCE(
-                json_agg(DISTINCT jsonb_build_object(
-                    'id', vf.id,
-                    'active', vf.active,
-                    'fuels', jsonb_build_object(
-                        'id', f.id,
-                        'name', f.name,
-                        'type', f.type
-                    )
-                )) FILTER (WHERE vf.id IS NOT NULL),
-                '[]'::json
-            ) as vehicle_fuels,
-            COALESCE(
-                json_agg(DISTINCT jsonb_build_object(
-                    'id', vel.id,
-                    'relationship_type', vel.relationship_type,
-                    'status', vel.status,
-                    'start_date', vel.start_date,
-                    'end_date', vel.end_date,
-                    'active', vel.active
-                )) FILTER (WHERE vel.id IS NOT NULL),
-                '[]'::json
-            ) as vehicle_entity_links
-        FROM vehicles v
-        LEFT JOIN brands b ON v.brand_id = b.id
-        LEFT JOIN models m ON v.model_id = m.id
-        LEFT JOIN model_versions mv ON v.version_id = mv.id
-        LEFT JOIN vehicle_categories vc ON v.category_id = vc.id
-        LEFT JOIN plates p ON v.id = p.vehicle_id AND p.active = true
-        LEFT JOIN colors c ON v.id = c.vehicle_id AND c.active = true
-        LEFT JOIN vehicle_fuels vf ON v.id = vf.vehicle_id AND vf.active = true
-        LEFT JOIN fuels f ON vf.fuel_id = f.id
-        LEFT JOIN vehicle_entity_links vel ON v.id = vel.vehicle_id AND vel.active = true
-        WHERE v.id = :vehicle_id AND v.active = true
-        GROUP BY v.id, b.id, b.brand, m.id, m.model, mv.id, mv.version, vc.id, vc.category
+        SELECT document || jsonb_build_object('vehicle_entity_links', entity_links)
+        FROM vehicle_details_projection
+        WHERE vehicle_id = :vehicle_id AND active = true
     """)
 
-    result = db.execute(query, {"vehicle_id": vehicle_id})
-    columns = result.keys()
-    row = result.fetchone()
+    row = db.execute(query, {"vehicle_id": vehicle_id}).fetchone()
 
     if row:
-        return dict(zip(columns, row))
+        return row[0]
 
     return {"error": "Vehicle not found"}
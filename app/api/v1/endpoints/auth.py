@@ -1,5 +1,139 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from datetime import datetime
+
+from app.api.deps import get_current_principal
+from app.core.database import get_db
+from app.core.password_hashing import password_hasher
+from app.core.security import Principal, create_entity_access_token
+from app.models.entity import Entity
+from app.schemas.auth import LoginRequest, PasswordSet
+from app.schemas.entity import AnonymousEntityCreate
+from app.schemas.token import EntityToken, PrincipalResponse
+from app.services.credential_service import CredentialService
+from app.services.entity_service import EntityService
 
 router = APIRouter()
 
-# TODO: Implementar endpoints de autenticação
+
+def _issue_token(entity: Entity) -> EntityToken:
+    return EntityToken(
+        access_token=create_entity_access_token(
+            entity.id, is_anonymous=entity.is_anonymous, verified=entity.verified
+        ),
+        entity_id=entity.id,
+        is_anonymous=entity.is_anonymous,
+        verified=entity.verified,
+    )
+
+
+@router.post("/login", response_model=EntityToken)
+def login(credentials: LoginRequest, db: Session = Depends(get_db)):
+    """
+    Login por email ou telefone + senha
+
+    Só contatos marcados para login (use_for_login) valem. Qualquer falha
+    (contato desconhecido, senha errada, credencial bloqueada) responde o
+    mesmo 401, para não revelar quais contatos existem; um contato
+    desconhecido também paga um bcrypt (verify_dummy_sync), para o tempo de
+    resposta não revelar isso.
+    """
+    if credentials.email:
+        contact_type, contact_value = "email", credentials.email
+    elif credentials.phone:
+        contact_type, contact_value = "phone", credentials.phone
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="email or phone is required",
+        )
+
+    invalid = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    entity_id = EntityService(db).find_entity_id_by_contact(contact_type, contact_value, login_only=True)
+    if entity_id is None:
+        password_hasher.verify_dummy_sync(credentials.password)
+        raise invalid
+    if not CredentialService(db).verify_password(entity_id, credentials.password):
+        raise invalid
+
+    entity = db.query(Entity).filter(Entity.id == entity_id, Entity.active == True).first()
+    if entity is None:
+        raise invalid
+    return _issue_token(entity)
+
+
+@router.post("/anonymous", response_model=EntityToken)
+def login_anonymous(entity_data: AnonymousEntityCreate, db: Session = Depends(get_db)):
+    """
+    Token da entidade anônima do dispositivo (criada no primeiro acesso)
+
+    Mesmo comportamento de POST /entities/anonymous (idempotente por
+    deviceId), mas devolve o token em vez da entidade.
+
+    O deviceId não é secreto, então não basta para obter o token de uma
+    entidade que já existe. O primeiro token do dispositivo vem com um
+    device_secret aleatório (só o hash fica no banco), que o app guarda e
+    envia nas chamadas seguintes; sem ele (ou com outro) a resposta é 401.
+    Entidades que ainda não têm segredo (criadas antes dele ou por POST
+    /entities/anonymous) recebem um no primeiro pedido de token.
+    """
+    service = EntityService(db)
+    entity, _ = service.get_or_create_anonymous_entity(entity_data)
+
+    device_secret = service.claim_device_secret(entity)
+    if device_secret is None and not service.check_device_secret(entity, entity_data.device_secret):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid device secret",
+        )
+
+    token = _issue_token(entity)
+    token.device_secret = device_secret
+    return token
+
+
+@router.get("/me", response_model=PrincipalResponse)
+def read_current_principal(principal: Principal = Depends(get_current_principal)):
+    """
+    Identity of the caller, resolved from the Bearer token
+
+    Served from the token claims only (no database query).
+    """
+    return PrincipalResponse(
+        entity_id=principal.entity_id,
+        is_anonymous=principal.is_anonymous,
+        verified=principal.verified,
+        expires_at=datetime.utcfromtimestamp(principal.expires_at),
+    )
+
+
+@router.put("/password", status_code=status.HTTP_204_NO_CONTENT)
+def set_password(
+    password_in: PasswordSet,
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db),
+):
+    """
+    Define ou troca a senha da entidade autenticada
+
+    Se a entidade já tem senha, current_password é obrigatória. O bcrypt
+    roda no pool de hash de senhas (503 + Retry-After quando cheio).
+    """
+    service = CredentialService(db)
+    if service.get_current_password(principal.entity_id) is not None:
+        if not password_in.current_password or not service.verify_password(
+            principal.entity_id, password_in.current_password
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Current password is incorrect",
+            )
+
+    service.set_password(principal.entity_id, password_in.new_password)
+    return None
+
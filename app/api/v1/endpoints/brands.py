@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.core.database import get_db
 from app.models import Brand, Model, ModelVersion
+from app.services import hot_reads
 from app.schemas import (
     Brand as BrandSchema,
     BrandCreate,
@@ -132,6 +133,7 @@ def update_brand(
         setattr(brand, field, value)
 
     db.commit()
+    hot_reads.invalidate_catalog()
     db.refresh(brand)
 
     return brand
@@ -158,6 +160,7 @@ def delete_brand(
     # Soft delete - marca como inativa
     brand.active = False
     db.commit()
+    hot_reads.invalidate_catalog()
 
     return {"message": f"Brand '{brand.name}' marked as inactive"}
 
@@ -308,6 +311,7 @@ def update_model(
         setattr(model, field, value)
 
     db.commit()
+    hot_reads.invalidate_catalog()
     db.refresh(model)
 
     return model
@@ -338,6 +342,7 @@ def delete_model(
     # Soft delete - marca como inativo
     model.active = False
     db.commit()
+    hot_reads.invalidate_catalog()
 
     return {"message": f"Model '{model.name}' marked as inactive"}
 
@@ -528,6 +533,7 @@ def update_version(
         setattr(version, field, value)
 
     db.commit()
+    hot_reads.invalidate_catalog()
     db.refresh(version)
 
     return version
@@ -571,6 +577,7 @@ def delete_version(
     # Soft delete - marca como inativa
     version.active = False
     db.commit()
+    hot_reads.invalidate_catalog()
 
     return {"message": f"Version '{version.name}' marked as inactive"}
 
@@ -601,6 +608,7 @@ def verify_brand(
 
     brand.verified = verified
     db.commit()
+    hot_reads.invalidate_catalog()
     db.refresh(brand)
 
     action = "verified" if verified else "unverified"
@@ -634,6 +642,7 @@ def verify_model(
 
     model.verified = verified
     db.commit()
+    hot_reads.invalidate_catalog()
     db.refresh(model)
 
     return model
@@ -680,6 +689,7 @@ def verify_version(
 
     version.verified = verified
     db.commit()
+    hot_reads.invalidate_catalog()
     db.refresh(version)
 
     return version
@@ -1,12 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy import and_, or_, desc, func
 from typing import List, Optional
 from uuid import UUID, uuid4
 from datetime import datetime
 
+from app.api.deps import acting_entity_id, get_optional_principal
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.security import Principal
+from app.core.fieldsets import FieldSet, required_fields, sparse_fieldset
+from app.services.entity_service import entity_summary_options
+from app.services import hot_reads, read_models
 from app.models import (
     Conversation,
     ConversationContext,
@@ -40,6 +47,17 @@ from app.schemas.conversation import (
 
 router = APIRouter()
 
+# ?fields= / ?include= da listagem e do detalhe de conversas
+conversation_list_fieldset = sparse_fieldset(
+    read_models.CONVERSATION_LIST_FIELDS,
+    relations=read_models.CONVERSATION_LIST_RELATIONS,
+)
+conversation_detail_fieldset = sparse_fieldset(
+    ConversationWithDetails.model_fields,
+    relations=("primary_vehicle", "main_context", "participants", "messages"),
+    always=required_fields(ConversationWithDetails),
+)
+
 
 # =============================================================================
 # CONVERSATION CONTEXTS ENDPOINTS
@@ -140,6 +158,7 @@ def list_conversations(
     entity_id: Optional[UUID] = None,
     status: Optional[str] = Query("active", description="Status da conversa (active, archived, closed). Por padrão retorna apenas conversas ativas."),
     conversation_type: Optional[str] = None,
+    fieldset: FieldSet = Depends(conversation_list_fieldset),
     db: Session = Depends(get_db),
 ):
     """
@@ -150,103 +169,24 @@ def list_conversations(
     - entity_id: Filtra por participante específico
     - status: Filtra por status (active, archived, closed). Por padrão retorna apenas conversas ativas.
     - conversation_type: Filtra por tipo (private, group, support)
+
+    Campos:
+    - fields: Campos de cada conversa (ex: id,title,last_message_at); id sempre vem
+    - include: primary_vehicle (sem include, vem por padrão)
     """
-    from app.schemas.vehicle import VehicleWithDetails
-    from app.models.vehicle import Brand, Model, ModelVersion, Plate
-    from app.models.color import Color, VehicleColor
-
-    # Buscar conversas com eager loading de veículos e relacionamentos
-    query = db.query(Conversation).options(
-        joinedload(Conversation.primary_vehicle)
-        .joinedload(Vehicle.brand),
-        joinedload(Conversation.primary_vehicle)
-        .joinedload(Vehicle.model),
-        joinedload(Conversation.primary_vehicle)
-        .joinedload(Vehicle.version),
-        joinedload(Conversation.primary_vehicle)
-        .joinedload(Vehicle.plates),
-        joinedload(Conversation.primary_vehicle)
-        .joinedload(Vehicle.vehicle_colors)
-        .joinedload(VehicleColor.color),
+    # Leitura só das colunas da resposta (sem instanciar o ORM); o veículo
+    # principal de cada conversa vem em queries únicas para a página toda
+    conversations_data, total = read_models.list_conversation_rows(
+        db,
+        skip=skip,
+        limit=limit,
+        vehicle_id=vehicle_id,
+        entity_id=entity_id,
+        status=status,
+        conversation_type=conversation_type,
+        fieldset=fieldset,
     )
 
-    # Filtro global: excluir conversas deletadas (soft delete)
-    query = query.filter(Conversation.deleted_at.is_(None))
-
-    # Filtro por veículo
-    if vehicle_id:
-        query = query.filter(Conversation.primary_vehicle_id == vehicle_id)
-
-    # Filtro por participante (apenas participantes ativos)
-    if entity_id:
-        query = query.join(ConversationParticipant).filter(
-            and_(
-                ConversationParticipant.entity_id == entity_id,
-                ConversationParticipant.is_active == True
-            )
-        )
-
-    # Filtro por status
-    if status:
-        query = query.filter(Conversation.status == status)
-
-    # Filtro por tipo
-    if conversation_type:
-        query = query.filter(Conversation.conversation_type == conversation_type)
-
-    # Contagem total
-    total = query.count()
-
-    # Ordenar por última mensagem
-    conversations = query.order_by(desc(Conversation.last_message_at)).offset(skip).limit(limit).all()
-
-    # Serializar manualmente para evitar erros de Pydantic
-    conversations_data = []
-    for conv in conversations:
-        # Construir dicionário manualmente
-        conv_dict = {
-            "id": str(conv.id),
-            "conversation_code": conv.conversation_code,
-            "primary_vehicle_id": str(conv.primary_vehicle_id) if conv.primary_vehicle_id else None,
-            "vehicle_ids": conv.vehicle_ids,
-            "conversation_type": conv.conversation_type,
-            "title": conv.title,
-            "summary": conv.summary,
-            "status": conv.status,
-            "main_context_id": str(conv.main_context_id) if conv.main_context_id else None,
-            "total_participants": conv.total_participants,
-            "active_participants": conv.active_participants,
-            "total_messages": conv.total_messages,
-            "total_actions_executed": conv.total_actions_executed,
-            "started_at": conv.started_at.isoformat() if conv.started_at else None,
-            "last_message_at": conv.last_message_at.isoformat() if conv.last_message_at else None,
-            "finished_at": conv.finished_at.isoformat() if conv.finished_at else None,
-            "archived_at": conv.archived_at.isoformat() if conv.archived_at else None,
-            "created_at": conv.created_at.isoformat(),
-            "updated_at": conv.updated_at.isoformat(),
-        }
-
-        # Adicionar dados do veículo se existir
-        if conv.primary_vehicle:
-            vehicle = conv.primary_vehicle
-            vehicle_dict = {
-                "id": str(vehicle.id),
-                "brand": {"id": str(vehicle.brand.id), "name": vehicle.brand.name} if vehicle.brand else None,
-                "model": {"id": str(vehicle.model.id), "name": vehicle.model.name} if vehicle.model else None,
-                "version": {"id": str(vehicle.version.id), "name": vehicle.version.name} if vehicle.version else None,
-                "model_year": vehicle.model_year,
-                "manufacturing_year": vehicle.manufacturing_year,
-                "current_plate": vehicle.current_plate,
-                "current_color": vehicle.current_color,
-                "plates": [{"id": str(p.id), "plate_number": p.plate_number, "status": p.status, "state": p.state} for p in vehicle.plates] if vehicle.plates else [],
-                "vehicle_colors": [{"id": str(vc.id), "color": vc.color.name if vc.color else None, "is_primary": vc.is_primary} for vc in vehicle.vehicle_colors] if vehicle.vehicle_colors else [],
-            }
-            conv_dict["primary_vehicle"] = vehicle_dict
-        else:
-            conv_dict["primary_vehicle"] = None
-
-        conversations_data.append(conv_dict)
-
     return JSONResponse(content={
         "conversations": conversations_data,
         "total": total,
@@ -258,7 +198,7 @@ def list_conversations(
 @router.post("", response_model=ConversationSchema, status_code=201)
 def create_conversation(
     conversation_data: ConversationCreate,
-    entity_id: UUID = Query(..., description="ID da entidade que está criando a conversa"),
+    entity_id: UUID = Depends(acting_entity_id()),
     db: Session = Depends(get_db),
 ):
     """
@@ -332,31 +272,76 @@ def create_conversation(
 @router.get("/{conversation_id}", response_model=ConversationDetailResponse)
 def get_conversation(
     conversation_id: UUID,
-    entity_id: Optional[UUID] = Query(None, description="ID da entidade acessando"),
+    entity_id: Optional[UUID] = Depends(acting_entity_id(required=False)),
     include_messages: bool = Query(True),
     messages_limit: int = Query(50, ge=1, le=100),
+    fieldset: FieldSet = Depends(conversation_detail_fieldset),
     db: Session = Depends(get_db),
 ):
     """
     Obtém detalhes completos de uma conversa
 
-    Inclui: participantes, contexto, mensagens recentes e permissões
+    Inclui: participantes, contexto, mensagens recentes e permissões.
+    Com fields= / include= (primary_vehicle, main_context, participants,
+    messages), só os relacionamentos pedidos são carregados e retornados.
+
+    A conversa (com participantes e mensagens) é lida uma vez para
+    requisições concorrentes com os mesmos parâmetros, e reaproveitada por
+    HOT_READ_CACHE_TTL_SECONDS; as permissões são sempre de quem pede.
     """
-    # Buscar conversa com relacionamentos
-    query = db.query(Conversation).options(
-        joinedload(Conversation.primary_vehicle),
-        joinedload(Conversation.main_context),
-        joinedload(Conversation.participants).joinedload(ConversationParticipant.entity),
-    )
+    include_messages = include_messages and fieldset.wants("messages")
+
+    def load():
+        # Buscar conversa só com os relacionamentos pedidos
+        options = []
+        if fieldset.wants("primary_vehicle"):
+            options.append(joinedload(Conversation.primary_vehicle))
+        if fieldset.wants("main_context"):
+            options.append(joinedload(Conversation.main_context))
+        if fieldset.wants("participants"):
+            options.append(
+                selectinload(Conversation.participants)
+                .selectinload(ConversationParticipant.entity)
+                .options(*entity_summary_options())
+            )
+        query = db.query(Conversation).options(*options)
 
-    conversation = query.filter(
-        and_(
-            Conversation.id == conversation_id,
-            Conversation.deleted_at.is_(None)  # Excluir conversas deletadas
+        conversation = query.filter(
+            and_(
+                Conversation.id == conversation_id,
+                Conversation.deleted_at.is_(None)  # Excluir conversas deletadas
+            )
+        ).first()
+
+        if not conversation:
+            return None
+
+        # Buscar mensagens recentes
+        if include_messages:
+            messages = db.query(ConversationMessage).options(
+                selectinload(ConversationMessage.sender_entity).options(*entity_summary_options()),
+                joinedload(ConversationMessage.context),
+            ).filter(
+                ConversationMessage.conversation_id == conversation_id
+            ).order_by(desc(ConversationMessage.created_at)).limit(messages_limit).all()
+
+            # Inverter ordem para mostrar da mais antiga para a mais recente
+            messages.reverse()
+        else:
+            messages = []
+
+        return jsonable_encoder(
+            ConversationWithDetails(**conversation.__dict__, messages=messages),
+            exclude=None if fieldset.is_full else fieldset.exclude(ConversationWithDetails.model_fields),
         )
-    ).first()
 
-    if not conversation:
+    conversation = hot_reads.load_conversation(
+        conversation_id,
+        (include_messages, messages_limit if include_messages else None, fieldset.cache_key),
+        load,
+    )
+
+    if conversation is None:
         raise HTTPException(status_code=404, detail="Conversa não encontrada")
 
     # Verificar permissões (se entity_id fornecido)
@@ -373,41 +358,20 @@ def get_conversation(
         if not participant:
             raise HTTPException(status_code=403, detail="Você não é participante desta conversa")
 
-    # Buscar mensagens recentes
-    if include_messages:
-        messages = db.query(ConversationMessage).options(
-            joinedload(ConversationMessage.sender_entity),
-            joinedload(ConversationMessage.context),
-        ).filter(
-            ConversationMessage.conversation_id == conversation_id
-        ).order_by(desc(ConversationMessage.created_at)).limit(messages_limit).all()
-
-        # Inverter ordem para mostrar da mais antiga para a mais recente
-        messages.reverse()
-    else:
-        messages = []
-
     # Calcular permissões
-    can_send_message = participant is not None
-    can_invite_participants = participant and participant.role in ["owner", "admin"]
-    can_manage_conversation = participant and participant.role == "owner"
-
-    return ConversationDetailResponse(
-        conversation=ConversationWithDetails(
-            **conversation.__dict__,
-            messages=messages,
-        ),
-        can_send_message=can_send_message,
-        can_invite_participants=can_invite_participants,
-        can_manage_conversation=can_manage_conversation,
-    )
+    return JSONResponse(content={
+        "conversation": conversation,
+        "can_send_message": participant is not None,
+        "can_invite_participants": participant is not None and participant.role in ["owner", "admin"],
+        "can_manage_conversation": participant is not None and participant.role == "owner",
+    })
 
 
 @router.patch("/{conversation_id}", response_model=ConversationSchema)
 def update_conversation(
     conversation_id: UUID,
     conversation_data: ConversationUpdate,
-    entity_id: UUID = Query(..., description="ID da entidade atualizando"),
+    entity_id: UUID = Depends(acting_entity_id()),
     db: Session = Depends(get_db),
 ):
     """Atualiza uma conversa (apenas owner pode atualizar)"""
@@ -441,6 +405,7 @@ def update_conversation(
 
     conversation.updated_at = datetime.utcnow()
     db.commit()
+    hot_reads.invalidate_conversation(conversation_id)
     db.refresh(conversation)
     return conversation
 
@@ -448,7 +413,7 @@ def update_conversation(
 @router.delete("/{conversation_id}", status_code=204)
 def delete_conversation(
     conversation_id: UUID,
-    entity_id: UUID = Query(..., description="ID da entidade deletando"),
+    entity_id: UUID = Depends(acting_entity_id()),
     db: Session = Depends(get_db),
 ):
     """Deleta uma conversa (soft delete usando deleted_at)"""
@@ -479,6 +444,7 @@ def delete_conversation(
     conversation.status = "deleted"
     conversation.deleted_at = datetime.utcnow()
     db.commit()
+    hot_reads.invalidate_conversation(conversation_id)
     return None
 
 
@@ -508,7 +474,7 @@ def list_participants(
 def add_participant(
     conversation_id: UUID,
     participant_data: ConversationParticipantCreate,
-    inviter_entity_id: UUID = Query(..., description="ID da entidade convidando"),
+    inviter_entity_id: UUID = Depends(acting_entity_id("inviter_entity_id")),
     db: Session = Depends(get_db),
 ):
     """Adiciona um novo participante à conversa"""
@@ -552,6 +518,7 @@ def add_participant(
     conversation.active_participants += 1
 
     db.commit()
+    hot_reads.invalidate_conversation(conversation_id)
     db.refresh(participant)
     return participant
 
@@ -561,7 +528,7 @@ def update_participant(
     conversation_id: UUID,
     participant_id: UUID,
     participant_data: ConversationParticipantUpdate,
-    updater_entity_id: UUID = Query(..., description="ID da entidade atualizando"),
+    updater_entity_id: UUID = Depends(acting_entity_id("updater_entity_id")),
     db: Session = Depends(get_db),
 ):
     """Atualiza um participante (role, permissões, etc)"""
@@ -592,6 +559,7 @@ def update_participant(
 
     participant.updated_at = datetime.utcnow()
     db.commit()
+    hot_reads.invalidate_conversation(conversation_id)
     db.refresh(participant)
     return participant
 
@@ -600,7 +568,7 @@ def update_participant(
 def remove_participant(
     conversation_id: UUID,
     participant_id: UUID,
-    remover_entity_id: UUID = Query(..., description="ID da entidade removendo"),
+    remover_entity_id: UUID = Depends(acting_entity_id("remover_entity_id")),
     reason: Optional[str] = Query(None),
     db: Session = Depends(get_db),
 ):
@@ -640,6 +608,7 @@ def remove_participant(
     conversation.active_participants -= 1
 
     db.commit()
+    hot_reads.invalidate_conversation(conversation_id)
     return None
 
 
@@ -652,7 +621,7 @@ def list_messages(
     conversation_id: UUID,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
-    entity_id: Optional[UUID] = Query(None, description="ID da entidade acessando"),
+    entity_id: Optional[UUID] = Depends(acting_entity_id(required=False)),
     db: Session = Depends(get_db),
 ):
     """Lista mensagens de uma conversa"""
@@ -669,11 +638,9 @@ def list_messages(
         if not participant:
             raise HTTPException(status_code=403, detail="Você não é participante desta conversa")
 
-    # Buscar mensagens
-    messages = db.query(ConversationMessage).options(
-        joinedload(ConversationMessage.sender_entity),
-        joinedload(ConversationMessage.context),
-    ).filter(
+    # Buscar mensagens (o schema de resposta não inclui sender/contexto,
+    # então não há relacionamentos para carregar)
+    messages = db.query(ConversationMessage).filter(
         ConversationMessage.conversation_id == conversation_id
     ).order_by(ConversationMessage.created_at).offset(skip).limit(limit).all()
 
@@ -684,9 +651,21 @@ def list_messages(
 def send_message(
     conversation_id: UUID,
     message_data: ConversationMessageCreate,
+    principal: Optional[Principal] = Depends(get_optional_principal),
     db: Session = Depends(get_db),
 ):
-    """Envia uma nova mensagem na conversa"""
+    """
+    Envia uma nova mensagem na conversa
+
+    sender_entity_id precisa ser a entidade do token (sem token, só com
+    AUTH_ALLOW_LEGACY_ENTITY_ID).
+    """
+    if principal is None:
+        if not settings.AUTH_ALLOW_LEGACY_ENTITY_ID:
+            raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    elif message_data.sender_entity_id != principal.entity_id:
+        raise HTTPException(status_code=403, detail="sender_entity_id does not match the authenticated entity")
+
     # Verificar se o sender é participante ativo
     participant = db.query(ConversationParticipant).filter(
         and_(
@@ -718,6 +697,7 @@ def send_message(
     ).update({ConversationParticipant.unread_count: ConversationParticipant.unread_count + 1})
 
     db.commit()
+    hot_reads.invalidate_conversation(conversation_id)
     db.refresh(message)
     return message
 
@@ -727,7 +707,7 @@ def update_message(
     conversation_id: UUID,
     message_id: UUID,
     message_data: ConversationMessageUpdate,
-    entity_id: UUID = Query(..., description="ID da entidade atualizando"),
+    entity_id: UUID = Depends(acting_entity_id()),
     db: Session = Depends(get_db),
 ):
     """Atualiza uma mensagem (apenas o sender pode atualizar)"""
@@ -761,6 +741,7 @@ def update_message(
         setattr(message, field, value)
 
     db.commit()
+    hot_reads.invalidate_conversation(conversation_id)
     db.refresh(message)
     return message
 
@@ -769,7 +750,7 @@ def update_message(
 def mark_message_as_read(
     conversation_id: UUID,
     message_id: UUID,
-    entity_id: UUID = Query(..., description="ID da entidade lendo"),
+    entity_id: UUID = Depends(acting_entity_id()),
     db: Session = Depends(get_db),
 ):
     """Marca uma mensagem como lida pelo participante"""
@@ -801,4 +782,5 @@ def mark_message_as_read(
     participant.unread_count = unread_count or 0
 
     db.commit()
+    hot_reads.invalidate_conversation(conversation_id)
     return None
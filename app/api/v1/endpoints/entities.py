@@ -1,15 +1,34 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session, selectinload
+from datetime import datetime
+import logging
 import uuid
 
+from app.api.deps import acting_entity_id, get_current_entity_id, get_current_principal, require_same_entity
+from app.core.batch import order_by_ids, unique_ids
 from app.core.database import get_db
-from app.services.entity_service import EntityService, VehicleEntityLinkService
+from app.core.fieldsets import FieldSet, required_fields, sparse_fieldset
+from app.core.pagination import encode_cursor, decode_cursor
+from app.core.security import Principal
+from app.services.entity_service import (
+    ContactInUseError,
+    EntityService,
+    VehicleEntityLinkService,
+    MAX_HIERARCHY_DEPTH,
+    entity_summary_options,
+)
+from app.services import hot_reads
+from app.services.permission_service import permission_resolver
+from app.services.read_models import ENTITY_FIELDS
+from app.schemas.batch import BatchGetRequest, BatchGetResponse
 from app.schemas.entity import (
     Entity,
     EntityCreate,
     EntityUpdate,
     AnonymousEntityCreate,
+    EntityContactLookup,
     VehicleEntityLink,
     VehicleEntityLinkCreate,
     VehicleEntityLinkUpdate,
@@ -22,6 +41,7 @@ from app.schemas.entity import (
     EntityRelationship,
     EntityRelationshipWithParent,
     EntityRelationshipWithChild,
+    EntityHierarchyNode,
     LinkRequest,
     LinkClaim,
     LinkGrant,
@@ -30,6 +50,10 @@ from app.schemas.entity import (
 )
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# ?fields= da listagem de entidades (nome/email/telefone são JOINs)
+entity_fieldset = sparse_fieldset(ENTITY_FIELDS, always=required_fields(Entity))
 
 
 # Entity endpoints
@@ -40,7 +64,42 @@ def create_entity(
 ):
     """Create a new entity"""
     service = EntityService(db)
-    return service.create_entity(entity)
+    try:
+        return service.create_entity(entity)
+    except ContactInUseError as exc:
+        raise HTTPException(status_code=409, detail=f"Contact already in use: {exc.contact_type}")
+
+
+# Declarado antes de /{entity_id} para "lookup" não ser lido como UUID
+@router.get("/lookup", response_model=EntityContactLookup)
+def lookup_entity_by_contact(
+    email: Optional[str] = Query(None, description="Email do contato"),
+    phone: Optional[str] = Query(None, description="Telefone (qualquer formatação)"),
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    Encontra a entidade dona de um email ou telefone ativo
+
+    Os valores são normalizados (maiúsculas/espaços no email, só dígitos no
+    telefone); telefone também encontra contatos do tipo whatsapp. Só os
+    lookups encontrados ficam em cache.
+
+    Exige token Bearer de uma entidade não anônima: qualquer dispositivo
+    obtém um token anônimo, e sem isso a rota diria a qualquer um quais
+    contatos existem. O login (POST /auth/login) usa o service direto.
+    """
+    if principal.is_anonymous:
+        raise HTTPException(status_code=403, detail="Anonymous entities cannot look up contacts")
+    if bool(email) == bool(phone):
+        raise HTTPException(status_code=400, detail="Informe email ou phone (apenas um)")
+
+    contact_type, contact_value = ("email", email) if email else ("phone", phone)
+    service = EntityService(db)
+    entity_id = service.find_entity_id_by_contact(contact_type, contact_value)
+    if not entity_id:
+        raise HTTPException(status_code=404, detail="Contact not found")
+    return EntityContactLookup(entity_id=entity_id, contact_type=contact_type)
 
 
 @router.get("/{entity_id}", response_model=Entity)
@@ -65,11 +124,14 @@ def create_anonymous_entity(
     db: Session = Depends(get_db)
 ):
     """
-    Create a new anonymous entity with device fingerprint
+    Get or create the anonymous entity of a device
 
     Anonymous entities can use the app without providing personal information.
     They can later be converted to verified entities.
 
+    Idempotent: a returning device (same deviceId) gets its existing active
+    anonymous entity back instead of a new ANON- entity.
+
     Device fingerprint should include:
     - deviceId: Unique device identifier
     - deviceType: Device type (phone, tablet, etc.)
@@ -81,13 +143,13 @@ def create_anonymous_entity(
     - locale: Device locale
     - geolocation: Optional geolocation data
     """
-    print(f"[BACKEND] Criando entidade anônima: {entity_data.name}")
-    print(f"[BACKEND] Device fingerprint: {entity_data.device_fingerprint.get('deviceId', 'N/A')}")
-
     service = EntityService(db)
-    entity = service.create_anonymous_entity(entity_data)
+    entity, created = service.get_or_create_anonymous_entity(entity_data)
 
-    print(f"[BACKEND] Entidade anônima criada! ID: {entity.id}, Code: {entity.entity_code}")
+    if created:
+        logger.info("Entidade anônima criada: %s (%s)", entity.id, entity.entity_code)
+    else:
+        logger.debug("Dispositivo já conhecido, reutilizando entidade anônima: %s", entity.id)
     return entity
 
 
@@ -107,27 +169,56 @@ def convert_anonymous_entity(
     and marking it as non-anonymous.
     """
     service = EntityService(db)
-    entity = service.convert_anonymous_to_verified(
-        entity_id=entity_id,
-        email=email,
-        phone=phone,
-        document_number=document_number,
-        display_name=display_name
-    )
+    try:
+        entity = service.convert_anonymous_to_verified(
+            entity_id=entity_id,
+            email=email,
+            phone=phone,
+            document_number=document_number,
+            display_name=display_name
+        )
+    except ContactInUseError as exc:
+        raise HTTPException(status_code=409, detail=f"Contact already in use: {exc.contact_type}")
     if not entity:
         raise HTTPException(status_code=404, detail="Entity not found or not anonymous")
     return entity
 
 
-@router.get("/entities", response_model=List[Entity])
+@router.get("/entities", response_model=List[Entity], response_model_exclude_unset=True)
 def get_entities(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    fieldset: FieldSet = Depends(entity_fieldset),
     db: Session = Depends(get_db)
 ):
-    """Get all entities with pagination"""
+    """
+    Get all entities with pagination
+
+    fields= limits the returned fields (e.g. id,name); name, email and
+    phone are only joined when requested.
+    """
     service = EntityService(db)
-    return service.get_entities(skip=skip, limit=limit)
+    return service.get_entity_rows(skip=skip, limit=limit, fieldset=fieldset)
+
+
+@router.post("/entities/batch", response_model=BatchGetResponse[Entity], response_model_exclude_unset=True)
+def get_entities_batch(
+    batch: BatchGetRequest,
+    fieldset: FieldSet = Depends(entity_fieldset),
+    db: Session = Depends(get_db)
+):
+    """
+    Get several entities by ID in one request
+
+    Up to BATCH_MAX_IDS ids (duplicates are ignored), resolved with a single
+    WHERE id = ANY(:ids) query. `items` follows the order of the requested
+    ids and `missing` lists the ids that were not found.
+    """
+    ids = unique_ids(batch.ids)
+    service = EntityService(db)
+    rows = service.get_entity_rows_by_ids(ids, fieldset=fieldset)
+    items, missing = order_by_ids(ids, rows, key=lambda row: row["id"])
+    return {"items": items, "missing": missing}
 
 
 @router.get("/entities/{entity_id}", response_model=Entity)
@@ -151,7 +242,10 @@ def update_entity(
 ):
     """Update entity"""
     service = EntityService(db)
-    entity = service.update_entity(entity_id, entity_update)
+    try:
+        entity = service.update_entity(entity_id, entity_update)
+    except ContactInUseError as exc:
+        raise HTTPException(status_code=409, detail=f"Contact already in use: {exc.contact_type}")
     if not entity:
         raise HTTPException(status_code=404, detail="Entity not found")
     return entity
@@ -169,7 +263,10 @@ def patch_entity(
     Permite atualizar apenas os campos fornecidos, sem precisar enviar todos os dados.
     """
     service = EntityService(db)
-    entity = service.update_entity(entity_id, entity_update)
+    try:
+        entity = service.update_entity(entity_id, entity_update)
+    except ContactInUseError as exc:
+        raise HTTPException(status_code=409, detail=f"Contact already in use: {exc.contact_type}")
     if not entity:
         raise HTTPException(status_code=404, detail="Entity not found")
     return entity
@@ -350,6 +447,13 @@ def set_entity_parent(
     if not parent:
         raise HTTPException(status_code=404, detail="Parent entity not found")
 
+    # Evitar ciclos: o novo pai não pode ser a própria entidade nem um descendente dela
+    if relationship_data.parent_entity_id == entity_id:
+        raise HTTPException(status_code=400, detail="Entity cannot be its own parent")
+    descendants = EntityService(db).get_entity_descendants(entity_id, max_depth=MAX_HIERARCHY_DEPTH)
+    if any(rel.entity_id == relationship_data.parent_entity_id for rel in descendants):
+        raise HTTPException(status_code=400, detail="Parent entity is a descendant of this entity")
+
     # Criar relacionamento
     relationship = EntityRelationshipModel(
         entity_id=entity_id,
@@ -426,21 +530,42 @@ def get_entity_relationships(
 
     Retorna tanto relacionamentos como pai quanto como filho.
     """
-    from app.models import EntityRelationship as EntityRelationshipModel
+    service = EntityService(db)
+    return service.get_entity_relationships(entity_id, active_only=active_only)
 
-    query_as_child = db.query(EntityRelationshipModel).filter(
-        EntityRelationshipModel.entity_id == entity_id
-    )
-    query_as_parent = db.query(EntityRelationshipModel).filter(
-        EntityRelationshipModel.parent_entity_id == entity_id
-    )
 
-    if active_only:
-        query_as_child = query_as_child.filter(EntityRelationshipModel.is_active == True)
-        query_as_parent = query_as_parent.filter(EntityRelationshipModel.is_active == True)
+@router.get("/entities/{entity_id}/ancestors", response_model=List[EntityHierarchyNode])
+def get_entity_ancestors(
+    entity_id: uuid.UUID,
+    max_depth: int = Query(10, ge=1, le=MAX_HIERARCHY_DEPTH),
+    active_only: bool = Query(True),
+    db: Session = Depends(get_db)
+):
+    """
+    Listar a cadeia de entidades acima desta (pai, avô, ...)
 
-    relationships = query_as_child.all() + query_as_parent.all()
-    return relationships
+    Resolvido em uma única consulta (CTE recursiva). `depth` indica a distância
+    até a entidade consultada (1 = pai direto).
+    """
+    service = EntityService(db)
+    return service.get_entity_ancestors(entity_id, max_depth=max_depth, active_only=active_only)
+
+
+@router.get("/entities/{entity_id}/descendants", response_model=List[EntityHierarchyNode])
+def get_entity_descendants(
+    entity_id: uuid.UUID,
+    max_depth: int = Query(10, ge=1, le=MAX_HIERARCHY_DEPTH),
+    active_only: bool = Query(True),
+    db: Session = Depends(get_db)
+):
+    """
+    Listar todas as entidades abaixo desta (filhos, netos, ...)
+
+    Resolvido em uma única consulta (CTE recursiva). `depth` indica a distância
+    até a entidade consultada (1 = filho direto).
+    """
+    service = EntityService(db)
+    return service.get_entity_descendants(entity_id, max_depth=max_depth, active_only=active_only)
 
 
 @router.delete("/entities/{entity_id}/parent")
@@ -508,7 +633,7 @@ def get_entity_creator(
 @router.post("/vehicle-links/request", response_model=VehicleEntityLink)
 def request_vehicle_link(
     link_request: LinkRequest,
-    requesting_entity_id: uuid.UUID = Query(..., description="ID da entidade que está solicitando"),
+    requesting_entity_id: uuid.UUID = Depends(acting_entity_id("requesting_entity_id")),
     db: Session = Depends(get_db)
 ):
     """
@@ -544,6 +669,7 @@ def request_vehicle_link(
         vehicle_id=link_request.vehicle_id,
         link_type_id=link_request.link_type_id,
         status="pending_request",
+        requested_by_entity_id=requesting_entity_id,
         observations=f"Requested by entity {requesting_entity_id}. {link_request.observations or ''}",
         start_date=date.today()
     )
@@ -551,13 +677,42 @@ def request_vehicle_link(
     db.add(link)
     db.commit()
     db.refresh(link)
+    hot_reads.invalidate_vehicle(link.vehicle_id)
 
     return link
 
 
+def _paginate_link_requests(query, cursor: Optional[str], limit: int, response: Response):
+    """
+    Paginação por keyset em (created_at, id), mais recentes primeiro
+
+    Usa os índices parciais de status = 'pending_request'; o cursor da
+    próxima página vem no header X-Next-Cursor.
+    """
+    from app.models import Link as LinkModel
+
+    position = decode_cursor(cursor, 2, (datetime.fromisoformat, uuid.UUID))
+    if position:
+        query = query.filter(tuple_(LinkModel.created_at, LinkModel.id) < tuple(position))
+
+    links = query.order_by(
+        LinkModel.created_at.desc(),
+        LinkModel.id.desc()
+    ).limit(limit + 1).all()
+
+    if len(links) > limit:
+        links = links[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(links[-1].created_at, links[-1].id)
+
+    return links
+
+
 @router.get("/entities/{entity_id}/link-requests/received", response_model=List[LinkWithEntities])
 def get_received_link_requests(
-    entity_id: uuid.UUID,
+    response: Response,
+    entity_id: uuid.UUID = Depends(require_same_entity),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Cursor retornado no header X-Next-Cursor"),
     db: Session = Depends(get_db)
 ):
     """
@@ -567,32 +722,37 @@ def get_received_link_requests(
     """
     from app.models import Link as LinkModel
 
-    links = db.query(LinkModel).filter(
+    query = db.query(LinkModel).options(
+        selectinload(LinkModel.entity).options(*entity_summary_options())
+    ).filter(
         LinkModel.entity_id == entity_id,
         LinkModel.status == "pending_request"
-    ).all()
+    )
 
-    return links
+    return _paginate_link_requests(query, cursor, limit, response)
 
 
 @router.get("/entities/{entity_id}/link-requests/sent")
 def get_sent_link_requests(
-    entity_id: uuid.UUID,
+    response: Response,
+    entity_id: uuid.UUID = Depends(require_same_entity),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Cursor retornado no header X-Next-Cursor"),
     db: Session = Depends(get_db)
 ):
     """
     Listar solicitações de vínculo enviadas
 
-    Busca nos observations vínculos que foram solicitados por esta entidade.
+    Retorna vínculos com status 'pending_request' solicitados por esta entidade.
     """
     from app.models import Link as LinkModel
 
-    # Buscar nos observations
-    links = db.query(LinkModel).filter(
-        LinkModel.status == "pending_request",
-        LinkModel.observations.like(f"%entity {entity_id}%")
-    ).all()
+    query = db.query(LinkModel).filter(
+        LinkModel.requested_by_entity_id == entity_id,
+        LinkModel.status == "pending_request"
+    )
 
+    links = _paginate_link_requests(query, cursor, limit, response)
     return [{"link_id": link.id, "vehicle_id": link.vehicle_id, "status": link.status} for link in links]
 
 
@@ -600,12 +760,14 @@ def get_sent_link_requests(
 def approve_link_request(
     request_id: uuid.UUID,
     approval: LinkApproval,
+    current_entity_id: uuid.UUID = Depends(get_current_entity_id),
     db: Session = Depends(get_db)
 ):
     """
     Aprovar solicitação de vínculo
 
-    Muda o status de 'pending_request' para 'active'.
+    Muda o status de 'pending_request' para 'active'. Só a entidade
+    solicitada pode aprovar.
     """
     from app.models import Link as LinkModel
 
@@ -613,6 +775,9 @@ def approve_link_request(
     if not link:
         raise HTTPException(status_code=404, detail="Link request not found")
 
+    if link.entity_id != current_entity_id:
+        raise HTTPException(status_code=403, detail="Only the requested entity can answer this request")
+
     if link.status != "pending_request":
         raise HTTPException(status_code=400, detail="Link is not pending approval")
 
@@ -629,6 +794,8 @@ def approve_link_request(
 
     db.commit()
     db.refresh(link)
+    permission_resolver.invalidate_link(link)
+    hot_reads.invalidate_vehicle(link.vehicle_id)
 
     return link
 
@@ -637,12 +804,13 @@ def approve_link_request(
 def reject_link_request(
     request_id: uuid.UUID,
     reason: Optional[str] = None,
+    current_entity_id: uuid.UUID = Depends(get_current_entity_id),
     db: Session = Depends(get_db)
 ):
     """
     Rejeitar solicitação de vínculo
 
-    Muda o status para 'rejected'.
+    Muda o status para 'rejected'. Só a entidade solicitada pode rejeitar.
     """
     from app.models import Link as LinkModel
 
@@ -650,6 +818,9 @@ def reject_link_request(
     if not link:
         raise HTTPException(status_code=404, detail="Link request not found")
 
+    if link.entity_id != current_entity_id:
+        raise HTTPException(status_code=403, detail="Only the requested entity can answer this request")
+
     if link.status != "pending_request":
         raise HTTPException(status_code=400, detail="Link is not pending approval")
 
@@ -659,6 +830,7 @@ def reject_link_request(
 
     db.commit()
     db.refresh(link)
+    hot_reads.invalidate_vehicle(link.vehicle_id)
 
     return link
 
@@ -666,7 +838,7 @@ def reject_link_request(
 @router.post("/vehicle-links/claim", response_model=VehicleEntityLink)
 def claim_vehicle_link(
     claim: LinkClaim,
-    claiming_entity_id: uuid.UUID = Query(..., description="ID da entidade que está reivindicando"),
+    claiming_entity_id: uuid.UUID = Depends(acting_entity_id("claiming_entity_id")),
     db: Session = Depends(get_db)
 ):
     """
@@ -705,6 +877,7 @@ def claim_vehicle_link(
     db.add(link)
     db.commit()
     db.refresh(link)
+    hot_reads.invalidate_vehicle(link.vehicle_id)
 
     return link
 
@@ -721,7 +894,9 @@ def get_pending_claims(
     """
     from app.models import Link as LinkModel
 
-    claims = db.query(LinkModel).filter(
+    claims = db.query(LinkModel).options(
+        selectinload(LinkModel.entity).options(*entity_summary_options())
+    ).filter(
         LinkModel.status == "pending_validation"
     ).all()
 
@@ -762,6 +937,8 @@ def validate_claim(
 
     db.commit()
     db.refresh(link)
+    permission_resolver.invalidate_link(link)
+    hot_reads.invalidate_vehicle(link.vehicle_id)
 
     return link
 
@@ -769,7 +946,7 @@ def validate_claim(
 @router.post("/vehicle-links/grant", response_model=VehicleEntityLink)
 def grant_vehicle_link(
     grant: LinkGrant,
-    granting_entity_id: uuid.UUID = Query(..., description="ID da entidade que está concedendo"),
+    granting_entity_id: uuid.UUID = Depends(acting_entity_id("granting_entity_id")),
     db: Session = Depends(get_db)
 ):
     """
@@ -797,7 +974,9 @@ def grant_vehicle_link(
     if not granted_entity:
         raise HTTPException(status_code=404, detail="Granted entity not found")
 
-    # TODO: Verificar se granting_entity tem permissão para conceder vínculos neste veículo
+    # Verificar se granting_entity tem permissão para conceder vínculos neste veículo
+    if not permission_resolver.has_permission(db, granting_entity_id, grant.vehicle_id, "vehicle.grant_access"):
+        raise HTTPException(status_code=403, detail="Granting entity cannot grant access to this vehicle")
 
     # Criar link ativo
     link = LinkModel(
@@ -814,6 +993,8 @@ def grant_vehicle_link(
     db.add(link)
     db.commit()
     db.refresh(link)
+    permission_resolver.invalidate_link(link)
+    hot_reads.invalidate_vehicle(link.vehicle_id)
 
     return link
 
@@ -822,12 +1003,14 @@ def grant_vehicle_link(
 def deactivate_vehicle_link(
     link_id: uuid.UUID,
     reason: Optional[str] = None,
+    current_entity_id: uuid.UUID = Depends(get_current_entity_id),
     db: Session = Depends(get_db)
 ):
     """
     Desvincular-se (desativar vínculo)
 
-    Muda o status do vínculo para 'terminated'.
+    Muda o status do vínculo para 'terminated'. Só a entidade do vínculo
+    pode se desvincular (para terceiros, use /revoke).
     Não deleta o registro, apenas atualiza o status.
     """
     from app.models import Link as LinkModel
@@ -837,6 +1020,9 @@ def deactivate_vehicle_link(
     if not link:
         raise HTTPException(status_code=404, detail="Link not found")
 
+    if link.entity_id != current_entity_id:
+        raise HTTPException(status_code=403, detail="Only the linked entity can deactivate this link")
+
     if link.status == "terminated":
         raise HTTPException(status_code=400, detail="Link already terminated")
 
@@ -848,6 +1034,8 @@ def deactivate_vehicle_link(
 
     db.commit()
     db.refresh(link)
+    permission_resolver.invalidate_link(link)
+    hot_reads.invalidate_vehicle(link.vehicle_id)
 
     return link
 
@@ -855,7 +1043,7 @@ def deactivate_vehicle_link(
 @router.post("/vehicle-links/{link_id}/revoke", response_model=VehicleEntityLink)
 def revoke_vehicle_link(
     link_id: uuid.UUID,
-    revoking_entity_id: uuid.UUID = Query(..., description="ID da entidade que está revogando"),
+    revoking_entity_id: uuid.UUID = Depends(acting_entity_id("revoking_entity_id")),
     reason: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
@@ -874,7 +1062,9 @@ def revoke_vehicle_link(
     if link.status == "terminated":
         raise HTTPException(status_code=400, detail="Link already terminated")
 
-    # TODO: Verificar se revoking_entity tem permissão para revogar este vínculo
+    # Verificar se revoking_entity tem permissão para gerenciar vínculos neste veículo
+    if not permission_resolver.has_permission(db, revoking_entity_id, link.vehicle_id, "vehicle.grant_access"):
+        raise HTTPException(status_code=403, detail="Revoking entity cannot manage links of this vehicle")
 
     # Revoke
     link.status = "revoked"
@@ -884,5 +1074,7 @@ def revoke_vehicle_link(
 
     db.commit()
     db.refresh(link)
+    permission_resolver.invalidate_link(link)
+    hot_reads.invalidate_vehicle(link.vehicle_id)
 
     return link
\ No newline at end of file
@@ -1,86 +1,224 @@
 """
 Endpoint para moments com detalhes completos
 """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 from app.core.database import get_db
+from app.core.pagination import encode_cursor, decode_cursor
+from typing import Optional
+from datetime import datetime
+from uuid import UUID
 
 router = APIRouter()
 
 
-@router.get("/moments-with-details")
-def get_moments_with_details(db: Session = Depends(get_db)):
-    """Retorna todos os momentos com detalhes completos (vehicle, entity, images, reactions, comments)"""
-    query = text("""
+# SELECT completo de um momento (veículo, entidade, imagens, reações e comentários)
+MOMENT_DETAILS_SELECT = """
+    SELECT
+        mo.*,
+        json_build_object(
+            'id', v.id,
+            'brand_id', v.brand_id,
+            'model_id', v.model_id,
+            'version_id', v.version_id,
+            'category_id', v.category_id,
+            'chassis', v.chassis,
+            'model_year', v.model_year,
+            'manufacture_year', v.manufacture_year,
+            'active', v.active,
+            'created_at', v.created_at,
+            'updated_at', v.updated_at,
+            'brands', json_build_object(
+                'id', b.id,
+                'brand', b.brand
+            ),
+            'models', json_build_object(
+                'id', md.id,
+                'model', md.model
+            ),
+            'model_versions', CASE
+                WHEN mv.id IS NOT NULL THEN json_build_object(
+                    'id', mv.id,
+                    'version', mv.version
+                )
+                ELSE NULL
+            END,
+            'plates', COALESCE(
+                (SELECT json_agg(json_build_object(
+                    'id', p.id,
+                    'plate', p.plate,
+                    'state', p.state,
+                    'active', p.active
+                ))
+                FROM plates p
+                WHERE p.vehicle_id = v.id AND p.active = true),
+                '[]'::json
+            ),
+            'colors', COALESCE(
+                (SELECT json_agg(json_build_object(
+                    'id', c.id,
+                    'color', c.color,
+                    'active', c.active
+                ))
+                FROM colors c
+                WHERE c.vehicle_id = v.id AND c.active = true),
+                '[]'::json
+            ),
+            'vehicle_images', COALESCE(
+                (SELECT json_agg(json_build_object(
+                    'id', vi.id,
+                    'image_url', vi.image_url,
+                    'is_primary', vi.is_primary,
+                    'width', vi.width,
+                    'height', vi.height
+                ))
+                FROM vehicle_images vi
+                WHERE vi.vehicle_id = v.id),
+                '[]'::json
+            )
+        ) as vehicles,
+        json_build_object(
+            'id', e.id,
+            'entity_type', e.entity_type,
+            'name', en.name_value,
+            'email', ec_email.contact_value
+        ) as entities,
+        COALESCE(
+            (SELECT json_agg(json_build_object(
+                'id', mi.id,
+                'image_url', mi.image_url,
+                'image_order', mi.image_order,
+                'width', mi.width,
+                'height', mi.height
+            ) ORDER BY mi.image_order)
+            FROM moment_images mi
+            WHERE mi.moment_id = mo.id),
+            '[]'::json
+        ) as moment_images,
+        COALESCE(
+            (SELECT json_agg(json_build_object(
+                'id', mr.id,
+                'reaction_type', mr.reaction_type,
+                'entities', json_build_object(
+                    'id', er.id,
+                    'name', ern.name_value
+                )
+            ))
+            FROM moment_reactions mr
+            LEFT JOIN entities er ON mr.entity_id = er.id
+            LEFT JOIN entity_names ern ON er.primary_name_id = ern.id
+            WHERE mr.moment_id = mo.id),
+            '[]'::json
+        ) as moment_reactions,
+        COALESCE(
+            (SELECT json_agg(json_build_object(
+                'id', mc.id,
+                'comment', mc.comment,
+                'parent_comment_id', mc.parent_comment_id,
+                'created_at', mc.created_at,
+                'entities', json_build_object(
+                    'id', ecc.id,
+                    'name', eccn.name_value
+                )
+            ) ORDER BY mc.created_at)
+            FROM moment_comments mc
+            LEFT JOIN entities ecc ON mc.entity_id = ecc.id
+            LEFT JOIN entity_names eccn ON ecc.primary_name_id = eccn.id
+            WHERE mc.moment_id = mo.id),
+            '[]'::json
+        ) as moment_comments
+    FROM moments mo
+    LEFT JOIN vehicles v ON mo.vehicle_id = v.id
+    LEFT JOIN brands b ON v.brand_id = b.id
+    LEFT JOIN models md ON v.model_id = md.id
+    LEFT JOIN model_versions mv ON v.version_id = mv.id
+    LEFT JOIN entities e ON mo.entity_id = e.id
+    LEFT JOIN entity_names en ON e.primary_name_id = en.id
+    LEFT JOIN entity_contacts ec_email ON e.primary_email_contact_id = ec_email.id
+"""
+
+
+@router.get("/moments-feed")
+def get_moments_feed(
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Cursor retornado no header X-Next-Cursor"),
+    vehicle_id: Optional[UUID] = Query(None, description="Filtrar momentos de um veículo"),
+    entity_id: Optional[UUID] = Query(None, description="Filtrar momentos de uma entidade"),
+    db: Session = Depends(get_db)
+):
+    """
+    Feed de momentos paginado por keyset em (created_at, id)
+
+    Cada item traz o momento, um resumo do veículo e da entidade, as imagens
+    do momento e as contagens de reações e comentários. Os detalhes completos
+    ficam em /moments-with-details/{moment_id}.
+
+    Momentos sem created_at vêm no fim. Quando houver mais resultados, o
+    cursor da próxima página vem no header X-Next-Cursor.
+    """
+    position = decode_cursor(
+        cursor, 2, (lambda value: None if value is None else datetime.fromisoformat(value), UUID)
+    )
+
+    conditions = ["mo.active = true"]
+    params = {"limit": limit + 1}
+    if vehicle_id:
+        conditions.append("mo.vehicle_id = :vehicle_id")
+        params["vehicle_id"] = str(vehicle_id)
+    if entity_id:
+        conditions.append("mo.entity_id = :entity_id")
+        params["entity_id"] = str(entity_id)
+
+    # Dois trechos da ordem (com data, depois sem), cada um com busca nos
+    # índices de feed (created_at DESC NULLS LAST, id DESC)
+    segments = []
+    if position is None or position[0] is not None:
+        if position is None:
+            segments.append("mo.created_at IS NOT NULL")
+        else:
+            segments.append("(mo.created_at, mo.id) < (CAST(:after_created_at AS timestamptz), CAST(:after_id AS uuid))")
+            params["after_created_at"], params["after_id"] = position[0].isoformat(), str(position[1])
+        segments.append("mo.created_at IS NULL")
+    else:
+        segments.append("mo.created_at IS NULL AND mo.id < CAST(:after_id AS uuid)")
+        params["after_id"] = str(position[1])
+
+    page = " UNION ALL ".join(f"""
+        (SELECT mo.*
+         FROM moments mo
+         WHERE {" AND ".join(conditions + [segment])}
+         ORDER BY mo.created_at DESC NULLS LAST, mo.id DESC
+         LIMIT :limit)
+    """ for segment in segments)
+
+    # A página é escolhida primeiro (só índices de moments); os dados
+    # relacionados são buscados apenas para as linhas da página
+    query = text(f"""
+        WITH page AS (
+            SELECT * FROM ({page}) segments
+            ORDER BY created_at DESC NULLS LAST, id DESC
+            LIMIT :limit
+        )
         SELECT
             mo.*,
             json_build_object(
                 'id', v.id,
-                'brand_id', v.brand_id,
-                'model_id', v.model_id,
-                'version_id', v.version_id,
-                'category_id', v.category_id,
-                'chassis', v.chassis,
-                'model_year', v.model_year,
-                'manufacture_year', v.manufacture_year,
-                'active', v.active,
-                'created_at', v.created_at,
-                'updated_at', v.updated_at,
-                'brands', json_build_object(
-                    'id', b.id,
-                    'brand', b.brand
-                ),
-                'models', json_build_object(
-                    'id', md.id,
-                    'model', md.model
-                ),
-                'model_versions', CASE
-                    WHEN mv.id IS NOT NULL THEN json_build_object(
-                        'id', mv.id,
-                        'version', mv.version
-                    )
-                    ELSE NULL
-                END,
-                'plates', COALESCE(
-                    (SELECT json_agg(json_build_object(
-                        'id', p.id,
-                        'plate', p.plate,
-                        'state', p.state,
-                        'active', p.active
-                    ))
-                    FROM plates p
-                    WHERE p.vehicle_id = v.id AND p.active = true),
-                    '[]'::json
-                ),
-                'colors', COALESCE(
-                    (SELECT json_agg(json_build_object(
-                        'id', c.id,
-                        'color', c.color,
-                        'active', c.active
-                    ))
-                    FROM colors c
-                    WHERE c.vehicle_id = v.id AND c.active = true),
-                    '[]'::json
-                ),
-                'vehicle_images', COALESCE(
-                    (SELECT json_agg(json_build_object(
-                        'id', vi.id,
-                        'image_url', vi.image_url,
-                        'is_primary', vi.is_primary,
-                        'width', vi.width,
-                        'height', vi.height
-                    ))
+                'brands', json_build_object('id', b.id, 'brand', b.brand),
+                'models', json_build_object('id', md.id, 'model', md.model),
+                'primary_image_url', (
+                    SELECT vi.image_url
                     FROM vehicle_images vi
-                    WHERE vi.vehicle_id = v.id),
-                    '[]'::json
+                    WHERE vi.vehicle_id = v.id
+                    ORDER BY vi.is_primary DESC, vi.created_at
+                    LIMIT 1
                 )
             ) as vehicles,
             json_build_object(
                 'id', e.id,
                 'entity_type', e.entity_type,
-                'name', en.name_value,
-                'email', ec_email.contact_value
+                'name', en.name_value
             ) as entities,
             COALESCE(
                 (SELECT json_agg(json_build_object(
@@ -94,46 +232,36 @@ def get_moments_with_details(db: Session = Depends(get_db)):
                 WHERE mi.moment_id = mo.id),
                 '[]'::json
             ) as moment_images,
-            COALESCE(
-                (SELECT json_agg(json_build_object(
-                    'id', mr.id,
-                    'reaction_type', mr.reaction_type,
-                    'entities', json_build_object(
-                        'id', er.id,
-                        'name', ern.name_value
-                    )
-                ))
-                FROM moment_reactions mr
-                LEFT JOIN entities er ON mr.entity_id = er.id
-                LEFT JOIN entity_names ern ON er.primary_name_id = ern.id
-                WHERE mr.moment_id = mo.id),
-                '[]'::json
-            ) as moment_reactions,
-            COALESCE(
-                (SELECT json_agg(json_build_object(
-                    'id', mc.id,
-                    'comment', mc.comment,
-                    'parent_comment_id', mc.parent_comment_id,
-                    'created_at', mc.created_at,
-                    'entities', json_build_object(
-                        'id', ecc.id,
-                        'name', eccn.name_value
-                    )
-                ) ORDER BY mc.created_at)
-                FROM moment_comments mc
-                LEFT JOIN entities ecc ON mc.entity_id = ecc.id
-                LEFT JOIN entity_names eccn ON ecc.primary_name_id = eccn.id
-                WHERE mc.moment_id = mo.id),
-                '[]'::json
-            ) as moment_comments
-        FROM moments mo
+            (SELECT count(*) FROM moment_reactions mr WHERE mr.moment_id = mo.id) as reaction_count,
+            (SELECT count(*) FROM moment_comments mc WHERE mc.moment_id = mo.id) as comment_count
+        FROM page mo
         LEFT JOIN vehicles v ON mo.vehicle_id = v.id
         LEFT JOIN brands b ON v.brand_id = b.id
         LEFT JOIN models md ON v.model_id = md.id
-        LEFT JOIN model_versions mv ON v.version_id = mv.id
         LEFT JOIN entities e ON mo.entity_id = e.id
         LEFT JOIN entity_names en ON e.primary_name_id = en.id
-        LEFT JOIN entity_contacts ec_email ON e.primary_email_contact_id = ec_email.id
+        ORDER BY mo.created_at DESC NULLS LAST, mo.id DESC
+    """)
+
+    result = db.execute(query, params)
+    columns = result.keys()
+    items = [dict(zip(columns, row)) for row in result.fetchall()]
+
+    if len(items) > limit:
+        items = items[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(items[-1]["created_at"], items[-1]["id"])
+
+    return items
+
+
+@router.get("/moments-with-details")
+def get_moments_with_details(db: Session = Depends(get_db)):
+    """
+    Retorna todos os momentos com detalhes completos (vehicle, entity, images, reactions, comments)
+
+    Sem paginação: para listas use /moments-feed.
+    """
+    query = text(MOMENT_DETAILS_SELECT + """
         WHERE mo.active = true
         ORDER BY mo.created_at DESC
     """)
@@ -141,3 +269,20 @@ def get_moments_with_details(db: Session = Depends(get_db)):
     result = db.execute(query)
     columns = result.keys()
     return [dict(zip(columns, row)) for row in result.fetchall()]
+
+
+@router.get("/moments-with-details/{moment_id}")
+def get_moment_with_details(moment_id: UUID, db: Session = Depends(get_db)):
+    """Retorna um momento com detalhes completos (vehicle, entity, images, reactions, comments)"""
+    query = text(MOMENT_DETAILS_SELECT + """
+        WHERE mo.id = :moment_id AND mo.active = true
+    """)
+
+    result = db.execute(query, {"moment_id": str(moment_id)})
+    columns = result.keys()
+    row = result.fetchone()
+
+    if row:
+        return dict(zip(columns, row))
+
+    return {"error": "Moment not found"}
@@ -9,15 +9,19 @@ from datetime import datetime
 import mimetypes
 from PIL import Image
 
+from app.core.batch import match_any_id, order_by_ids, unique_ids
+from app.core.config import settings
 from app.core.database import get_db
 from app.models import File, Entity, Vehicle
+from app.services import hot_reads
+from app.schemas.batch import BatchGetRequest, BatchGetResponse
 from app.schemas.file import FileUploadResponse, FileUpdate, FileInfo
 
 router = APIRouter()
 
 
 # Configuração de diretório de upload
-UPLOAD_DIR = Path("./uploads")
+UPLOAD_DIR = Path(settings.STORAGE_PATH)
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 
@@ -158,6 +162,25 @@ def list_files(
     return files
 
 
+@router.post("/batch", response_model=BatchGetResponse[FileInfo])
+def get_files_batch(
+    batch: BatchGetRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Buscar vários arquivos por ID em uma requisição
+
+    - **ids**: Até BATCH_MAX_IDS ids (repetidos são ignorados)
+
+    Uma query (WHERE id = ANY(:ids)); **items** vem na ordem dos ids pedidos
+    e **missing** lista os ids que não existem.
+    """
+    ids = unique_ids(batch.ids)
+    files = db.query(File).filter(match_any_id(File.id, ids)).all()
+    items, missing = order_by_ids(ids, files, key=lambda file: file.id)
+    return {"items": items, "missing": missing}
+
+
 @router.get("/{file_id}", response_model=FileInfo)
 def get_file(
     file_id: uuid.UUID,
@@ -190,6 +213,8 @@ def update_file_info(
     if not file:
         raise HTTPException(status_code=404, detail="File not found")
 
+    previous_vehicle_id = file.vehicle_id
+
     # Atualizar apenas campos fornecidos
     update_data = file_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
@@ -197,6 +222,9 @@ def update_file_info(
 
     db.commit()
     db.refresh(file)
+    # Capas do veículo apontam para o arquivo
+    hot_reads.invalidate_vehicle(previous_vehicle_id)
+    hot_reads.invalidate_vehicle(file.vehicle_id)
 
     return file
 
@@ -226,13 +254,17 @@ def delete_file(
             except Exception as e:
                 raise HTTPException(status_code=500, detail=f"Error deleting physical file: {str(e)}")
 
+        vehicle_id = file.vehicle_id
         db.delete(file)
         db.commit()
+        hot_reads.invalidate_vehicle(vehicle_id)
         return {"message": "File permanently deleted"}
     else:
         # Soft delete - apenas marca como deleted
+        vehicle_id = file.vehicle_id
         file.status = "deleted"
         db.commit()
+        hot_reads.invalidate_vehicle(vehicle_id)
         return {"message": "File marked as deleted"}
 
 
@@ -1,9 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Header, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from datetime import datetime, date
 import uuid
+from app.core.batch import order_by_ids, unique_ids
 from app.core.database import get_db
+from app.core.fieldsets import FieldSet, required_fields, sparse_fieldset
+from app.api.deps import require_vehicle_permission
 from app.models import Vehicle, Brand, Model, Plate, PlateType, Color, VehicleColor, Link, LinkType, VehicleCover
 from app.schemas import (
     Vehicle as VehicleSchema,
@@ -12,6 +17,9 @@ from app.schemas import (
     VehicleWithDetails,
 )
 from app.services.entity_service import VehicleEntityLinkService
+from app.services.permission_service import permission_resolver
+from app.services import hot_reads, read_models
+from app.schemas.batch import BatchGetRequest, BatchGetResponse
 from app.schemas.entity import (
     VehicleLinksResponse,
     VehicleEntityLinkWithEntity,
@@ -20,12 +28,20 @@ from app.schemas.entity import (
 
 router = APIRouter()
 
+# ?fields= / ?include= das respostas VehicleWithDetails
+vehicle_fieldset = sparse_fieldset(
+    read_models.VEHICLE_FIELDS,
+    relations=read_models.VEHICLE_RELATIONS,
+    always=required_fields(VehicleWithDetails),
+)
+
 
-@router.get("/", response_model=List[VehicleWithDetails])
+@router.get("/", response_model=List[VehicleWithDetails], response_model_exclude_unset=True)
 def list_vehicles(
     skip: int = 0,
     limit: int = 100,
     entity_id: Optional[str] = Header(None, alias="X-Entity-ID"),
+    fieldset: FieldSet = Depends(vehicle_fieldset),
     db: Session = Depends(get_db),
 ):
     """
@@ -33,26 +49,37 @@ def list_vehicles(
 
     - **skip**: Quantos registros pular (paginação)
     - **limit**: Limite de registros retornados
+    - **fields**: Campos da resposta (ex: id,model_year,current_plate); id/created_at/updated_at sempre vêm
+    - **include**: Relacionamentos (brand, model, version, entity_links, covers); sem include, todos
     - **X-Entity-ID**: ID da entidade (opcional, via header)
     """
-    # Carregar relacionamentos com eager loading
-    vehicles = (
-        db.query(Vehicle)
-        .options(
-            joinedload(Vehicle.brand),
-            joinedload(Vehicle.model),
-            joinedload(Vehicle.version),
-            joinedload(Vehicle.plates),
-            joinedload(Vehicle.vehicle_colors).joinedload(VehicleColor.color),
-            joinedload(Vehicle.covers),
-        )
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    # Leitura só das colunas da resposta, sem instanciar o ORM; JOINs e a
+    # query de capas só para os campos pedidos
+    vehicles = read_models.list_vehicle_rows(db, skip=skip, limit=limit, fieldset=fieldset)
     return vehicles
 
 
+@router.post("/batch", response_model=BatchGetResponse[VehicleWithDetails], response_model_exclude_unset=True)
+def get_vehicles_batch(
+    batch: BatchGetRequest,
+    fieldset: FieldSet = Depends(vehicle_fieldset),
+    db: Session = Depends(get_db),
+):
+    """
+    Buscar vários veículos por ID em uma requisição
+
+    - **ids**: Até BATCH_MAX_IDS ids (repetidos são ignorados)
+    - **fields** / **include**: Como em GET /vehicles
+
+    Uma query (WHERE id = ANY(:ids)), mais a das capas; **items** vem na
+    ordem dos ids pedidos e **missing** lista os ids que não existem.
+    """
+    ids = unique_ids(batch.ids)
+    rows = read_models.get_vehicle_rows(db, ids, fieldset=fieldset)
+    items, missing = order_by_ids(ids, rows, key=lambda row: row["id"])
+    return {"items": items, "missing": missing}
+
+
 @router.post("/", response_model=VehicleWithDetails, status_code=status.HTTP_201_CREATED)
 def create_vehicle(
     vehicle_in: VehicleCreate,
@@ -240,6 +267,7 @@ def create_vehicle(
         # Commit de toda a transação
         print(">>> [Backend] Commitando transação no banco de dados...")
         db.commit()
+        hot_reads.invalidate_vehicle(vehicle.id)
         print("✓✓✓ [Backend] VEÍCULO CRIADO COM SUCESSO ✓✓✓")
 
         # Recarregar veículo sem eager loading dos relationships
@@ -268,46 +296,71 @@ def create_vehicle(
 @router.get("/{vehicle_id}", response_model=VehicleWithDetails)
 def get_vehicle(
     vehicle_id: str,
+    fieldset: FieldSet = Depends(vehicle_fieldset),
     db: Session = Depends(get_db),
 ):
     """
     Obter um veículo específico por ID
 
     - **vehicle_id**: ID do veículo
+    - **fields** / **include**: Como em GET /vehicles
+
+    Requisições concorrentes para o mesmo veículo e fieldset fazem uma
+    leitura só, reaproveitada por HOT_READ_CACHE_TTL_SECONDS.
     """
-    vehicle = (
-        db.query(Vehicle)
-        .options(
-            joinedload(Vehicle.brand),
-            joinedload(Vehicle.model),
-            joinedload(Vehicle.version),
-            joinedload(Vehicle.plates),
-            joinedload(Vehicle.vehicle_colors).joinedload(VehicleColor.color),
-            joinedload(Vehicle.covers),
+    def load():
+        # joinedload só dos relacionamentos que a resposta vai usar
+        # (placas e cores não fazem parte de VehicleWithDetails)
+        options = [
+            joinedload(relation)
+            for name, relation in (("brand", Vehicle.brand), ("model", Vehicle.model), ("version", Vehicle.version))
+            if fieldset.wants(name)
+        ]
+        if fieldset.wants("covers") or fieldset.wants("primary_cover_url"):
+            options.append(joinedload(Vehicle.covers))
+
+        vehicle = db.query(Vehicle).options(*options).filter(Vehicle.id == vehicle_id).first()
+        if not vehicle:
+            return None
+
+        if fieldset.is_full:
+            return jsonable_encoder(VehicleWithDetails.model_validate(vehicle))
+
+        # Só os atributos pedidos: properties como current_plate/current_km
+        # fazem uma query cada e ficam de fora se não foram pedidas
+        data = {
+            name: getattr(vehicle, name)
+            for name in VehicleWithDetails.model_fields
+            if fieldset.wants(name)
+        }
+        return jsonable_encoder(
+            VehicleWithDetails.model_validate(data),
+            exclude=fieldset.exclude(VehicleWithDetails.model_fields),
         )
-        .filter(Vehicle.id == vehicle_id)
-        .first()
-    )
 
-    if not vehicle:
+    content = hot_reads.load_vehicle(vehicle_id, fieldset.cache_key, load)
+
+    if content is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Vehicle not found",
         )
 
-    return vehicle
+    return JSONResponse(content=content)
 
 
 @router.put("/{vehicle_id}", response_model=VehicleWithDetails)
 def update_vehicle(
     vehicle_id: str,
     vehicle_in: VehicleUpdate,
+    entity_id: uuid.UUID = Depends(require_vehicle_permission("vehicle.edit")),
     db: Session = Depends(get_db),
 ):
     """
     Atualizar um veículo existente
 
     - **vehicle_id**: ID do veículo
+    - **Authorization**: Bearer de uma entidade com permissão vehicle.edit no veículo
     """
     vehicle = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
 
@@ -323,6 +376,7 @@ def update_vehicle(
         setattr(vehicle, field, value)
 
     db.commit()
+    hot_reads.invalidate_vehicle(vehicle.id)
     db.refresh(vehicle)
 
     return vehicle
@@ -332,6 +386,7 @@ def update_vehicle(
 def patch_vehicle(
     vehicle_id: str,
     vehicle_in: VehicleUpdate,
+    entity_id: uuid.UUID = Depends(require_vehicle_permission("vehicle.edit")),
     db: Session = Depends(get_db),
 ):
     """
@@ -340,6 +395,7 @@ def patch_vehicle(
     Permite atualizar apenas os campos fornecidos, sem precisar enviar todos os dados.
 
     - **vehicle_id**: ID do veículo
+    - **Authorization**: Bearer de uma entidade com permissão vehicle.edit no veículo
     """
     vehicle = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
 
@@ -355,6 +411,7 @@ def patch_vehicle(
         setattr(vehicle, field, value)
 
     db.commit()
+    hot_reads.invalidate_vehicle(vehicle.id)
     db.refresh(vehicle)
 
     return vehicle
@@ -363,12 +420,14 @@ def patch_vehicle(
 @router.delete("/{vehicle_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_vehicle(
     vehicle_id: str,
+    entity_id: uuid.UUID = Depends(require_vehicle_permission("vehicle.delete")),
     db: Session = Depends(get_db),
 ):
     """
     Deletar um veículo
 
     - **vehicle_id**: ID do veículo
+    - **Authorization**: Bearer de uma entidade com permissão vehicle.delete no veículo
     """
     vehicle = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
 
@@ -381,6 +440,8 @@ def delete_vehicle(
     # Hard delete
     db.delete(vehicle)
     db.commit()
+    permission_resolver.invalidate(vehicle_id=vehicle.id)
+    hot_reads.invalidate_vehicle(vehicle.id)
 
     return None
 
@@ -0,0 +1,55 @@
+"""
+Leitura em lote por ids (multi-get)
+
+- unique_ids: valida o tamanho do lote (BATCH_MAX_IDS) e remove repetidos
+- match_any_id: filtro `id = ANY(:ids)` com um único parâmetro array
+- order_by_ids: devolve os itens na ordem pedida e os ids não encontrados
+"""
+from typing import Callable, Iterable, List, Sequence, Tuple, TypeVar
+import uuid
+
+from fastapi import HTTPException, status
+from sqlalchemy import String, any_, cast, literal
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PGUUID
+
+from .config import settings
+
+T = TypeVar("T")
+
+
+def unique_ids(ids: Sequence[uuid.UUID]) -> List[uuid.UUID]:
+    """
+    Ids do lote sem repetição, na ordem em que vieram
+
+    Responde 400 se o lote passar de BATCH_MAX_IDS ids distintos.
+    """
+    unique = list(dict.fromkeys(ids))
+    if len(unique) > settings.BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many ids: {len(unique)} (max {settings.BATCH_MAX_IDS})",
+        )
+    return unique
+
+
+def match_any_id(column, ids: Iterable[uuid.UUID]):
+    """
+    column = ANY(CAST(:ids AS UUID[]))
+
+    Um único parâmetro array em vez de IN (:id_1, :id_2, ...): o SQL é o
+    mesmo para qualquer quantidade de ids.
+    """
+    ids_param = literal([str(value) for value in ids], ARRAY(String))
+    return column == any_(cast(ids_param, ARRAY(PGUUID(as_uuid=True))))
+
+
+def order_by_ids(
+    ids: Sequence[uuid.UUID],
+    items: Iterable[T],
+    key: Callable[[T], uuid.UUID],
+) -> Tuple[List[T], List[uuid.UUID]]:
+    """(itens na ordem de `ids`, ids sem item correspondente)"""
+    by_id = {key(item): item for item in items}
+    found = [by_id[item_id] for item_id in ids if item_id in by_id]
+    missing = [item_id for item_id in ids if item_id not in by_id]
+    return found, missing
@@ -26,6 +26,21 @@ class Settings(BaseSettings):
     SECRET_KEY: str = secrets.token_urlsafe(32)
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 dias
+    # Clientes antigos: aceitar X-Entity-ID / ?entity_id= sem token (só durante a migração)
+    AUTH_ALLOW_LEGACY_ENTITY_ID: bool = False
+
+    # Hash de senhas (bcrypt em pool de processos)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    # Senhas (entity_credentials): tamanho mínimo e bloqueio após erros seguidos
+    PASSWORD_MIN_LENGTH: int = 8
+    PASSWORD_MAX_FAILED_ATTEMPTS: int = 5
+    PASSWORD_LOCK_MINUTES: int = 15
+
+    # Cache de tokens JWT já verificados (por processo)
+    TOKEN_CACHE_TTL_SECONDS: int = 300
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000
 
     # OpenAI
     OPENAI_API_KEY: str = ""
@@ -41,6 +56,45 @@ class Settings(BaseSettings):
     STORAGE_TYPE: str = "local"
     STORAGE_PATH: str = "./uploads"
 
+    # Cache de permissões (por processo; o TTL é a janela em que outro
+    # worker ainda pode conceder uma permissão de um vínculo revogado)
+    PERMISSION_CACHE_TTL_SECONDS: int = 5
+    PERMISSION_CACHE_MAX_ENTRIES: int = 10000
+    PERMISSION_CATALOG_TTL_SECONDS: int = 300
+
+    # Cache de lookup de contatos (email/telefone -> entidade)
+    CONTACT_LOOKUP_CACHE_TTL_SECONDS: int = 60
+    CONTACT_LOOKUP_CACHE_MAX_ENTRIES: int = 10000
+
+    # Profiler de queries por requisição (Server-Timing + log de lentas)
+    QUERY_PROFILER_ENABLED: bool = True
+    SLOW_REQUEST_MS: int = 500
+    SLOW_REQUEST_QUERY_COUNT: int = 30
+    SLOW_QUERY_MS: int = 100
+
+    # Métricas Prometheus (GET /metrics)
+    METRICS_ENABLED: bool = True
+
+    # Health checks (readiness) e warm-up
+    HEALTH_DB_TIMEOUT_SECONDS: float = 2.0
+    HEALTH_POOL_SATURATION_THRESHOLD: float = 0.9
+    HEALTH_WARMUP_CONNECTIONS: int = 5
+
+    # Leitura em lote (POST .../batch): máximo de ids por requisição
+    BATCH_MAX_IDS: int = 100
+
+    # Leituras quentes (GET /vehicles/{id}, GET /conversations/{id}): single-flight + cache curto
+    HOT_READ_CACHE_TTL_SECONDS: float = 2.0
+    HOT_READ_CACHE_MAX_ENTRIES: int = 5000
+
+    # Cache de respostas do detalhe de veículo: memory (por processo) ou redis (compartilhado)
+    RESPONSE_CACHE_BACKEND: str = "memory"
+    RESPONSE_CACHE_REDIS_URL: str = ""
+    RESPONSE_CACHE_TTL_SECONDS: int = 300
+    # memory não invalida os outros workers: o TTL é o atraso máximo entre eles
+    RESPONSE_CACHE_MEMORY_TTL_SECONDS: int = 5
+    RESPONSE_CACHE_MAX_ENTRIES: int = 10000
+
     class Config:
         env_file = ".env"
         case_sensitive = True
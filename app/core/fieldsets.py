@@ -0,0 +1,117 @@
+"""
+Sparse fieldsets: ?fields= e ?include= nas respostas pesadas
+
+- fields=id,model_year,current_plate: só esses campos (além dos obrigatórios)
+- include=brand,covers: todos os campos simples e só esses relacionamentos
+- os dois juntos: a união; sem nenhum: resposta completa (compatível)
+
+O FieldSet é usado tanto para podar o SQL (colunas, JOINs, joinedload,
+queries de relacionamentos) quanto para podar o JSON da resposta.
+"""
+from typing import FrozenSet, Iterable, Optional, Set
+from fastapi import HTTPException, Query, status
+
+
+class FieldSet:
+    """Campos e relacionamentos pedidos pelo cliente"""
+
+    def __init__(
+        self,
+        fields: Optional[FrozenSet[str]] = None,
+        include: Optional[FrozenSet[str]] = None,
+        relations: Iterable[str] = (),
+        always: Iterable[str] = (),
+    ):
+        self.fields = fields
+        self.include = include
+        self.relations = frozenset(relations)
+        self.always = frozenset(always)
+
+    @property
+    def is_full(self) -> bool:
+        """Sem fields= nem include=: resposta completa"""
+        return self.fields is None and self.include is None
+
+    @property
+    def cache_key(self) -> tuple:
+        """Identifica o fieldset em chaves de cache (independe da ordem na query string)"""
+        return (
+            tuple(sorted(self.fields)) if self.fields is not None else None,
+            tuple(sorted(self.include)) if self.include is not None else None,
+        )
+
+    def wants(self, name: str) -> bool:
+        if self.is_full or name in self.always:
+            return True
+        if self.fields is not None and name in self.fields:
+            return True
+        if self.include is not None and name in self.include:
+            return True
+        # Só include=: todos os campos simples, relacionamentos só os pedidos
+        return self.fields is None and name not in self.relations
+
+    def exclude(self, names: Iterable[str]) -> Set[str]:
+        """Campos de `names` fora do fieldset (para model_dump/jsonable_encoder exclude=)"""
+        return {name for name in names if not self.wants(name)}
+
+    def prune(self, item: dict) -> dict:
+        if self.is_full:
+            return item
+        return {name: value for name, value in item.items() if self.wants(name)}
+
+
+FULL_FIELDSET = FieldSet()
+
+
+def required_fields(schema) -> FrozenSet[str]:
+    """Campos obrigatórios do schema Pydantic (sempre presentes na resposta)"""
+    return frozenset(name for name, field in schema.model_fields.items() if field.is_required())
+
+
+def _split(value: Optional[str]) -> Optional[FrozenSet[str]]:
+    if value is None:
+        return None
+    return frozenset(part.strip() for part in value.split(",") if part.strip())
+
+
+def sparse_fieldset(fields: Iterable[str], relations: Iterable[str] = (), always: Iterable[str] = ("id",)):
+    """
+    Cria uma dependência que lê ?fields= e ?include= de um recurso
+
+    Nomes desconhecidos respondem 400 (evita que um erro de digitação
+    devolva silenciosamente uma resposta vazia).
+
+    Exemplo:
+        VEHICLE_FIELDS = sparse_fieldset(VehicleWithDetails.model_fields, relations=("brand", "covers"))
+
+        @router.get("/")
+        def list_vehicles(..., fieldset: FieldSet = Depends(VEHICLE_FIELDS)):
+    """
+    allowed = frozenset(fields)
+    relation_names = frozenset(relations)
+    always_names = frozenset(always)
+
+    def dependency(
+        fields: Optional[str] = Query(None, description="Campos da resposta, separados por vírgula"),
+        include: Optional[str] = Query(None, description="Relacionamentos a incluir, separados por vírgula"),
+    ) -> FieldSet:
+        requested_fields = _split(fields)
+        requested_include = _split(include)
+
+        unknown = sorted((requested_fields or frozenset()) - allowed)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown field(s) in fields: {', '.join(unknown)}",
+            )
+        unknown = sorted((requested_include or frozenset()) - relation_names)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown relation(s) in include: {', '.join(unknown)} "
+                       f"(available: {', '.join(sorted(relation_names))})",
+            )
+
+        return FieldSet(requested_fields, requested_include, relation_names, always_names)
+
+    return dependency
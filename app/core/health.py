@@ -0,0 +1,191 @@
+"""
+Checagens de saúde do worker (liveness/readiness) e warm-up de startup
+
+- liveness (/health/live): o processo responde; não toca em dependências
+- readiness (/health/ready): o worker pode receber tráfego
+    * warm-up de startup concluído (pool aberto, catálogo de permissões carregado)
+    * banco responde a SELECT 1 dentro de HEALTH_DB_TIMEOUT_SECONDS
+    * pool de conexões abaixo de HEALTH_POOL_SATURATION_THRESHOLD
+    * diretório de upload (STORAGE_PATH) gravável
+
+As checagens de banco rodam em um executor próprio com timeout: com o
+Postgres fora do ar o probe responde 503 em vez de ficar pendurado. No
+máximo um ping e um warm-up rodam por vez: probes que chegam durante um
+ping em andamento esperam o mesmo ping, em vez de ocupar outra thread
+(um ping pendurado segura a thread dele até o banco responder).
+"""
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from pathlib import Path
+from typing import Optional, Tuple
+
+from sqlalchemy import text
+
+from .config import settings
+from .database import SessionLocal, engine
+
+# Executor só das checagens (não disputa o threadpool dos endpoints):
+# uma thread para o warm-up e uma para o ping
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="health")
+_lock = threading.Lock()
+_warmup_future: Optional[Future] = None
+_ping: Optional[Tuple[Future, float]] = None  # (future, início)
+
+
+class WarmupState:
+    """Estado do warm-up de startup (pending -> running -> done | failed)"""
+
+    def __init__(self):
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.duration_ms: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.status == "done"
+
+    def start(self) -> bool:
+        """Marca como running; False se já está rodando ou concluído"""
+        with self._lock:
+            if self.status in ("running", "done"):
+                return False
+            self.status = "running"
+            self.error = None
+            return True
+
+    def finish(self, error: Optional[str], duration_ms: float) -> None:
+        with self._lock:
+            self.status = "failed" if error else "done"
+            self.error = error
+            self.duration_ms = round(duration_ms, 1)
+
+
+warmup_state = WarmupState()
+
+
+def warm_up() -> None:
+    """
+    Prepara o worker para tráfego: abre conexões do pool e carrega caches
+
+    Abre HEALTH_WARMUP_CONNECTIONS conexões ao mesmo tempo (ficam no pool ao
+    serem devolvidas) e carrega o catálogo de permissões. Em caso de falha,
+    o próximo /health/ready dispara uma nova tentativa.
+    """
+    if not warmup_state.start():
+        return
+
+    # Import aqui: permission_service importa models, que importam database
+    from app.services.permission_service import permission_resolver
+
+    started = time.perf_counter()
+    error = None
+    connections = []
+    try:
+        for _ in range(settings.HEALTH_WARMUP_CONNECTIONS):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.execute(text("SELECT 1"))
+
+        db = SessionLocal()
+        try:
+            permission_resolver.invalidate_catalog()
+            permission_resolver.get_catalog(db)
+        finally:
+            db.close()
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+    finally:
+        for connection in connections:
+            connection.close()
+        warmup_state.finish(error, (time.perf_counter() - started) * 1000)
+
+
+def start_warm_up() -> None:
+    """Dispara o warm-up em segundo plano (não bloqueia o startup), se não há um na fila"""
+    global _warmup_future
+    with _lock:
+        if _warmup_future is None or _warmup_future.done():
+            _warmup_future = _executor.submit(warm_up)
+
+
+# ----------------------------------------------------------------------
+# Checagens
+# ----------------------------------------------------------------------
+
+def _ping_database() -> None:
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+def check_database() -> Tuple[bool, dict]:
+    """SELECT 1 com timeout (reaproveita o ping em andamento, se houver)"""
+    global _ping
+    with _lock:
+        if _ping is None or _ping[0].done():
+            _ping = (_executor.submit(_ping_database), time.perf_counter())
+        future, started = _ping
+    try:
+        future.result(timeout=settings.HEALTH_DB_TIMEOUT_SECONDS)
+    except FutureTimeoutError:
+        return False, {"error": f"timeout after {settings.HEALTH_DB_TIMEOUT_SECONDS}s"}
+    except Exception as exc:
+        return False, {"error": f"{type(exc).__name__}: {exc}"}
+    return True, {"latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+
+def check_pool() -> Tuple[bool, dict]:
+    """Conexões em uso versus capacidade do pool (pool_size + max_overflow)"""
+    pool = engine.pool
+    size = pool.size() if hasattr(pool, "size") else 0
+    checked_out = pool.checkedout() if hasattr(pool, "checkedout") else 0
+    capacity = size + max(getattr(pool, "_max_overflow", 0), 0)
+    if capacity <= 0:
+        return True, {"checked_out": checked_out}
+
+    saturation = checked_out / capacity
+    return saturation < settings.HEALTH_POOL_SATURATION_THRESHOLD, {
+        "checked_out": checked_out,
+        "capacity": capacity,
+        "saturation": round(saturation, 2),
+    }
+
+
+def check_upload_dir() -> Tuple[bool, dict]:
+    """Grava e remove um arquivo temporário em STORAGE_PATH"""
+    path = Path(settings.STORAGE_PATH)
+    try:
+        with tempfile.NamedTemporaryFile(dir=path, prefix=".health-", delete=True) as handle:
+            handle.write(b"ok")
+            handle.flush()
+            os.fsync(handle.fileno())
+    except OSError as exc:
+        return False, {"path": str(path), "error": str(exc)}
+    return True, {"path": str(path)}
+
+
+def readiness() -> Tuple[bool, dict]:
+    """Roda todas as checagens; retorna (pronto, detalhes por checagem)"""
+    # pending: o warm-up do startup ainda está na fila; só falhas são refeitas
+    if warmup_state.status == "failed":
+        start_warm_up()
+
+    checks = {
+        "warmup": (warmup_state.done, {
+            "status": warmup_state.status,
+            "duration_ms": warmup_state.duration_ms,
+            **({"error": warmup_state.error} if warmup_state.error else {}),
+        }),
+        "database": check_database(),
+        "pool": check_pool(),
+        "upload_dir": check_upload_dir(),
+    }
+
+    ready = all(ok for ok, _ in checks.values())
+    return ready, {
+        name: {"ok": ok, **details}
+        for name, (ok, details) in checks.items()
+    }
@@ -0,0 +1,188 @@
+"""
+Métricas da API no formato texto do Prometheus (GET /metrics)
+
+MetricsMiddleware registra, por requisição:
+- http_requests_total{router, handler, method, status}
+- http_request_duration_seconds{router} (histograma)
+- http_request_db_seconds{router} (histograma, do QueryStats do profiler)
+- http_response_size_bytes{router} (histograma)
+- http_requests_in_flight (gauge)
+
+O "router" é o módulo do endpoint que atendeu a requisição
+(app.api.v1.endpoints.vehicles -> vehicles, all_data, moments, ...), lido
+de scope["endpoint"] depois do roteamento: all_data e moments não têm
+prefixo próprio, então o caminho da URL não serve para separá-los.
+
+Tudo fica em memória por processo; com vários workers, cada um expõe o seu.
+Overhead medido com: python scripts/benchmark_metrics_overhead.py
+"""
+import bisect
+import threading
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from .profiling import current_query_stats
+
+# Buckets em segundos (latência e tempo de banco)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Buckets em bytes (tamanho da resposta)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Histograma cumulativo no estilo Prometheus (sem lock próprio)"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # último = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class MetricsRegistry:
+    """Contadores, gauges e histogramas da API (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._gauges: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._buckets: Dict[str, Sequence[float]] = {}
+
+    def counter(self, name: str, help_text: str) -> None:
+        self._help[name] = ("counter", help_text)
+        self._counters.setdefault(name, {})
+
+    def gauge(self, name: str, help_text: str) -> None:
+        self._help[name] = ("gauge", help_text)
+        self._gauges.setdefault(name, {})
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float]) -> None:
+        self._help[name] = ("histogram", help_text)
+        self._histograms.setdefault(name, {})
+        self._buckets[name] = buckets
+
+    def inc(self, name: str, labels: Labels = (), amount: float = 1.0) -> None:
+        with self._lock:
+            series = self._counters[name]
+            series[labels] = series.get(labels, 0.0) + amount
+
+    def add(self, name: str, amount: float, labels: Labels = ()) -> None:
+        """Soma (ou subtrai) de um gauge"""
+        with self._lock:
+            series = self._gauges[name]
+            series[labels] = series.get(labels, 0.0) + amount
+
+    def observe(self, name: str, value: float, labels: Labels = ()) -> None:
+        with self._lock:
+            series = self._histograms[name]
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = Histogram(self._buckets[name])
+            histogram.observe(value)
+
+    def render(self) -> str:
+        """Exposição no formato texto do Prometheus (version 0.0.4)"""
+        lines: List[str] = []
+        with self._lock:
+            for name, (kind, help_text) in self._help.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+                if kind == "histogram":
+                    for labels, histogram in sorted(self._histograms[name].items()):
+                        cumulative = 0
+                        for bound, count in zip(histogram.buckets, histogram.counts):
+                            cumulative += count
+                            bucket_labels = _format_labels(labels, 'le="%s"' % bound)
+                            lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                        bucket_labels = _format_labels(labels, 'le="+Inf"')
+                        lines.append(f"{name}_bucket{bucket_labels} {histogram.count}")
+                        lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+                        lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+                else:
+                    series = self._counters[name] if kind == "counter" else self._gauges[name]
+                    for labels, value in sorted(series.items()):
+                        lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+registry.counter("http_requests_total", "Requisições HTTP por router, handler, método e status")
+registry.gauge("http_requests_in_flight", "Requisições HTTP em andamento")
+registry.histogram("http_request_duration_seconds", "Latência das requisições por router", DURATION_BUCKETS)
+registry.histogram("http_request_db_seconds", "Tempo de banco por requisição, por router", DURATION_BUCKETS)
+registry.histogram("http_response_size_bytes", "Tamanho do corpo da resposta por router", SIZE_BUCKETS)
+
+
+def endpoint_labels(scope) -> Tuple[str, str]:
+    """(router, handler) do endpoint roteado, ou ("unmatched", "") (404 etc.)"""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched", ""
+    module = getattr(endpoint, "__module__", "") or ""
+    router = module.rsplit(".", 1)[-1] if module.startswith("app.api.") else "app"
+    return router, getattr(endpoint, "__name__", "")
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que alimenta o registry (não mede /metrics)"""
+
+    def __init__(self, app, metrics: MetricsRegistry = registry, metrics_path: str = "/metrics"):
+        self.app = app
+        self.metrics = metrics
+        self.metrics_path = metrics_path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") == self.metrics_path:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        response_size = 0
+
+        async def send_with_metrics(message):
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        self.metrics.add("http_requests_in_flight", 1)
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            self.metrics.add("http_requests_in_flight", -1)
+            elapsed = time.perf_counter() - started
+            router, handler = endpoint_labels(scope)
+            by_router = (("router", router),)
+
+            self.metrics.inc("http_requests_total", (
+                ("router", router),
+                ("handler", handler),
+                ("method", scope.get("method", "")),
+                ("status", str(status_code)),
+            ))
+            self.metrics.observe("http_request_duration_seconds", elapsed, by_router)
+            self.metrics.observe("http_response_size_bytes", response_size, by_router)
+
+            stats = current_query_stats()
+            if stats is not None:
+                self.metrics.observe("http_request_db_seconds", stats.total_seconds, by_router)
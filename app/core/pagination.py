@@ -0,0 +1,62 @@
+import base64
+import json
+from typing import Any, Callable, List, Optional, Sequence
+from fastapi import HTTPException, status
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Codifica a posição da última linha retornada em um cursor opaco
+
+    Args:
+        values: Valores da chave de ordenação (ex: created_at, id)
+
+    Returns:
+        Cursor em base64 url-safe
+    """
+    raw = json.dumps(list(values), default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(
+    cursor: Optional[str],
+    size: int,
+    types: Optional[Sequence[Callable[[Any], Any]]] = None,
+) -> Optional[List[Any]]:
+    """
+    Decodifica um cursor gerado por encode_cursor
+
+    Args:
+        cursor: Cursor recebido do cliente (ou None para a primeira página)
+        size: Quantidade de valores esperada na chave de ordenação
+        types: Conversão de cada valor (ex: (datetime.fromisoformat, uuid.UUID));
+            um valor que não converte também é cursor inválido
+
+    Returns:
+        Lista com os valores da chave, ou None se não houver cursor
+
+    Raises:
+        HTTPException 400 se o cursor for inválido
+    """
+    if not cursor:
+        return None
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        values = None
+
+    if isinstance(values, list) and len(values) == size and types:
+        try:
+            values = [convert(value) for convert, value in zip(types, values)]
+        except (TypeError, ValueError):
+            values = None
+
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+
+    return values
@@ -0,0 +1,232 @@
+"""
+Hash de senhas (bcrypt) fora do event loop
+
+Cada hash/verify do bcrypt custa 100-300 ms de CPU. Chamado direto em um
+endpoint, um pico de logins ocupa o event loop (ou todas as threads do
+threadpool) e trava o resto da API. Aqui o trabalho vai para um pool de
+processos dedicado e limitado:
+
+- PASSWORD_HASH_WORKERS processos fazem o bcrypt
+- no máximo PASSWORD_HASH_MAX_PENDING operações esperam na fila; acima
+  disso PasswordHasherBusy é levantada (a API responde 503 + Retry-After)
+- stats() expõe fila, rejeições e tempos (espera e CPU) para monitoramento,
+  e os mesmos números vão para o /metrics (password_hash_*)
+
+O pool é criado no startup da aplicação (start(), app/main.py), com
+processos iniciados por forkserver (spawn onde não houver): um fork do
+worker já com threads (threadpool do AnyIO, pool do SQLAlchemy, logging)
+pode herdar locks presos e travar os processos filhos.
+
+Endpoints async usam hash / verify_and_update (await); os síncronos (a
+maioria, rodando no threadpool) usam hash_sync / verify_and_update_sync,
+que bloqueiam só a thread da requisição. Quem usa: CredentialService
+(app/services/credential_service.py), com rehash no login:
+
+    ok, new_hash = password_hasher.verify_and_update_sync(senha, hash_salvo)
+    if ok and new_hash:
+        credencial.credential_hash = new_hash  # custo mudou: regrava o hash
+"""
+import asyncio
+import multiprocessing
+import secrets
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from .config import settings
+from .metrics import DURATION_BUCKETS, registry
+from .security import pwd_context
+
+registry.gauge("password_hash_in_flight", "Operações de hash/verify de senha em execução ou na fila")
+registry.gauge("password_hash_queued", "Operações de hash/verify de senha esperando um processo livre")
+registry.counter("password_hash_operations_total", "Operações de hash/verify de senha por resultado")
+registry.counter("password_hash_rehashed_total", "Senhas regravadas com o custo atual no login")
+registry.histogram("password_hash_wait_seconds", "Tempo na fila do pool de hash de senhas", DURATION_BUCKETS)
+registry.histogram("password_hash_cpu_seconds", "Tempo de CPU do bcrypt por operação", DURATION_BUCKETS)
+
+
+class PasswordHasherBusy(Exception):
+    """Fila de hashing cheia: a requisição deve ser recusada (503)"""
+
+
+# ----------------------------------------------------------------------
+# Funções executadas nos processos do pool (precisam ser de módulo)
+# ----------------------------------------------------------------------
+
+def _hash_in_worker(password: str) -> Tuple[str, float]:
+    started = time.perf_counter()
+    hashed = pwd_context.hash(password)
+    return hashed, time.perf_counter() - started
+
+
+def _verify_and_update_in_worker(password: str, hashed_password: str) -> Tuple[Tuple[bool, Optional[str]], float]:
+    started = time.perf_counter()
+    result = pwd_context.verify_and_update(password, hashed_password)
+    return result, time.perf_counter() - started
+
+
+class PasswordHasher:
+    """Pool de processos limitado para bcrypt, com backpressure e métricas"""
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 32):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._dummy_hash: Optional[str] = None
+
+        # Métricas
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.total_wait_seconds = 0.0
+        self.total_cpu_seconds = 0.0
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context(method),
+        )
+
+    def start(self) -> None:
+        """Cria o pool (startup da aplicação); sem isso ele é criado no primeiro uso"""
+        self._get_executor()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = self._create_executor()
+        return self._executor
+
+    def _acquire(self) -> None:
+        with self._lock:
+            # max_workers em execução + max_pending na fila
+            if self.in_flight >= self.max_workers + self.max_pending:
+                self.rejected += 1
+                registry.inc("password_hash_operations_total", (("result", "rejected"),))
+                raise PasswordHasherBusy("Password hashing queue is full")
+            self.in_flight += 1
+            registry.add("password_hash_in_flight", 1)
+            if self.in_flight > self.max_workers:
+                registry.add("password_hash_queued", 1)
+
+    def _release(self, elapsed: float, cpu_seconds: float, failed: bool) -> None:
+        wait_seconds = max(elapsed - cpu_seconds, 0.0)
+        with self._lock:
+            if self.in_flight > self.max_workers:
+                registry.add("password_hash_queued", -1)
+            self.in_flight -= 1
+            registry.add("password_hash_in_flight", -1)
+            self.completed += 1
+            self.total_cpu_seconds += cpu_seconds
+            self.total_wait_seconds += wait_seconds
+        registry.inc("password_hash_operations_total", (("result", "error" if failed else "ok"),))
+        registry.observe("password_hash_wait_seconds", wait_seconds)
+        registry.observe("password_hash_cpu_seconds", cpu_seconds)
+
+    def _submit(self, func, *args) -> Future:
+        """Reserva um lugar na fila (ou PasswordHasherBusy) e envia para o pool"""
+        self._acquire()
+        started = time.perf_counter()
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            self._release(time.perf_counter() - started, 0.0, failed=True)
+            raise
+
+        def done(finished: Future) -> None:
+            failed = finished.cancelled() or finished.exception() is not None
+            cpu_seconds = 0.0 if failed else finished.result()[1]
+            self._release(time.perf_counter() - started, cpu_seconds, failed)
+
+        future.add_done_callback(done)
+        return future
+
+    async def _run(self, func, *args):
+        result, _ = await asyncio.wrap_future(self._submit(func, *args))
+        return result
+
+    def _run_sync(self, func, *args):
+        result, _ = self._submit(func, *args).result()
+        return result
+
+    async def hash(self, password: str) -> str:
+        """Gera o hash bcrypt da senha (no pool)"""
+        return await self._run(_hash_in_worker, password)
+
+    def hash_sync(self, password: str) -> str:
+        """hash() para endpoints síncronos: espera o pool na thread atual"""
+        return self._run_sync(_hash_in_worker, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """Verifica a senha contra o hash (no pool)"""
+        valid, _ = await self.verify_and_update(password, hashed_password)
+        return valid
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verifica a senha e, se o hash usa parâmetros antigos (ex.: BCRYPT_ROUNDS
+        aumentou), devolve um novo hash para ser gravado no lugar
+
+        Retorna (válida, novo_hash_ou_None).
+        """
+        result = await self._run(_verify_and_update_in_worker, password, hashed_password)
+        return self._count_rehash(result)
+
+    def verify_and_update_sync(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """verify_and_update() para endpoints síncronos"""
+        result = self._run_sync(_verify_and_update_in_worker, password, hashed_password)
+        return self._count_rehash(result)
+
+    def verify_dummy_sync(self, password: str) -> None:
+        """
+        Mesmo custo de um verify, sem credencial para conferir
+
+        Usado no login quando o contato não existe (ou não tem senha válida):
+        o tempo de resposta não revela quais contatos existem. O hash de
+        referência é gerado uma vez por processo, com o BCRYPT_ROUNDS atual.
+        """
+        if self._dummy_hash is None:
+            self._dummy_hash = self.hash_sync(secrets.token_urlsafe(16))
+        self._run_sync(_verify_and_update_in_worker, password, self._dummy_hash)
+
+    def _count_rehash(self, result: Tuple[bool, Optional[str]]) -> Tuple[bool, Optional[str]]:
+        valid, new_hash = result
+        if valid and new_hash:
+            with self._lock:
+                self.rehashed += 1
+            registry.inc("password_hash_rehashed_total")
+        return valid, new_hash
+
+    def stats(self) -> dict:
+        """Métricas do pool (fila, rejeições, tempos médios)"""
+        with self._lock:
+            completed = self.completed
+            return {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "in_flight": self.in_flight,
+                "queued": max(self.in_flight - self.max_workers, 0),
+                "completed": completed,
+                "rejected": self.rejected,
+                "rehashed": self.rehashed,
+                "avg_wait_ms": round(self.total_wait_seconds / completed * 1000, 2) if completed else 0.0,
+                "avg_cpu_ms": round(self.total_cpu_seconds / completed * 1000, 2) if completed else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        """Encerra os processos do pool"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
@@ -0,0 +1,211 @@
+"""
+Contagem de queries SQL e tempo de banco por requisição
+
+- install_query_listeners(engine): eventos do SQLAlchemy que somam cada
+  statement executado no QueryStats da requisição atual (contextvar)
+- QueryProfilerMiddleware: abre um QueryStats por requisição, devolve
+  Server-Timing (db;dur=...;desc="N queries", app;dur=...) e loga as
+  requisições lentas ou com queries demais, com os statements normalizados
+  agrupados (um N+1 aparece como "12x SELECT ... WHERE id = ?")
+- count_queries() / assert_max_queries(n): mesma contagem fora do
+  middleware, para scripts e testes. Requisições feitas dentro do bloco
+  na mesma task (httpx.ASGITransport) também entram na conta, ver
+  verify_query_budgets.py:
+
+      with assert_max_queries(3):
+          await client.get("/api/v1/vehicles/")
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings
+
+logger = logging.getLogger("app.profiling")
+
+
+@dataclass
+class QueryStats:
+    """Queries executadas em uma requisição (ou bloco count_queries)"""
+    count: int = 0
+    total_seconds: float = 0.0
+    statements: List[Tuple[str, float]] = field(default_factory=list)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self.statements.append((statement, seconds))
+
+    def merge(self, other: "QueryStats") -> None:
+        self.count += other.count
+        self.total_seconds += other.total_seconds
+        self.statements.extend(other.statements)
+
+    def grouped(self) -> List[Tuple[str, int, float]]:
+        """(statement normalizado, vezes, tempo total) do mais repetido ao menos"""
+        counts = Counter()
+        durations = Counter()
+        for statement, seconds in self.statements:
+            normalized = normalize_statement(statement)
+            counts[normalized] += 1
+            durations[normalized] += seconds
+        return [(sql, times, durations[sql]) for sql, times in counts.most_common()]
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """QueryStats da requisição atual (None fora do middleware/count_queries)"""
+    return _current_stats.get()
+
+
+# ----------------------------------------------------------------------
+# Normalização de statements
+# ----------------------------------------------------------------------
+
+_PARAMS = re.compile(r"%\(\w+\)s|%s|\$\d+|:\w+\b|\?")
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """Troca parâmetros e literais por ? e colapsa espaços e listas IN"""
+    sql = _STRINGS.sub("?", statement)
+    sql = _PARAMS.sub("?", sql)
+    sql = _NUMBERS.sub("?", sql)
+    sql = _IN_LISTS.sub("(?...)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+# ----------------------------------------------------------------------
+# Eventos do SQLAlchemy
+# ----------------------------------------------------------------------
+
+# O início fica no ExecutionContext (um por execução): um statement que
+# falha não deixa lixo na conexão.
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._profiler_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    started = getattr(context, "_profiler_started", None)
+    if stats is None or started is None:
+        return
+
+    seconds = time.perf_counter() - started
+    stats.record(statement, seconds)
+    if seconds * 1000 >= settings.SLOW_QUERY_MS:
+        logger.warning("Slow query (%.1f ms): %s", seconds * 1000, normalize_statement(statement))
+
+
+def install_query_listeners(engine: Engine) -> None:
+    """Registra os eventos de contagem no engine (idempotente)"""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ----------------------------------------------------------------------
+# Contagem fora do middleware (scripts/testes)
+# ----------------------------------------------------------------------
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """Conta as queries executadas dentro do bloco"""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int) -> Iterator[QueryStats]:
+    """Falha (AssertionError) se o bloco executar mais de max_queries queries"""
+    with count_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        details = "\n".join(f"  {times}x {sql}" for sql, times, _ in stats.grouped())
+        raise AssertionError(f"Expected at most {max_queries} queries, got {stats.count}:\n{details}")
+
+
+# ----------------------------------------------------------------------
+# Middleware
+# ----------------------------------------------------------------------
+
+class QueryProfilerMiddleware:
+    """
+    Middleware ASGI de contagem de queries por requisição
+
+    ASGI puro (sem BaseHTTPMiddleware): o contextvar definido aqui é visto
+    pelos endpoints síncronos, que rodam no threadpool com uma cópia do
+    contexto apontando para o mesmo QueryStats.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # count_queries() em volta da chamada (scripts): soma nele no fim
+        outer = _current_stats.get()
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                server_timing = (
+                    f'db;dur={stats.total_seconds * 1000:.1f};desc="{stats.count} queries", '
+                    f"app;dur={elapsed_ms:.1f}"
+                )
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            if outer is not None:
+                outer.merge(stats)
+            self._log_if_slow(scope, stats, (time.perf_counter() - started) * 1000)
+
+    @staticmethod
+    def _log_if_slow(scope, stats: QueryStats, elapsed_ms: float) -> None:
+        if elapsed_ms < settings.SLOW_REQUEST_MS and stats.count < settings.SLOW_REQUEST_QUERY_COUNT:
+            return
+
+        lines = [
+            f"  {times}x ({seconds * 1000:.1f} ms) {sql}"
+            for sql, times, seconds in stats.grouped()
+        ]
+        logger.warning(
+            "Slow request %s %s: %.1f ms, %d queries, %.1f ms in DB\n%s",
+            scope.get("method"),
+            scope.get("path"),
+            elapsed_ms,
+            stats.count,
+            stats.total_seconds * 1000,
+            "\n".join(lines),
+        )
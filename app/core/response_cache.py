@@ -0,0 +1,231 @@
+"""
+Cache de respostas com backends plugáveis e chaves versionadas
+
+- MemoryBackend: LRU em memória por processo (TTLCache)
+- RedisBackend: qualquer cliente compatível com Redis (get / set(ex=) / incr /
+  expire), injetado pronto ou criado por RedisBackend.from_url (pacote redis)
+
+VersionedCache guarda cada resposta sob <namespace>:<id>:v<versão>:<variante>.
+Invalidar um id é incrementar a versão dele: as entradas antigas deixam de
+ser lidas e expiram pelo TTL. Os valores são gravados como JSON, então o
+cache só aceita respostas já serializáveis (jsonable_encoder).
+
+A chave de versão expira em 2x o TTL das entradas, renovado a cada entrada
+gravada: quando ela some (e a versão volta a 0), nenhuma entrada gravada sob
+ela ainda existe, e o Redis não acumula uma chave por id para sempre.
+
+Só o Redis é compartilhado (backend.shared): com MemoryBackend a invalidação
+vale apenas para o worker que atendeu a escrita, e os outros podem servir a
+versão antiga até o TTL; por isso o TTL do backend em memória deve ser
+curto (RESPONSE_CACHE_MEMORY_TTL_SECONDS).
+
+Falhas do backend não derrubam a requisição: contam em
+response_cache_errors_total e a leitura segue direto para o banco.
+
+Métricas (GET /metrics):
+- response_cache_requests_total{cache, result="hit"|"miss"}
+- response_cache_invalidations_total{cache}
+- response_cache_errors_total{cache, operation}
+"""
+import json
+import logging
+import threading
+from typing import Any, Callable, Optional
+
+from .cache import TTLCache
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+registry.counter("response_cache_requests_total", "Leituras do cache de respostas (hit/miss)")
+registry.counter("response_cache_invalidations_total", "Invalidações do cache de respostas")
+registry.counter("response_cache_errors_total", "Falhas do backend do cache de respostas")
+
+
+class CacheBackend:
+    """Interface dos backends: valores são strings (JSON)"""
+
+    # Visto por todos os workers (invalidação global)?
+    shared = False
+
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        raise NotImplementedError
+
+    def incr(self, key: str, ttl_seconds: Optional[int] = None) -> int:
+        """Incrementa o contador (e, com ttl_seconds, define quando ele expira)"""
+        raise NotImplementedError
+
+    def expire(self, key: str, ttl_seconds: int) -> None:
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """
+    LRU em memória (por processo)
+
+    Versões e entradas ficam em LRUs limitados. Como uma versão despejada
+    voltaria a 0, incr também apaga as entradas do mesmo prefixo
+    (<namespace>:<id>:): nenhuma entrada antiga sobra para ser relida. Por
+    isso as versões não precisam expirar (o LRU já limita quantas ficam).
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self._entries = TTLCache(max_entries=max_entries)
+        self._counters = TTLCache(max_entries=max_entries, ttl_seconds=float("inf"))
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._counters.get(key)
+        if value is not None:
+            return str(value)
+        return self._entries.get(key)
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        self._entries.set(key, value, ttl_seconds=ttl_seconds)
+
+    def incr(self, key: str, ttl_seconds: Optional[int] = None) -> int:
+        prefix = key.rsplit(":", 1)[0] + ":"
+        with self._lock:
+            value = (self._counters.get(key) or 0) + 1
+            self._counters.set(key, value)
+        self._entries.delete_where(lambda entry: entry.startswith(prefix))
+        return value
+
+    def expire(self, key: str, ttl_seconds: int) -> None:
+        pass
+
+
+class RedisBackend(CacheBackend):
+    """
+    Backend sobre um cliente compatível com Redis
+
+    Só usa GET, SET key value EX ttl, INCR e EXPIRE, então qualquer cliente
+    com essa interface serve (redis-py, um fake local, um proxy).
+    """
+
+    shared = True
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBackend":
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError(
+                "RESPONSE_CACHE_BACKEND=redis requer o pacote redis (pip install redis)"
+            ) from exc
+        return cls(redis.Redis.from_url(url, decode_responses=True))
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(key)
+        if isinstance(value, bytes):
+            value = value.decode()
+        return value
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        self.client.set(key, value, ex=ttl_seconds)
+
+    def incr(self, key: str, ttl_seconds: Optional[int] = None) -> int:
+        value = int(self.client.incr(key))
+        if ttl_seconds is not None:
+            self.client.expire(key, ttl_seconds)
+        return value
+
+    def expire(self, key: str, ttl_seconds: int) -> None:
+        self.client.expire(key, ttl_seconds)
+
+
+def create_backend(name: str, max_entries: int = 10000, redis_url: str = "") -> CacheBackend:
+    """Backend a partir da configuração (RESPONSE_CACHE_BACKEND)"""
+    if name == "memory":
+        return MemoryBackend(max_entries=max_entries)
+    if name == "redis":
+        if not redis_url:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requer RESPONSE_CACHE_REDIS_URL")
+        return RedisBackend.from_url(redis_url)
+    raise RuntimeError(f"RESPONSE_CACHE_BACKEND desconhecido: {name!r} (use memory ou redis)")
+
+
+class VersionedCache:
+    """
+    Respostas por (id, versão, variante) sobre um CacheBackend
+
+    Exemplo:
+        vehicle_cache = VersionedCache(MemoryBackend(), "vehicle-detail", ttl_seconds=300)
+        content = vehicle_cache.get_or_load(vehicle_id, "full", load)
+        ...
+        vehicle_cache.invalidate(vehicle_id)  # depois do commit
+    """
+
+    def __init__(self, backend: CacheBackend, namespace: str, ttl_seconds: int = 300):
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+
+    def _labels(self, **extra: str):
+        return (("cache", self.namespace),) + tuple(sorted(extra.items()))
+
+    def _error(self, operation: str, exc: Exception) -> None:
+        registry.inc("response_cache_errors_total", self._labels(operation=operation))
+        logger.warning("response cache %s: %s falhou: %s", self.namespace, operation, exc)
+
+    def _version_key(self, item_id: str) -> str:
+        return f"{self.namespace}:{item_id}:version"
+
+    @property
+    def version_ttl_seconds(self) -> int:
+        return self.ttl_seconds * 2
+
+    def version(self, item_id: str) -> Optional[str]:
+        """Versão atual do id ("0" se nunca invalidado), ou None se o backend falhar"""
+        try:
+            return self.backend.get(self._version_key(item_id)) or "0"
+        except Exception as exc:
+            self._error("get", exc)
+            return None
+
+    def get_or_load(self, item_id: str, variant: str, loader: Callable[[], Any]) -> Any:
+        """Valor em cache da versão atual do id, ou loader() (gravado no cache)"""
+        try:
+            version = self.backend.get(self._version_key(item_id)) or "0"
+            key = f"{self.namespace}:{item_id}:v{version}:{variant}"
+            cached = self.backend.get(key)
+        except Exception as exc:
+            self._error("get", exc)
+            return loader()
+
+        if cached is not None:
+            registry.inc("response_cache_requests_total", self._labels(result="hit"))
+            return json.loads(cached)
+
+        registry.inc("response_cache_requests_total", self._labels(result="miss"))
+        value = loader()
+        try:
+            self.backend.set(key, json.dumps(value, separators=(",", ":")), self.ttl_seconds)
+            if version != "0":
+                self.backend.expire(self._version_key(item_id), self.version_ttl_seconds)
+        except Exception as exc:
+            self._error("set", exc)
+        return value
+
+    def invalidate(self, item_id: str, expires: bool = True) -> None:
+        """
+        Avança a versão do id: as entradas atuais deixam de ser lidas
+
+        expires=False mantém a versão para sempre: para ids usados como
+        versão de um conjunto (ex.: o catálogo), cuja chave não é renovada
+        pelas entradas gravadas.
+        """
+        try:
+            self.backend.incr(
+                self._version_key(item_id), self.version_ttl_seconds if expires else None
+            )
+        except Exception as exc:
+            self._error("invalidate", exc)
+            return
+        registry.inc("response_cache_invalidations_total", self._labels())
@@ -1,15 +1,32 @@
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from typing import Optional
+import hashlib
+import time
+import uuid
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from .cache import TTLCache
 from .config import settings
 
-# Context para hash de senhas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Context para hash de senhas.
+# bcrypt__min_rounds faz needs_update/verify_and_update apontarem hashes
+# gerados com custo menor que BCRYPT_ROUNDS (rehash transparente no login).
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verifica se a senha fornecida corresponde ao hash"""
+    """
+    Verifica se a senha fornecida corresponde ao hash
+
+    Síncrono (bloqueia ~100-300 ms): em endpoints, prefira
+    app.core.password_hashing.password_hasher.
+    """
     return pwd_context.verify(plain_password, hashed_password)
 
 
@@ -57,3 +74,78 @@ def decode_access_token(token: str) -> Optional[dict]:
         return payload
     except JWTError:
         return None
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Identidade de quem faz a requisição, resolvida a partir do JWT
+
+    Tudo vem das claims do token (sub = entity_id), sem consulta ao banco.
+    """
+    entity_id: uuid.UUID
+    expires_at: float  # timestamp unix (claim exp)
+    is_anonymous: bool = False
+    verified: bool = False
+    claims: dict = field(default_factory=dict, compare=False, repr=False)
+
+
+# Tokens já verificados: sha256(token) -> Principal.
+# Cada entrada vive até o exp do token (limitado a TOKEN_CACHE_TTL_SECONDS).
+verified_token_cache = TTLCache(
+    max_entries=settings.TOKEN_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.TOKEN_CACHE_TTL_SECONDS,
+)
+
+
+def create_entity_access_token(
+    entity_id: uuid.UUID,
+    is_anonymous: bool = False,
+    verified: bool = False,
+    expires_delta: Optional[timedelta] = None
+) -> str:
+    """Cria o JWT de uma entidade com as claims usadas por resolve_principal"""
+    return create_access_token(
+        {"sub": str(entity_id), "anon": is_anonymous, "verified": verified},
+        expires_delta=expires_delta,
+    )
+
+
+def resolve_principal(token: str) -> Optional[Principal]:
+    """
+    Verifica o JWT e retorna o Principal (com cache de tokens verificados)
+
+    A chave do cache é o hash do token (o token em si não fica em memória).
+    Retorna None se o token for inválido, expirado ou sem sub válido.
+    """
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    now = time.time()
+
+    principal = verified_token_cache.get(key)
+    if principal is not None:
+        if principal.expires_at > now:
+            return principal
+        verified_token_cache.delete(key)
+        return None
+
+    payload = decode_access_token(token)
+    if not payload or payload.get("exp") is None:
+        return None
+
+    try:
+        entity_id = uuid.UUID(str(payload.get("sub")))
+    except ValueError:
+        return None
+
+    principal = Principal(
+        entity_id=entity_id,
+        expires_at=float(payload["exp"]),
+        is_anonymous=bool(payload.get("anon", False)),
+        verified=bool(payload.get("verified", False)),
+        claims=payload,
+    )
+
+    remaining = principal.expires_at - now
+    if remaining > 0:
+        verified_token_cache.set(key, principal, ttl_seconds=min(remaining, verified_token_cache.ttl_seconds))
+    return principal
@@ -0,0 +1,139 @@
+"""
+Coalescência de leituras concorrentes (single-flight) por worker
+
+Quando várias requisições pedem a mesma chave ao mesmo tempo (um veículo
+público popular, uma conversa aberta por todos os participantes), só a
+primeira executa o loader; as outras esperam e recebem o mesmo resultado
+(ou a mesma exceção).
+
+CoalescedCache junta o single-flight com um TTLCache curto e invalidação
+por grupo (ex.: todas as chaves de um veículo), usada pelos endpoints de
+escrita. Os endpoints são síncronos (threadpool), então a espera é
+bloqueante, com threading.Event.
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+from .cache import TTLCache
+
+_MISSING = object()
+
+
+class _Call:
+    """Execução em andamento de uma chave"""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Uma execução por chave por vez; quem chega durante ela compartilha o resultado"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executions = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fn()
+            return call.value
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+
+class CoalescedCache:
+    """
+    TTLCache curto + SingleFlight, com invalidação por grupo
+
+    As chaves são (grupo, chave): get_or_load(("vehicle", id), fieldset.cache_key, loader).
+    invalidate(grupo) apaga as chaves do grupo e avança a geração do grupo:
+    um load que começou antes da escrita ainda responde a quem já esperava
+    por ele, mas não grava no cache, e quem chega depois da escrita abre um
+    load novo. Grupos diferentes não se afetam (uma mensagem nova numa
+    conversa não impede o cache de um veículo).
+
+    A geração só é guardada enquanto o grupo tem loads em andamento; sem
+    nenhum, não há load antigo a descartar e o grupo volta à geração 0.
+    """
+
+    def __init__(self, max_entries: int = 2000, ttl_seconds: float = 5.0):
+        self.cache = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._generations: Dict[Hashable, int] = {}
+        self._in_flight: Dict[Hashable, int] = {}
+
+    def get_or_load(self, group: Hashable, key: Hashable, loader: Callable[[], Any]) -> Any:
+        cache_key = (group, key)
+        value = self.cache.get(cache_key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            generation = self._generations.get(group, 0)
+            self._in_flight[group] = self._in_flight.get(group, 0) + 1
+
+        def load():
+            value = loader()
+            with self._lock:
+                if self._generations.get(group, 0) == generation:
+                    self.cache.set(cache_key, value)
+            return value
+
+        try:
+            return self.flight.do((cache_key, generation), load)
+        finally:
+            with self._lock:
+                remaining = self._in_flight[group] - 1
+                if remaining:
+                    self._in_flight[group] = remaining
+                else:
+                    del self._in_flight[group]
+                    self._generations.pop(group, None)
+
+    def invalidate(self, group: Hashable) -> None:
+        """Descarta as leituras do grupo (chamar depois de escrever nele)"""
+        with self._lock:
+            if group in self._in_flight:
+                self._generations[group] = self._generations.get(group, 0) + 1
+            self.cache.delete_where(lambda cache_key: cache_key[0] == group)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Descarta as leituras de todos os grupos para os quais predicate(grupo) é verdadeiro"""
+        with self._lock:
+            for group in self._in_flight:
+                if predicate(group):
+                    self._generations[group] = self._generations.get(group, 0) + 1
+            self.cache.delete_where(lambda cache_key: predicate(cache_key[0]))
+
+    def clear(self) -> None:
+        with self._lock:
+            for group in self._in_flight:
+                self._generations[group] = self._generations.get(group, 0) + 1
+            self.cache.clear()
@@ -1,6 +1,12 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.core.config import settings
+from app.core.database import engine
+from app.core.health import readiness, start_warm_up
+from app.core.metrics import MetricsMiddleware, registry as metrics_registry
+from app.core.profiling import QueryProfilerMiddleware, install_query_listeners
+from app.core.password_hashing import PasswordHasherBusy, password_hasher
 
 # Importar routers
 from app.api.v1.api import api_router
@@ -20,8 +26,42 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Next-Cursor"],
 )
 
+# Métricas por router (GET /metrics). Adicionado antes do profiler para
+# ficar dentro dele e enxergar o QueryStats da requisição.
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Contagem de queries/tempo de banco por requisição (Server-Timing)
+if settings.QUERY_PROFILER_ENABLED:
+    install_query_listeners(engine)
+    app.add_middleware(QueryProfilerMiddleware)
+
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    """Fila de hashing cheia: pede para o cliente tentar de novo"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Authentication is busy, try again shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.on_event("startup")
+def start_worker_warm_up():
+    """Cria o pool de hash de senhas, abre conexões do pool e carrega caches em segundo plano"""
+    password_hasher.start()
+    start_warm_up()
+
+
+@app.on_event("shutdown")
+def shutdown_password_hasher():
+    """Encerra o pool de processos de hash de senhas"""
+    password_hasher.shutdown()
+
 
 @app.get("/")
 def root():
@@ -39,7 +79,7 @@ def root():
 @app.get("/health")
 def health_check():
     """
-    Health check para monitoramento
+    Health check para monitoramento (veja também /health/live e /health/ready)
     """
     return {
         "status": "ok",
@@ -47,6 +87,39 @@ def health_check():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    Métricas no formato texto do Prometheus
+    """
+    return PlainTextResponse(
+        metrics_registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@app.get("/health/live")
+def liveness_check():
+    """
+    Liveness: o processo está de pé (não consulta dependências)
+    """
+    return {"status": "ok"}
+
+
+@app.get("/health/ready")
+def readiness_check(response: Response):
+    """
+    Readiness: banco, pool, diretório de upload e warm-up (503 se não pronto)
+    """
+    ready, checks = readiness()
+    if not ready:
+        response.status_code = 503
+    return {
+        "status": "ready" if ready else "not_ready",
+        "checks": checks,
+    }
+
+
 # Incluir routers da API
 app.include_router(api_router, prefix="/api/v1")
 
@@ -9,6 +9,7 @@ from .entity import (
     LinkStatus,
 )
 from .entity_contact import EntityContact
+from .entity_credential import EntityCredential
 from .entity_name import EntityName
 from .vehicle import Vehicle, Brand, Model, ModelVersion, Plate, PlateType, PlateModel
 from .vehicle_cover import VehicleCover
@@ -31,6 +32,7 @@ __all__ = [
     "EntityType",
     "EntityRelationship",
     "EntityContact",
+    "EntityCredential",
     "EntityName",
     "Link",
     "LinkType",
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, UUID, ForeignKey, DateTime, Boolean, Enum as SQLEnum, Text, Date
+from sqlalchemy import Column, String, UUID, ForeignKey, DateTime, Boolean, Enum as SQLEnum, Text, Date, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID as PGUUID, JSONB
 import enum
@@ -28,6 +28,16 @@ class EntityType(Base, BaseModel):
 class Entity(Base, BaseModelWithUpdate):
     """Entidades (pessoas, empresas, etc.)"""
     __tablename__ = "entities"
+    __table_args__ = (
+        # Uma entidade anônima ativa por dispositivo (migration 3b8f0c27d914)
+        Index(
+            "idx_entities_anonymous_device", "device_fingerprint_hash",
+            unique=True,
+            postgresql_where=text(
+                "is_anonymous = true AND active = true AND device_fingerprint_hash IS NOT NULL"
+            ),
+        ),
+    )
 
     entity_code = Column(String, unique=True, nullable=False)
     entity_type_id = Column(PGUUID(as_uuid=True), ForeignKey("entity_types.id"), nullable=True)
@@ -46,6 +56,8 @@ class Entity(Base, BaseModelWithUpdate):
     # Campos para entidades anônimas e verificação
     is_anonymous = Column(Boolean, default=False, nullable=False)
     device_fingerprint = Column(JSONB, nullable=True)
+    device_fingerprint_hash = Column(String, nullable=True)  # sha256(deviceId)
+    device_secret_hash = Column(String, nullable=True)  # sha256 do segredo do dispositivo
     verified = Column(Boolean, default=False, nullable=False)  # Entidade completamente validada
 
     # Relationships
@@ -163,6 +175,28 @@ class LinkType(Base, BaseModel):
 class Link(Base, BaseModelWithUpdate):
     """Vínculos entre entidades e veículos"""
     __tablename__ = "links"
+    __table_args__ = (
+        # Índices dos fluxos de vínculos (migrations 0efcc5316843 e 04660338ba58)
+        Index(
+            "idx_links_active_entity_vehicle", "entity_id", "vehicle_id",
+            postgresql_include=["link_type_id", "start_date", "end_date"],
+            postgresql_where=text("status = 'active'"),
+        ),
+        Index("idx_links_vehicle_status", "vehicle_id", "status"),
+        Index("idx_links_entity_status", "entity_id", "status"),
+        Index(
+            "idx_links_pending_validation", "created_at",
+            postgresql_where=text("status = 'pending_validation'"),
+        ),
+        Index(
+            "idx_links_pending_requests_received", "entity_id", text("created_at DESC"), text("id DESC"),
+            postgresql_where=text("status = 'pending_request'"),
+        ),
+        Index(
+            "idx_links_pending_requests_sent", "requested_by_entity_id", text("created_at DESC"), text("id DESC"),
+            postgresql_where=text("status = 'pending_request'"),
+        ),
+    )
 
     link_code = Column(String, unique=True, nullable=False)
     entity_id = Column(PGUUID(as_uuid=True), ForeignKey("entities.id"), nullable=True)
@@ -177,6 +211,7 @@ class Link(Base, BaseModelWithUpdate):
     start_date = Column(Date, nullable=True)
     end_date = Column(Date, nullable=True)
     observations = Column(Text, nullable=True)
+    requested_by_entity_id = Column(PGUUID(as_uuid=True), ForeignKey("entities.id", ondelete="SET NULL"), nullable=True)
 
     # Relationships
     entity = relationship("Entity", back_populates="vehicle_links", foreign_keys=[entity_id])
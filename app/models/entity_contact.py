@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, UUID, ForeignKey, DateTime, Boolean, Date
+from sqlalchemy import Column, String, UUID, ForeignKey, DateTime, Boolean, Date, Computed, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from datetime import datetime, date
@@ -10,10 +10,29 @@ from .base import BaseModel
 class EntityContact(Base, BaseModel):
     """Contatos de entidades (emails, telefones, etc.)"""
     __tablename__ = "entity_contacts"
+    __table_args__ = (
+        # Lookup por email/telefone normalizado (migration 7d2e9b41c6a5)
+        Index(
+            "idx_entity_contacts_active_lookup", "contact_type", "normalized_value",
+            unique=True,
+            postgresql_include=["entity_id", "use_for_login"],
+            postgresql_where=text("is_active = true"),
+        ),
+    )
 
     entity_id = Column(PGUUID(as_uuid=True), ForeignKey("entities.id", ondelete="CASCADE"), nullable=False)
     contact_type = Column(String, nullable=False)  # email, phone, whatsapp, api_endpoint, mqtt_topic
     contact_value = Column(String, nullable=False)
+    # Gerada pelo banco: só dígitos para phone/whatsapp, minúsculas para o resto
+    normalized_value = Column(
+        String,
+        Computed(
+            "CASE WHEN contact_type IN ('phone', 'whatsapp') "
+            "THEN regexp_replace(contact_value, '[^0-9]', '', 'g') "
+            "ELSE lower(btrim(contact_value)) END",
+            persisted=True,
+        ),
+    )
     is_verified = Column(Boolean, default=False)
     verified_at = Column(DateTime, nullable=True)
     is_primary = Column(Boolean, default=False)
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, Integer, Text, ForeignKey, DateTime, Boolean
+from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+
+from app.core.database import Base
+from .base import BaseModel
+
+
+class EntityCredential(Base, BaseModel):
+    """Credenciais de autenticação (password, pin, api_key, mfa_secret)"""
+    __tablename__ = "entity_credentials"
+
+    entity_id = Column(PGUUID(as_uuid=True), ForeignKey("entities.id", ondelete="CASCADE"), nullable=False)
+    credential_type = Column(String, nullable=False)  # password, pin, api_key, mfa_secret
+    credential_hash = Column(Text, nullable=False)
+    hash_algorithm = Column(String, nullable=False)  # argon2id, bcrypt
+    is_current = Column(Boolean, default=True)
+    is_compromised = Column(Boolean, default=False)
+    expires_at = Column(DateTime, nullable=True)
+    last_used_at = Column(DateTime, nullable=True)
+    failed_attempts = Column(Integer, default=0)
+    locked_until = Column(DateTime, nullable=True)
+    created_by_entity_id = Column(PGUUID(as_uuid=True), ForeignKey("entities.id"), nullable=True)
+    creation_method = Column(String, nullable=True)  # self_service, admin_reset, system_generated
+    replaced_credential_id = Column(PGUUID(as_uuid=True), ForeignKey("entity_credentials.id", ondelete="SET NULL"), nullable=True)
+
+    # Relationships
+    entity = relationship("Entity", foreign_keys=[entity_id])
@@ -1,4 +1,4 @@
-from .token import Token, TokenPayload
+from .token import Token, TokenPayload, PrincipalResponse
 from .vehicle import (
     Vehicle,
     VehicleCreate,
@@ -53,6 +53,7 @@ from .maintenance import Maintenance, MaintenanceCreate, MaintenanceUpdate
 __all__ = [
     "Token",
     "TokenPayload",
+    "PrincipalResponse",
     "Vehicle",
     "VehicleCreate",
     "VehicleUpdate",
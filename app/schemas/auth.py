@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+from app.core.config import settings
+
+
+class PasswordSet(BaseModel):
+    """Definir/trocar a senha da entidade autenticada (PUT /auth/password)"""
+    current_password: Optional[str] = None  # obrigatória se já existe senha
+    new_password: str = Field(..., min_length=settings.PASSWORD_MIN_LENGTH)
+
+
+class LoginRequest(BaseModel):
+    """Login por email ou telefone + senha (POST /auth/login)"""
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    password: str
@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from typing import Generic, List, TypeVar
+import uuid
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class BatchGetRequest(BaseModel):
+    """
+    IDs a buscar em lote (até BATCH_MAX_IDS; repetidos são ignorados)
+
+    O limite é checado na validação (422), antes de converter cada id.
+    """
+    ids: List[uuid.UUID] = Field(..., min_length=1, max_length=settings.BATCH_MAX_IDS)
+
+
+class BatchGetResponse(BaseModel, Generic[T]):
+    """Itens encontrados, na ordem dos ids pedidos, e os ids que não existem"""
+    items: List[T]
+    missing: List[uuid.UUID] = []
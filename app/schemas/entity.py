@@ -72,11 +72,18 @@ class Entity(BaseModel):
         arbitrary_types_allowed = True
 
 
+class EntityContactLookup(BaseModel):
+    """Entidade dona de um contato ativo (email/telefone)"""
+    entity_id: uuid.UUID
+    contact_type: str
+
+
 # Anonymous Entity Schemas
 class AnonymousEntityCreate(BaseModel):
     """Schema para criar entidade anônima com device fingerprint"""
     device_fingerprint: dict  # Device ID, network info, geolocation, etc.
     name: Optional[str] = "Usuário Anônimo"
+    device_secret: Optional[str] = None  # devolvido pelo primeiro POST /auth/anonymous
 
 
 # Vehicle Entity Link Schemas
@@ -106,6 +113,7 @@ class VehicleEntityLinkUpdate(BaseModel):
 
 class VehicleEntityLink(VehicleEntityLinkBase):
     id: uuid.UUID
+    requested_by_entity_id: Optional[uuid.UUID] = None
     created_at: datetime
     updated_at: datetime
 
@@ -174,6 +182,11 @@ class EntityRelationshipWithChild(EntityRelationship):
     entity: Entity
 
 
+class EntityHierarchyNode(EntityRelationship):
+    """Relacionamento encontrado ao percorrer a hierarquia (depth 1 = direto)"""
+    depth: int
+
+
 # ============================================================================
 # Link Advanced Schemas (para request, claim, grant)
 # ============================================================================
@@ -1,5 +1,7 @@
 from pydantic import BaseModel
 from typing import Optional
+from datetime import datetime
+import uuid
 
 
 class Token(BaseModel):
@@ -8,6 +10,25 @@ class Token(BaseModel):
     token_type: str = "bearer"
 
 
+class EntityToken(Token):
+    """Token emitido para uma entidade (POST /auth/login, POST /auth/anonymous)"""
+    entity_id: uuid.UUID
+    is_anonymous: bool
+    verified: bool
+    device_secret: Optional[str] = None  # só no primeiro token do dispositivo
+
+
 class TokenPayload(BaseModel):
     """Payload do token JWT"""
-    sub: Optional[str] = None  # user_id
+    sub: Optional[str] = None  # entity_id
+    exp: Optional[int] = None  # expiração (timestamp unix)
+    anon: bool = False  # entidade anônima
+    verified: bool = False  # entidade verificada
+
+
+class PrincipalResponse(BaseModel):
+    """Identidade resolvida a partir do token (GET /auth/me)"""
+    entity_id: uuid.UUID
+    is_anonymous: bool
+    verified: bool
+    expires_at: datetime
@@ -0,0 +1,114 @@
+"""
+Senhas das entidades (entity_credentials com credential_type = 'password')
+
+O bcrypt roda no pool limitado de app/core/password_hashing.py: com a fila
+cheia, PasswordHasherBusy vira 503 + Retry-After (app/main.py). A leitura
+do hash termina a transação antes do bcrypt, então a conexão do pool de
+banco não fica presa durante os 100-300 ms do hash.
+
+Cada troca de senha cria uma credencial nova (is_current) e fecha a
+anterior (replaced_credential_id), como o histórico de nomes e contatos.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+import uuid
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.password_hashing import password_hasher
+from app.models.entity_credential import EntityCredential
+
+PASSWORD_CREDENTIAL = "password"
+
+
+class CredentialService:
+    """Service for entity passwords"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_current_password(self, entity_id: uuid.UUID) -> Optional[EntityCredential]:
+        """Current password credential of the entity (idx_entity_credentials_current)"""
+        return self.db.query(EntityCredential).filter(
+            EntityCredential.entity_id == entity_id,
+            EntityCredential.credential_type == PASSWORD_CREDENTIAL,
+            EntityCredential.is_current == True
+        ).first()
+
+    def set_password(
+        self,
+        entity_id: uuid.UUID,
+        password: str,
+        created_by_entity_id: Optional[uuid.UUID] = None,
+        creation_method: str = "self_service"
+    ) -> EntityCredential:
+        """Hash the password (process pool) and make it the current credential"""
+        credential_hash = password_hasher.hash_sync(password)
+
+        current = self.get_current_password(entity_id)
+        if current:
+            current.is_current = False
+
+        credential = EntityCredential(
+            entity_id=entity_id,
+            credential_type=PASSWORD_CREDENTIAL,
+            credential_hash=credential_hash,
+            hash_algorithm="bcrypt",
+            is_current=True,
+            failed_attempts=0,
+            created_by_entity_id=created_by_entity_id or entity_id,
+            creation_method=creation_method,
+            replaced_credential_id=current.id if current else None,
+        )
+        self.db.add(credential)
+        self.db.commit()
+        self.db.refresh(credential)
+        return credential
+
+    def verify_password(self, entity_id: uuid.UUID, password: str) -> bool:
+        """
+        Check the entity's current password
+
+        Locked, expired or compromised credentials never verify. A wrong
+        password counts towards PASSWORD_MAX_FAILED_ATTEMPTS (then the
+        credential is locked for PASSWORD_LOCK_MINUTES); a right one whose
+        hash uses an older cost is rehashed with BCRYPT_ROUNDS.
+
+        Every call pays one bcrypt verify (a dummy one when there is no
+        usable credential), so the timing does not tell them apart.
+        """
+        credential = self.get_current_password(entity_id)
+        now = datetime.utcnow()
+        if (
+            credential is None
+            or credential.is_compromised
+            or (credential.locked_until and credential.locked_until > now)
+            or (credential.expires_at and credential.expires_at <= now)
+        ):
+            password_hasher.verify_dummy_sync(password)
+            return False
+
+        credential_id, stored_hash = credential.id, credential.credential_hash
+        # Fecha a transação de leitura: o bcrypt não segura uma conexão do pool
+        self.db.commit()
+
+        valid, new_hash = password_hasher.verify_and_update_sync(password, stored_hash)
+
+        credential = self.db.query(EntityCredential).filter(EntityCredential.id == credential_id).first()
+        if credential is None:
+            return False
+
+        if valid:
+            credential.failed_attempts = 0
+            credential.locked_until = None
+            credential.last_used_at = now
+            if new_hash:
+                credential.credential_hash = new_hash
+        else:
+            credential.failed_attempts = (credential.failed_attempts or 0) + 1
+            if credential.failed_attempts >= settings.PASSWORD_MAX_FAILED_ATTEMPTS:
+                credential.locked_until = now + timedelta(minutes=settings.PASSWORD_LOCK_MINUTES)
+
+        self.db.commit()
+        return valid
@@ -1,12 +1,23 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import and_, or_, not_, any_, func, literal, select
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime, date
+import hashlib
+import hmac
+import re
+import secrets
 import uuid
 
-from app.models.entity import Entity, VehicleEntityLink, LinkStatus, RelationshipType
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.fieldsets import FieldSet, FULL_FIELDSET
+from app.models.entity import Entity, EntityRelationship, VehicleEntityLink, LinkStatus, RelationshipType
 from app.models.entity_name import EntityName
 from app.models.entity_contact import EntityContact
+from app.services.permission_service import permission_resolver
+from app.services import hot_reads, read_models
 from app.schemas.entity import (
     EntityCreate,
     EntityUpdate,
@@ -15,6 +26,105 @@ from app.schemas.entity import (
     AnonymousEntityCreate
 )
 
+# Profundidade máxima ao percorrer a hierarquia de entidades
+MAX_HIERARCHY_DEPTH = 50
+
+
+def entity_summary_options():
+    """
+    Loader options for the entity summary (name, email, phone, avatar)
+
+    Each relation is loaded with selectinload: one extra query per relation
+    for the whole batch (WHERE id IN (...)) instead of four LEFT JOINs per
+    entity row. Use directly on Entity queries, or nested under a relationship:
+
+        selectinload(Link.entity).options(*entity_summary_options())
+    """
+    return (
+        selectinload(Entity.primary_name),
+        selectinload(Entity.primary_email_contact),
+        selectinload(Entity.primary_phone_contact),
+        selectinload(Entity.profile_picture),
+    )
+
+
+# Tipos de contato normalizados para só dígitos
+PHONE_CONTACT_TYPES = ("phone", "whatsapp")
+
+_NON_DIGITS = re.compile(r"[^0-9]")
+
+
+def normalize_contact_value(contact_type: str, contact_value: Optional[str]) -> str:
+    """
+    Normalize a contact value for lookups
+
+    Same rule as the generated column entity_contacts.normalized_value
+    (migration 7d2e9b41c6a5): digits only for phone/whatsapp, lowercase
+    and stripped for everything else.
+    """
+    if not contact_value:
+        return ""
+    if contact_type in PHONE_CONTACT_TYPES:
+        return _NON_DIGITS.sub("", contact_value)
+    return contact_value.strip().lower()
+
+
+def contact_lookup_types(contact_type: str) -> Tuple[str, ...]:
+    """Contact types searched together (a phone lookup also matches whatsapp)"""
+    return PHONE_CONTACT_TYPES if contact_type in PHONE_CONTACT_TYPES else (contact_type,)
+
+
+# Lookups recentes (contact_type, normalized_value) -> (entity_id, use_for_login).
+# Só acertos: um "não encontrado" em cache continuaria valendo nos outros
+# workers depois de um cadastro, até o TTL.
+contact_lookup_cache = TTLCache(
+    max_entries=settings.CONTACT_LOOKUP_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.CONTACT_LOOKUP_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_contact_lookup(contact_type: str, contact_value: Optional[str]) -> None:
+    """Drop cached contact lookups (after creating/deactivating the contact)"""
+    normalized = normalize_contact_value(contact_type, contact_value)
+    for lookup_type in contact_lookup_types(contact_type):
+        contact_lookup_cache.delete((lookup_type, normalized))
+
+
+class ContactInUseError(ValueError):
+    """The email/phone is already an active contact of another entity"""
+
+    def __init__(self, contact_type: str):
+        super().__init__(f"{contact_type} already in use")
+        self.contact_type = contact_type
+
+
+def _is_contact_conflict(exc: IntegrityError) -> bool:
+    """IntegrityError raised by idx_entity_contacts_active_lookup"""
+    diag = getattr(exc.orig, "diag", None)
+    constraint = getattr(diag, "constraint_name", None)
+    if constraint:
+        return constraint == "idx_entity_contacts_active_lookup"
+    return "idx_entity_contacts_active_lookup" in str(exc.orig)
+
+
+def device_fingerprint_hash(device_fingerprint: Optional[dict]) -> Optional[str]:
+    """
+    Stable hash of a device fingerprint (sha256 of deviceId, hex)
+
+    Only deviceId is hashed: the other fields (osVersion, appVersion,
+    networkType, ...) change between app launches. Returns None when the
+    fingerprint has no deviceId.
+    """
+    device_id = (device_fingerprint or {}).get("deviceId")
+    if not device_id:
+        return None
+    return hashlib.sha256(str(device_id).encode("utf-8")).hexdigest()
+
+
+def device_secret_hash(device_secret: str) -> str:
+    """sha256 (hex) of a device secret (random, so no slow hash is needed)"""
+    return hashlib.sha256(device_secret.encode("utf-8")).hexdigest()
+
 
 class EntityService:
     """Service for managing entities"""
@@ -37,7 +147,12 @@ class EntityService:
 
     def _create_entity_contact(self, entity_id: uuid.UUID, contact_type: str, contact_value: str,
                                is_primary: bool = True, use_for_login: bool = True) -> EntityContact:
-        """Helper: Create entity contact record"""
+        """
+        Helper: Create entity contact record
+
+        Raises ContactInUseError (after rolling back the session) when the
+        value is already active on another entity.
+        """
         entity_contact = EntityContact(
             entity_id=entity_id,
             contact_type=contact_type,
@@ -48,7 +163,14 @@ class EntityService:
             start_date=date.today()
         )
         self.db.add(entity_contact)
-        self.db.flush()
+        try:
+            self.db.flush()
+        except IntegrityError as exc:
+            if not _is_contact_conflict(exc):
+                raise
+            self.db.rollback()
+            raise ContactInUseError(contact_type) from exc
+        invalidate_contact_lookup(contact_type, contact_value)
         return entity_contact
 
     def _update_entity_name(self, entity: Entity, new_name: str) -> None:
@@ -77,6 +199,7 @@ class EntityService:
                 old_contact.is_active = False
                 old_contact.is_primary = False
                 old_contact.end_date = date.today()
+                invalidate_contact_lookup(old_contact.contact_type, old_contact.contact_value)
 
         # Cria novo contato
         new_contact = self._create_entity_contact(entity.id, contact_type, new_value)
@@ -126,6 +249,7 @@ class EntityService:
             entity_code=entity_code,
             is_anonymous=True,
             device_fingerprint=entity_data.device_fingerprint,
+            device_fingerprint_hash=device_fingerprint_hash(entity_data.device_fingerprint),
             active=True,
             verified=False,
         )
@@ -142,6 +266,62 @@ class EntityService:
         self.db.refresh(db_entity)
         return db_entity
 
+    def get_anonymous_entity_by_fingerprint(self, fingerprint_hash: str) -> Optional[Entity]:
+        """Get the active anonymous entity of a device (idx_entities_anonymous_device)"""
+        return self.db.query(Entity).options(
+            *entity_summary_options()
+        ).filter(
+            Entity.device_fingerprint_hash == fingerprint_hash,
+            Entity.is_anonymous == True,
+            Entity.active == True
+        ).first()
+
+    def get_or_create_anonymous_entity(self, entity_data: AnonymousEntityCreate) -> Tuple[Entity, bool]:
+        """
+        Return the device's anonymous entity, creating it on first launch
+
+        Returns (entity, created). Concurrent first launches of the same
+        device are resolved by the unique index: the loser re-reads the
+        entity created by the winner.
+        """
+        fingerprint_hash = device_fingerprint_hash(entity_data.device_fingerprint)
+        if fingerprint_hash:
+            existing = self.get_anonymous_entity_by_fingerprint(fingerprint_hash)
+            if existing:
+                return existing, False
+
+        try:
+            return self.create_anonymous_entity(entity_data), True
+        except IntegrityError:
+            self.db.rollback()
+            existing = self.get_anonymous_entity_by_fingerprint(fingerprint_hash) if fingerprint_hash else None
+            if existing is None:
+                raise
+            return existing, False
+
+    def claim_device_secret(self, entity: Entity) -> Optional[str]:
+        """
+        Give an anonymous entity its device secret, if it has none yet
+
+        Returns the new secret (only its hash is stored), or None when the
+        entity already has one. The conditional UPDATE makes concurrent
+        claims safe: only one of them gets a secret.
+        """
+        device_secret = secrets.token_urlsafe(32)
+        claimed = self.db.query(Entity).filter(
+            Entity.id == entity.id,
+            Entity.device_secret_hash.is_(None),
+        ).update({Entity.device_secret_hash: device_secret_hash(device_secret)}, synchronize_session=False)
+        self.db.commit()
+        return device_secret if claimed else None
+
+    def check_device_secret(self, entity: Entity, device_secret: Optional[str]) -> bool:
+        """Does the device secret match the one issued to the anonymous entity?"""
+        self.db.refresh(entity, ["device_secret_hash"])
+        if not device_secret or entity.device_secret_hash is None:
+            return False
+        return hmac.compare_digest(entity.device_secret_hash, device_secret_hash(device_secret))
+
     def convert_anonymous_to_verified(
         self,
         entity_id: uuid.UUID,
@@ -181,26 +361,188 @@ class EntityService:
     def get_entity(self, entity_id: uuid.UUID) -> Optional[Entity]:
         """Get entity by ID with related data"""
         return self.db.query(Entity).options(
-            joinedload(Entity.primary_name),
-            joinedload(Entity.primary_email_contact),
-            joinedload(Entity.primary_phone_contact),
-            joinedload(Entity.profile_picture)
+            *entity_summary_options()
         ).filter(Entity.id == entity_id).first()
 
+    def find_entity_id_by_contact(
+        self,
+        contact_type: str,
+        contact_value: str,
+        login_only: bool = False
+    ) -> Optional[uuid.UUID]:
+        """
+        Resolve the entity that owns an active contact (email, phone, ...)
+
+        Phone lookups also match whatsapp contacts (same digits), preferring
+        a contact of the requested type. Probes idx_entity_contacts_active_lookup;
+        found owners are kept in contact_lookup_cache (misses are not cached).
+        """
+        normalized = normalize_contact_value(contact_type, contact_value)
+        if not normalized:
+            return None
+
+        found = contact_lookup_cache.get((contact_type, normalized))
+        if found is None:
+            rows = self.db.query(
+                EntityContact.entity_id, EntityContact.use_for_login, EntityContact.contact_type
+            ).filter(
+                EntityContact.contact_type.in_(contact_lookup_types(contact_type)),
+                EntityContact.normalized_value == normalized,
+                EntityContact.is_active == True
+            ).all()
+            if not rows:
+                return None
+            row = next((row for row in rows if row.contact_type == contact_type), rows[0])
+            found = (row.entity_id, bool(row.use_for_login))
+            contact_lookup_cache.set((contact_type, normalized), found)
+
+        entity_id, use_for_login = found
+        if login_only and not use_for_login:
+            return None
+        return entity_id
+
     def get_entities(self, skip: int = 0, limit: int = 100) -> List[Entity]:
         """Get all entities with pagination"""
         return self.db.query(Entity).options(
-            joinedload(Entity.primary_name),
-            joinedload(Entity.primary_email_contact),
-            joinedload(Entity.primary_phone_contact),
-            joinedload(Entity.profile_picture)
+            *entity_summary_options()
         ).filter(Entity.active == True).offset(skip).limit(limit).all()
 
+    def get_entity_rows(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        fieldset: FieldSet = FULL_FIELDSET
+    ) -> List[dict]:
+        """
+        Get a page of active entities as plain dicts (Entity schema shape)
+
+        Read-only alternative to get_entities: one column-only SELECT, no ORM
+        instances or relationship loads (see app.services.read_models).
+        Only the fields in `fieldset` are selected.
+        """
+        return read_models.list_entity_rows(self.db, skip=skip, limit=limit, fieldset=fieldset)
+
+    def get_entity_rows_by_ids(
+        self,
+        ids: List[uuid.UUID],
+        fieldset: FieldSet = FULL_FIELDSET
+    ) -> List[dict]:
+        """Get entities by ID as plain dicts, in a single query (unordered)"""
+        return read_models.get_entity_rows(self.db, ids, fieldset=fieldset)
+
+    def get_entity_relationships(self, entity_id: uuid.UUID, active_only: bool = True) -> List[EntityRelationship]:
+        """Get relationships where the entity is either child or parent (single query)"""
+        query = self.db.query(EntityRelationship).filter(
+            or_(
+                EntityRelationship.entity_id == entity_id,
+                EntityRelationship.parent_entity_id == entity_id
+            )
+        )
+        if active_only:
+            query = query.filter(EntityRelationship.is_active == True)
+        return query.order_by(EntityRelationship.created_at).all()
+
+    def get_entity_ancestors(
+        self,
+        entity_id: uuid.UUID,
+        max_depth: int = MAX_HIERARCHY_DEPTH,
+        active_only: bool = True
+    ) -> List[EntityRelationship]:
+        """Get every relationship above the entity (parent, grandparent, ...) in one query"""
+        return self._walk_hierarchy(entity_id, upwards=True, max_depth=max_depth, active_only=active_only)
+
+    def get_entity_descendants(
+        self,
+        entity_id: uuid.UUID,
+        max_depth: int = MAX_HIERARCHY_DEPTH,
+        active_only: bool = True
+    ) -> List[EntityRelationship]:
+        """Get every relationship below the entity (children, grandchildren, ...) in one query"""
+        return self._walk_hierarchy(entity_id, upwards=False, max_depth=max_depth, active_only=active_only)
+
+    def _walk_hierarchy(
+        self,
+        entity_id: uuid.UUID,
+        upwards: bool,
+        max_depth: int,
+        active_only: bool
+    ) -> List[EntityRelationship]:
+        """
+        Walk entity_relationships with a recursive CTE
+
+        Each returned relationship gets a `depth` attribute (1 = direct
+        parent/child). The path of visited entities stops cycles, and
+        max_depth bounds the recursion.
+        """
+        rel = EntityRelationship
+        # Subindo: do filho (entity_id) para o pai; descendo: o contrário
+        start_col, next_col = (rel.entity_id, rel.parent_entity_id) if upwards else (rel.parent_entity_id, rel.entity_id)
+        max_depth = max(1, min(max_depth, MAX_HIERARCHY_DEPTH))
+
+        anchor = select(
+            rel.id,
+            next_col.label("next_entity_id"),
+            literal(1).label("depth"),
+            array([start_col, next_col]).label("path"),
+        ).where(start_col == entity_id)
+        if active_only:
+            anchor = anchor.where(rel.is_active == True)
+
+        tree = anchor.cte("entity_hierarchy", recursive=True)
+
+        step = select(
+            rel.id,
+            next_col,
+            tree.c.depth + 1,
+            func.array_append(tree.c.path, next_col),
+        ).join(
+            tree, start_col == tree.c.next_entity_id
+        ).where(
+            tree.c.depth < max_depth,
+            not_(next_col == any_(tree.c.path)),
+        )
+        if active_only:
+            step = step.where(rel.is_active == True)
+
+        tree = tree.union_all(step)
+
+        rows = self.db.query(rel, tree.c.depth).join(
+            tree, rel.id == tree.c.id
+        ).order_by(tree.c.depth, rel.created_at).all()
+
+        # Em hierarquias com mais de um caminho até o mesmo relacionamento,
+        # fica a ocorrência mais próxima (rows já vem ordenado por depth)
+        relationships = []
+        seen = set()
+        for relationship, depth in rows:
+            if relationship.id in seen:
+                continue
+            seen.add(relationship.id)
+            relationship.depth = depth
+            relationships.append(relationship)
+        return relationships
+
     def update_entity(self, entity_id: uuid.UUID, entity_data: EntityUpdate) -> Optional[Entity]:
-        """Update entity"""
+        """
+        Update entity
+
+        name/email/phone are history tables (new current record, old one
+        closed), like in convert_anonymous_to_verified. Raises
+        ContactInUseError when the new email/phone belongs to another entity.
+        """
         db_entity = self.get_entity(entity_id)
         if db_entity:
-            for field, value in entity_data.dict(exclude_unset=True).items():
+            update_data = entity_data.dict(exclude_unset=True)
+            name = update_data.pop("name", None)
+            if name:
+                self._update_entity_name(db_entity, name)
+            for contact_type in ("email", "phone"):
+                value = update_data.pop(contact_type, None)
+                if value:
+                    self._update_entity_contact(db_entity, contact_type, value)
+            if "document_number" in update_data:
+                db_entity.legal_id_number = update_data.pop("document_number")
+            for field, value in update_data.items():
                 setattr(db_entity, field, value)
             db_entity.updated_at = datetime.utcnow()
             self.db.commit()
@@ -230,12 +572,14 @@ class VehicleEntityLinkService:
         self.db.add(db_link)
         self.db.commit()
         self.db.refresh(db_link)
+        permission_resolver.invalidate_link(db_link)
+        hot_reads.invalidate_vehicle(db_link.vehicle_id)
         return db_link
 
     def get_link(self, link_id: uuid.UUID) -> Optional[VehicleEntityLink]:
         """Get link by ID with entity data"""
         return self.db.query(VehicleEntityLink).options(
-            joinedload(VehicleEntityLink.entity)
+            selectinload(VehicleEntityLink.entity).options(*entity_summary_options())
         ).filter(VehicleEntityLink.id == link_id).first()
 
     def get_vehicle_links(
@@ -247,7 +591,7 @@ class VehicleEntityLinkService:
     ) -> List[VehicleEntityLink]:
         """Get all links for a vehicle with filters"""
         query = self.db.query(VehicleEntityLink).options(
-            joinedload(VehicleEntityLink.entity),
+            selectinload(VehicleEntityLink.entity).options(*entity_summary_options()),
             joinedload(VehicleEntityLink.link_type)
         ).filter(VehicleEntityLink.vehicle_id == vehicle_id)
 
@@ -285,11 +629,16 @@ class VehicleEntityLinkService:
         """Update vehicle-entity link"""
         db_link = self.get_link(link_id)
         if db_link:
+            previous_key = (db_link.entity_id, db_link.vehicle_id)
             for field, value in link_data.dict(exclude_unset=True).items():
                 setattr(db_link, field, value)
             db_link.updated_at = datetime.utcnow()
             self.db.commit()
             self.db.refresh(db_link)
+            permission_resolver.invalidate(*previous_key)
+            permission_resolver.invalidate_link(db_link)
+            hot_reads.invalidate_vehicle(previous_key[1])
+            hot_reads.invalidate_vehicle(db_link.vehicle_id)
         return db_link
 
     def terminate_link(self, link_id: uuid.UUID, end_date: Optional[datetime] = None) -> Optional[VehicleEntityLink]:
@@ -301,6 +650,8 @@ class VehicleEntityLinkService:
             db_link.updated_at = datetime.utcnow()
             self.db.commit()
             self.db.refresh(db_link)
+            permission_resolver.invalidate_link(db_link)
+            hot_reads.invalidate_vehicle(db_link.vehicle_id)
         return db_link
 
     def delete_link(self, link_id: uuid.UUID) -> bool:
@@ -310,6 +661,8 @@ class VehicleEntityLinkService:
             db_link.active = False
             db_link.updated_at = datetime.utcnow()
             self.db.commit()
+            permission_resolver.invalidate_link(db_link)
+            hot_reads.invalidate_vehicle(db_link.vehicle_id)
             return True
         return False
 
@@ -325,7 +678,7 @@ class VehicleEntityLinkService:
     def get_vehicle_owners(self, vehicle_id: uuid.UUID) -> List[VehicleEntityLink]:
         """Get all owners (current and former) for a vehicle"""
         return self.db.query(VehicleEntityLink).options(
-            joinedload(VehicleEntityLink.entity)
+            selectinload(VehicleEntityLink.entity).options(*entity_summary_options())
         ).filter(
             and_(
                 VehicleEntityLink.vehicle_id == vehicle_id,
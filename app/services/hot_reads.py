@@ -0,0 +1,115 @@
+"""
+Leituras quentes: GET /vehicles/{id} e GET /conversations/{id}
+
+Um veículo público popular ou uma conversa aberta por todos os
+participantes ao mesmo tempo fazia cada requisição repetir as mesmas
+queries pesadas. Aqui as leituras idênticas concorrentes do worker viram
+uma execução só (single-flight) e o resultado fica num cache curto
+(HOT_READ_CACHE_TTL_SECONDS).
+
+O que fica no cache é o JSON da resposta (dicts/listas), nunca instâncias
+do ORM: elas pertencem à sessão de quem carregou e não podem ser
+compartilhadas entre requisições. O que depende de quem pede (permissões
+do participante) é calculado por requisição, fora do cache.
+
+Os veículos têm ainda um segundo nível, vehicle_cache (app/core/response_cache.py):
+cache de respostas por vehicle_id e versão (RESPONSE_CACHE_BACKEND). Com
+Redis a invalidação vale para todos os workers e o TTL pode ser longo
+(RESPONSE_CACHE_TTL_SECONDS); em memória cada worker só vê as próprias
+invalidações, então o TTL é o curto RESPONSE_CACHE_MEMORY_TTL_SECONDS.
+Para trocar o backend (ex.: um Redis falso local):
+    hot_reads.vehicle_cache = VersionedCache(RedisBackend(client), "vehicle-detail")
+
+A projeção vehicle_details_projection (/vehicles-with-details) não passa
+por aqui: ela também muda por triggers (catálogo, nomes de entidades,
+escritas diretas no Supabase), que não invalidam este cache.
+
+Toda escrita no veículo (placas, cores, capas e links incluídos) ou na
+conversa chama invalidate_vehicle / invalidate_conversation depois do commit.
+
+A resposta do veículo embute marca, modelo e versão. As escritas no
+catálogo (brands.py) chamam invalidate_catalog, que avança uma versão do
+catálogo guardada no próprio vehicle_cache (uma chave, sem expiração) e
+incluída na variante de cada entrada: com Redis, todos os workers deixam de
+ler as respostas antigas.
+"""
+from typing import Any, Callable, Hashable
+import json
+import uuid
+
+from app.core.config import settings
+from app.core.response_cache import VersionedCache, create_backend
+from app.core.singleflight import CoalescedCache
+
+hot_reads = CoalescedCache(
+    max_entries=settings.HOT_READ_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.HOT_READ_CACHE_TTL_SECONDS,
+)
+
+_vehicle_backend = create_backend(
+    settings.RESPONSE_CACHE_BACKEND,
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    redis_url=settings.RESPONSE_CACHE_REDIS_URL,
+)
+vehicle_cache = VersionedCache(
+    _vehicle_backend,
+    namespace="vehicle-detail",
+    ttl_seconds=(
+        settings.RESPONSE_CACHE_TTL_SECONDS if _vehicle_backend.shared
+        else settings.RESPONSE_CACHE_MEMORY_TTL_SECONDS
+    ),
+)
+
+
+def _normalize_id(value) -> str:
+    """Mesma chave para UUID e para as variações de texto do mesmo id"""
+    try:
+        return str(value if isinstance(value, uuid.UUID) else uuid.UUID(str(value)))
+    except ValueError:
+        return str(value)
+
+
+# Id da versão do catálogo (marcas, modelos, versões) no vehicle_cache
+CATALOG_VERSION_ID = "catalog"
+
+
+def _variant(key: Hashable) -> str:
+    return json.dumps(key, separators=(",", ":"))
+
+
+def load_vehicle(vehicle_id, key: Hashable, loader: Callable[[], Any]) -> Any:
+    """
+    Resposta de um veículo: single-flight + cache curto do worker, e atrás
+    deles o vehicle_cache (só o líder do single-flight consulta o backend)
+    """
+    vehicle_id = _normalize_id(vehicle_id)
+
+    def load_shared():
+        catalog_version = vehicle_cache.version(CATALOG_VERSION_ID)
+        if catalog_version is None:
+            return loader()
+        return vehicle_cache.get_or_load(vehicle_id, f"c{catalog_version}:{_variant(key)}", loader)
+
+    return hot_reads.get_or_load(("vehicle", vehicle_id), key, load_shared)
+
+
+def load_conversation(conversation_id, key: Hashable, loader: Callable[[], Any]) -> Any:
+    return hot_reads.get_or_load(("conversation", _normalize_id(conversation_id)), key, loader)
+
+
+def invalidate_vehicle(vehicle_id) -> None:
+    if vehicle_id is None:
+        return
+    vehicle_id = _normalize_id(vehicle_id)
+    vehicle_cache.invalidate(vehicle_id)
+    hot_reads.invalidate(("vehicle", vehicle_id))
+
+
+def invalidate_catalog() -> None:
+    """Descarta as respostas de todos os veículos (depois de alterar marca, modelo ou versão)"""
+    vehicle_cache.invalidate(CATALOG_VERSION_ID, expires=False)
+    hot_reads.invalidate_where(lambda group: group[0] == "vehicle")
+
+
+def invalidate_conversation(conversation_id) -> None:
+    hot_reads.invalidate(("conversation", _normalize_id(conversation_id)))
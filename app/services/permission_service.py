@@ -0,0 +1,188 @@
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from datetime import date
+import threading
+import time
+import uuid
+
+from app.core.singleflight import CoalescedCache
+from app.core.config import settings
+from app.models.entity import Link
+from app.models.permission import Permission
+from app.models.link_type_permission import LinkTypePermission
+
+
+# (link_type_id, start_date, end_date) de cada vínculo ativo
+LinkGrant = Tuple[Optional[uuid.UUID], Optional[date], Optional[date]]
+
+
+class PermissionCatalog:
+    """
+    Catálogo de permissões pré-computado
+
+    Cada código de permissão recebe um bit; cada tipo de vínculo vira uma
+    máscara com os bits das permissões que ele concede (link_type_permissions).
+    """
+
+    def __init__(self, bits: Dict[str, int], masks: Dict[uuid.UUID, int]):
+        self.bits = bits
+        self.masks = masks
+        self.loaded_at = time.monotonic()
+
+    @classmethod
+    def load(cls, db: Session) -> "PermissionCatalog":
+        codes = [
+            code for (code,) in db.query(Permission.code)
+            .filter(Permission.active == True)
+            .order_by(Permission.code)
+            .all()
+        ]
+        bits = {code: 1 << index for index, code in enumerate(codes)}
+
+        masks: Dict[uuid.UUID, int] = {}
+        rows = db.query(LinkTypePermission.link_type_id, Permission.code).join(
+            Permission, Permission.id == LinkTypePermission.permission_id
+        ).filter(Permission.active == True).all()
+        for link_type_id, code in rows:
+            masks[link_type_id] = masks.get(link_type_id, 0) | bits[code]
+
+        return cls(bits, masks)
+
+
+class PermissionResolver:
+    """
+    Resolve permissões de uma entidade em um veículo sem ir ao banco a cada request
+
+    Equivalente em Python de check_link_permission (migration d148697e2509):
+    - o catálogo link_type -> máscara de permissões é carregado uma vez e
+      recarregado a cada catalog_ttl_seconds
+    - os vínculos ativos de cada par (entidade, veículo) ficam em um cache LRU
+      com TTL curto, invalidado quando um vínculo é aprovado, revogado, encerrado etc.
+
+    O cache de vínculos é um CoalescedCache: uma leitura que começou antes da
+    invalidação (e pode ter visto o vínculo ainda ativo) não é gravada, então
+    um vínculo revogado não volta ao cache do worker que atendeu a escrita.
+    Os outros workers não recebem a invalidação e podem continuar concedendo
+    a permissão até a entrada expirar (PERMISSION_CACHE_TTL_SECONDS), por
+    isso o TTL deve ficar em poucos segundos.
+
+    As datas de início/fim são avaliadas no momento da checagem, então uma
+    entrada em cache continua correta na virada do dia.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 5.0,
+        max_entries: int = 10000,
+        catalog_ttl_seconds: float = 300.0,
+    ):
+        self.catalog_ttl_seconds = catalog_ttl_seconds
+        self._catalog: Optional[PermissionCatalog] = None
+        self._catalog_lock = threading.Lock()
+        self._grants = CoalescedCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def get_catalog(self, db: Session) -> PermissionCatalog:
+        """Retorna o catálogo de permissões (carrega/recarrega se necessário)"""
+        catalog = self._catalog
+        if catalog and time.monotonic() - catalog.loaded_at < self.catalog_ttl_seconds:
+            return catalog
+
+        with self._catalog_lock:
+            catalog = self._catalog
+            if catalog is None or time.monotonic() - catalog.loaded_at >= self.catalog_ttl_seconds:
+                catalog = PermissionCatalog.load(db)
+                self._catalog = catalog
+        return catalog
+
+    def get_link_grants(self, db: Session, entity_id: uuid.UUID, vehicle_id: uuid.UUID) -> List[LinkGrant]:
+        """Vínculos ativos da entidade no veículo (com cache)"""
+        group = (str(entity_id), str(vehicle_id))
+
+        def load() -> List[LinkGrant]:
+            return [
+                (link_type_id, start_date, end_date)
+                for link_type_id, start_date, end_date in db.query(
+                    Link.link_type_id, Link.start_date, Link.end_date
+                ).filter(
+                    Link.entity_id == entity_id,
+                    Link.vehicle_id == vehicle_id,
+                    Link.status == "active",
+                ).all()
+            ]
+
+        return self._grants.get_or_load(group, "grants", load)
+
+    def get_permission_mask(self, db: Session, entity_id: uuid.UUID, vehicle_id: uuid.UUID) -> int:
+        """Máscara com todas as permissões da entidade no veículo hoje"""
+        catalog = self.get_catalog(db)
+        today = date.today()
+
+        mask = 0
+        for link_type_id, start_date, end_date in self.get_link_grants(db, entity_id, vehicle_id):
+            if start_date is None or start_date > today:
+                continue
+            if end_date is not None and end_date < today:
+                continue
+            mask |= catalog.masks.get(link_type_id, 0)
+        return mask
+
+    def has_permission(
+        self,
+        db: Session,
+        entity_id: uuid.UUID,
+        vehicle_id: uuid.UUID,
+        permission_code: str,
+    ) -> bool:
+        """Verifica se a entidade tem a permissão no veículo"""
+        bit = self.get_catalog(db).bits.get(permission_code)
+        if bit is None:
+            return False
+        return bool(self.get_permission_mask(db, entity_id, vehicle_id) & bit)
+
+    def get_permission_codes(self, db: Session, entity_id: uuid.UUID, vehicle_id: uuid.UUID) -> List[str]:
+        """Lista os códigos de permissão da entidade no veículo"""
+        catalog = self.get_catalog(db)
+        mask = self.get_permission_mask(db, entity_id, vehicle_id)
+        return [code for code, bit in catalog.bits.items() if mask & bit]
+
+    # ------------------------------------------------------------------
+    # Invalidação
+    # ------------------------------------------------------------------
+
+    def invalidate(self, entity_id: Optional[uuid.UUID] = None, vehicle_id: Optional[uuid.UUID] = None) -> None:
+        """
+        Remove entradas do cache de vínculos
+
+        Com os dois ids remove o par; com só um, todas as entradas daquela
+        entidade/veículo; sem nenhum, limpa tudo.
+        """
+        if entity_id is not None and vehicle_id is not None:
+            self._grants.invalidate((str(entity_id), str(vehicle_id)))
+        elif entity_id is not None:
+            self._grants.invalidate_where(lambda group: group[0] == str(entity_id))
+        elif vehicle_id is not None:
+            self._grants.invalidate_where(lambda group: group[1] == str(vehicle_id))
+        else:
+            self._grants.clear()
+
+    def invalidate_link(self, link: Link) -> None:
+        """Invalida o cache do par (entidade, veículo) de um vínculo alterado"""
+        if link is None or link.entity_id is None or link.vehicle_id is None:
+            return
+        self.invalidate(link.entity_id, link.vehicle_id)
+
+    def invalidate_catalog(self) -> None:
+        """Força recarregar o catálogo (após alterar link_type_permissions)"""
+        with self._catalog_lock:
+            self._catalog = None
+
+
+permission_resolver = PermissionResolver(
+    ttl_seconds=settings.PERMISSION_CACHE_TTL_SECONDS,
+    max_entries=settings.PERMISSION_CACHE_MAX_ENTRIES,
+    catalog_ttl_seconds=settings.PERMISSION_CATALOG_TTL_SECONDS,
+)
@@ -0,0 +1,436 @@
+"""
+Caminhos de leitura sem ORM para as listagens (read models)
+
+As listagens montavam instâncias completas do SQLAlchemy (identity map,
+coleções de relacionamentos, lazy loads das properties current_plate /
+current_color / current_km) e depois passavam tudo pela validação
+from_attributes do Pydantic. Aqui cada página é um SELECT só das colunas
+que a resposta usa: as linhas voltam como Row (tuplas, sem instrumentação
+do ORM) e viram dicts simples, validados pelo response_model.
+
+- list_vehicle_rows / get_vehicle_rows: GET /vehicles e POST /vehicles/batch (VehicleWithDetails)
+- list_conversation_rows: GET /conversations
+- list_entity_rows / get_entity_rows: GET /entities/entities e POST /entities/entities/batch (Entity)
+
+Todas aceitam um FieldSet (?fields= / ?include=, app/core/fieldsets.py):
+colunas, JOINs e queries de relacionamentos fora do fieldset nem são
+executados, e as chaves correspondentes não aparecem no resultado.
+
+Comparação com o caminho ORM (tempo, memória e queries por página):
+    python scripts/benchmark_read_models.py
+"""
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import and_, desc, func, inspect, select
+from sqlalchemy.orm import Session, aliased
+from datetime import date, datetime
+import uuid
+
+from app.core.batch import match_any_id
+from app.core.fieldsets import FieldSet, FULL_FIELDSET
+from app.models import (
+    Vehicle,
+    Brand,
+    Model,
+    ModelVersion,
+    Plate,
+    Color,
+    VehicleColor,
+    VehicleCover,
+    MileageRecord,
+    File,
+    Conversation,
+    ConversationParticipant,
+    Entity,
+    EntityName,
+    EntityContact,
+)
+from app.schemas.entity import Entity as EntitySchema
+from app.schemas.vehicle import (
+    Brand as BrandSchema,
+    Model as ModelSchema,
+    ModelVersion as ModelVersionSchema,
+    Vehicle as VehicleSchema,
+    VehicleCover as VehicleCoverSchema,
+    VehicleWithDetails,
+)
+
+
+def schema_columns(model, schema, prefix: str = "") -> list:
+    """
+    Colunas de `model` que o schema de resposta usa, rotuladas com `prefix`
+
+    Campos do schema que não são colunas (properties como current_plate)
+    ficam de fora e são resolvidos por JOIN em cada read model.
+    """
+    column_keys = inspect(model).column_attrs.keys()
+    return [
+        getattr(model, name).label(prefix + name)
+        for name in schema.model_fields
+        if name in column_keys
+    ]
+
+
+def _nested(row, prefix: str, columns: Sequence) -> Optional[dict]:
+    """Sub-objeto (brand, model, ...) das colunas rotuladas com `prefix`; None se o JOIN não achou"""
+    if row[prefix + "id"] is None:
+        return None
+    start = len(prefix)
+    return {column.key[start:]: row[column.key] for column in columns}
+
+
+def _json_value(value):
+    """UUID e datas como string (as conversas saem direto em JSONResponse)"""
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+# =============================================================================
+# VEÍCULOS
+# =============================================================================
+
+def _vehicle_covers(db: Session, vehicle_ids: List[uuid.UUID]) -> Dict[uuid.UUID, List[dict]]:
+    """Capas dos veículos da página em uma query, na ordem de exibição"""
+    if not vehicle_ids:
+        return {}
+    columns = schema_columns(VehicleCover, VehicleCoverSchema)
+    rows = db.execute(
+        select(*columns, File.file_url.label("image_url"))
+        .outerjoin(File, File.id == VehicleCover.file_id)
+        .where(match_any_id(VehicleCover.vehicle_id, vehicle_ids))
+        .order_by(VehicleCover.vehicle_id, VehicleCover.display_order)
+    ).mappings()
+
+    covers: Dict[uuid.UUID, List[dict]] = {}
+    for row in rows:
+        covers.setdefault(row["vehicle_id"], []).append(dict(row))
+    return covers
+
+
+def _primary_cover_url(covers: List[dict]) -> Optional[str]:
+    """Mesma regra de Vehicle.primary_cover: a primária, senão a primeira"""
+    if not covers:
+        return None
+    primary = next((cover for cover in covers if cover["is_primary"]), covers[0])
+    return primary["image_url"]
+
+
+# Relacionamentos de VehicleWithDetails (include=)
+VEHICLE_RELATIONS = ("brand", "model", "version", "entity_links", "covers")
+VEHICLE_FIELDS = tuple(VehicleWithDetails.model_fields)
+
+
+def list_vehicle_rows(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    fieldset: FieldSet = FULL_FIELDSET,
+) -> List[dict]:
+    """
+    Página de veículos no formato VehicleWithDetails, em até duas queries
+
+    Marca, modelo, versão, placa/cor/km atuais vêm por LEFT JOIN na query
+    da página (só os JOINs dos campos pedidos); as capas, em uma segunda
+    query para todos os veículos, só se covers ou primary_cover_url foram
+    pedidos. entity_links não é carregado na listagem (os vínculos ficam em
+    GET /vehicles/{vehicle_id}/links).
+    """
+    return _vehicle_rows(db, fieldset, lambda statement: statement.offset(skip).limit(limit))
+
+
+def get_vehicle_rows(db: Session, ids: List[uuid.UUID], fieldset: FieldSet = FULL_FIELDSET) -> List[dict]:
+    """Veículos de `ids` (WHERE id = ANY(:ids)), como em list_vehicle_rows; sem ordem definida"""
+    return _vehicle_rows(db, fieldset, lambda statement: statement.where(match_any_id(Vehicle.id, ids)))
+
+
+def _vehicle_rows(db: Session, fieldset: FieldSet, restrict: Callable) -> List[dict]:
+    """Monta a query de veículos do fieldset; `restrict` aplica a paginação ou o filtro"""
+    vehicle_columns = [
+        column for column in schema_columns(Vehicle, VehicleSchema)
+        if fieldset.wants(column.key)
+    ]
+    nested = [
+        (name, model, schema_columns(model, schema, name + "__"), condition)
+        for name, model, schema, condition in (
+            ("brand", Brand, BrandSchema, Brand.id == Vehicle.brand_id),
+            ("model", Model, ModelSchema, Model.id == Vehicle.model_id),
+            ("version", ModelVersion, ModelVersionSchema, ModelVersion.id == Vehicle.version_id),
+        )
+        if fieldset.wants(name)
+    ]
+
+    statement = select(*vehicle_columns).select_from(Vehicle)
+    for name, model, columns, condition in nested:
+        statement = statement.add_columns(*columns).outerjoin(model, condition)
+    if fieldset.wants("current_plate"):
+        statement = statement.add_columns(Plate.plate_number.label("current_plate")).outerjoin(
+            Plate, Plate.id == Vehicle.plate_id
+        )
+    if fieldset.wants("current_color"):
+        statement = statement.add_columns(Color.name.label("current_color")).outerjoin(
+            VehicleColor, VehicleColor.id == Vehicle.vehicle_color_id
+        ).outerjoin(Color, Color.id == VehicleColor.color_id)
+    if fieldset.wants("current_km"):
+        statement = statement.add_columns(MileageRecord.mileage.label("current_km")).outerjoin(
+            MileageRecord, MileageRecord.id == Vehicle.mileage_id
+        )
+
+    rows = db.execute(restrict(statement)).mappings().all()
+
+    wants_covers = fieldset.wants("covers") or fieldset.wants("primary_cover_url")
+    covers = _vehicle_covers(db, [row["id"] for row in rows]) if wants_covers else {}
+
+    vehicles = []
+    for row in rows:
+        vehicle = {column.key: row[column.key] for column in vehicle_columns}
+        for name in ("current_plate", "current_color", "current_km"):
+            if fieldset.wants(name):
+                vehicle[name] = row[name]
+        for name, _, columns, _ in nested:
+            vehicle[name] = _nested(row, name + "__", columns)
+        if fieldset.wants("entity_links"):
+            vehicle["entity_links"] = []
+        if wants_covers:
+            vehicle_covers = covers.get(row["id"], [])
+            if fieldset.wants("covers"):
+                vehicle["covers"] = vehicle_covers
+            if fieldset.wants("primary_cover_url"):
+                vehicle["primary_cover_url"] = _primary_cover_url(vehicle_covers)
+        vehicles.append(vehicle)
+    return vehicles
+
+
+# =============================================================================
+# CONVERSAS
+# =============================================================================
+
+def _vehicle_summaries(db: Session, vehicle_ids: List[uuid.UUID]) -> Dict[uuid.UUID, dict]:
+    """
+    Resumo dos veículos das conversas (mesmo formato do primary_vehicle
+    da listagem): uma query para os veículos, uma para as placas e uma
+    para as cores
+    """
+    if not vehicle_ids:
+        return {}
+
+    rows = db.execute(
+        select(
+            Vehicle.id,
+            Vehicle.model_year,
+            Vehicle.manufacturing_year,
+            Brand.id.label("brand_id"),
+            Brand.name.label("brand_name"),
+            Model.id.label("model_id"),
+            Model.name.label("model_name"),
+            ModelVersion.id.label("version_id"),
+            ModelVersion.name.label("version_name"),
+            Plate.plate_number.label("current_plate"),
+            Color.name.label("current_color"),
+        )
+        .outerjoin(Brand, Brand.id == Vehicle.brand_id)
+        .outerjoin(Model, Model.id == Vehicle.model_id)
+        .outerjoin(ModelVersion, ModelVersion.id == Vehicle.version_id)
+        .outerjoin(Plate, Plate.id == Vehicle.plate_id)
+        .outerjoin(VehicleColor, VehicleColor.id == Vehicle.vehicle_color_id)
+        .outerjoin(Color, Color.id == VehicleColor.color_id)
+        .where(match_any_id(Vehicle.id, vehicle_ids))
+    ).all()
+
+    plates: Dict[uuid.UUID, List[dict]] = {}
+    for plate in db.execute(
+        select(Plate.vehicle_id, Plate.id, Plate.plate_number, Plate.status, Plate.state)
+        .where(match_any_id(Plate.vehicle_id, vehicle_ids))
+    ):
+        plates.setdefault(plate.vehicle_id, []).append({
+            "id": str(plate.id),
+            "plate_number": plate.plate_number,
+            "status": plate.status,
+            "state": plate.state,
+        })
+
+    colors: Dict[uuid.UUID, List[dict]] = {}
+    for vehicle_color in db.execute(
+        select(VehicleColor.vehicle_id, VehicleColor.id, VehicleColor.is_primary, Color.name)
+        .outerjoin(Color, Color.id == VehicleColor.color_id)
+        .where(match_any_id(VehicleColor.vehicle_id, vehicle_ids))
+    ):
+        colors.setdefault(vehicle_color.vehicle_id, []).append({
+            "id": str(vehicle_color.id),
+            "color": vehicle_color.name,
+            "is_primary": vehicle_color.is_primary,
+        })
+
+    return {
+        row.id: {
+            "id": str(row.id),
+            "brand": {"id": str(row.brand_id), "name": row.brand_name} if row.brand_id else None,
+            "model": {"id": str(row.model_id), "name": row.model_name} if row.model_id else None,
+            "version": {"id": str(row.version_id), "name": row.version_name} if row.version_id else None,
+            "model_year": row.model_year,
+            "manufacturing_year": row.manufacturing_year,
+            "current_plate": row.current_plate,
+            "current_color": row.current_color,
+            "plates": plates.get(row.id, []),
+            "vehicle_colors": colors.get(row.id, []),
+        }
+        for row in rows
+    }
+
+
+# Colunas da listagem de conversas (o primary_vehicle vem à parte)
+CONVERSATION_LIST_COLUMNS = (
+    Conversation.id,
+    Conversation.conversation_code,
+    Conversation.primary_vehicle_id,
+    Conversation.vehicle_ids,
+    Conversation.conversation_type,
+    Conversation.title,
+    Conversation.summary,
+    Conversation.status,
+    Conversation.main_context_id,
+    Conversation.total_participants,
+    Conversation.active_participants,
+    Conversation.total_messages,
+    Conversation.total_actions_executed,
+    Conversation.started_at,
+    Conversation.last_message_at,
+    Conversation.finished_at,
+    Conversation.archived_at,
+    Conversation.created_at,
+    Conversation.updated_at,
+)
+CONVERSATION_LIST_RELATIONS = ("primary_vehicle",)
+CONVERSATION_LIST_FIELDS = tuple(column.key for column in CONVERSATION_LIST_COLUMNS) + CONVERSATION_LIST_RELATIONS
+
+
+def list_conversation_rows(
+    db: Session,
+    skip: int = 0,
+    limit: int = 20,
+    vehicle_id: Optional[uuid.UUID] = None,
+    entity_id: Optional[uuid.UUID] = None,
+    status: Optional[str] = "active",
+    conversation_type: Optional[str] = None,
+    fieldset: FieldSet = FULL_FIELDSET,
+) -> Tuple[List[dict], int]:
+    """
+    Página de conversas já serializada para JSON e o total do filtro
+
+    Mesmos filtros e ordenação de GET /conversations; o primary_vehicle de
+    cada conversa vem de _vehicle_summaries (três queries para a página
+    toda), só se foi pedido.
+    """
+    conditions = [Conversation.deleted_at.is_(None)]
+    if vehicle_id:
+        conditions.append(Conversation.primary_vehicle_id == vehicle_id)
+    if status:
+        conditions.append(Conversation.status == status)
+    if conversation_type:
+        conditions.append(Conversation.conversation_type == conversation_type)
+
+    def filtered(statement):
+        if entity_id:
+            statement = statement.join(
+                ConversationParticipant,
+                and_(
+                    ConversationParticipant.conversation_id == Conversation.id,
+                    ConversationParticipant.entity_id == entity_id,
+                    ConversationParticipant.is_active == True,
+                ),
+            )
+        return statement.where(*conditions)
+
+    total = db.execute(filtered(select(func.count()).select_from(Conversation))).scalar_one()
+
+    wants_vehicle = fieldset.wants("primary_vehicle")
+    columns = [
+        column for column in CONVERSATION_LIST_COLUMNS
+        if fieldset.wants(column.key) or (wants_vehicle and column.key == "primary_vehicle_id")
+    ]
+    rows = db.execute(
+        filtered(select(*columns).select_from(Conversation))
+        .order_by(desc(Conversation.last_message_at))
+        .offset(skip)
+        .limit(limit)
+    ).mappings().all()
+
+    vehicles = {}
+    if wants_vehicle:
+        vehicles = _vehicle_summaries(
+            db, list({row["primary_vehicle_id"] for row in rows if row["primary_vehicle_id"]})
+        )
+
+    conversations = []
+    for row in rows:
+        conversation = {
+            column.key: _json_value(row[column.key])
+            for column in columns
+            if fieldset.wants(column.key)
+        }
+        if wants_vehicle:
+            conversation["primary_vehicle"] = vehicles.get(row["primary_vehicle_id"])
+        conversations.append(conversation)
+    return conversations, total
+
+
+# =============================================================================
+# ENTIDADES
+# =============================================================================
+
+_primary_name = aliased(EntityName)
+_primary_email = aliased(EntityContact)
+_primary_phone = aliased(EntityContact)
+
+# Campo do schema Entity -> (coluna rotulada com o nome que o schema valida, JOIN necessário)
+ENTITY_COLUMNS = {
+    "id": (Entity.id, None),
+    "entity_code": (Entity.entity_code, None),
+    "name": (_primary_name.name_value.label("display_name"), (_primary_name, _primary_name.id == Entity.primary_name_id)),
+    "email": (_primary_email.contact_value.label("email"), (_primary_email, _primary_email.id == Entity.primary_email_contact_id)),
+    "phone": (_primary_phone.contact_value.label("phone"), (_primary_phone, _primary_phone.id == Entity.primary_phone_contact_id)),
+    "document_number": (Entity.legal_id_number, None),
+    "active": (Entity.active, None),
+    "created_at": (Entity.created_at, None),
+    "updated_at": (Entity.updated_at, None),
+    "is_anonymous": (Entity.is_anonymous, None),
+    "verified": (Entity.verified, None),
+}
+ENTITY_FIELDS = tuple(EntitySchema.model_fields)
+
+
+def list_entity_rows(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    fieldset: FieldSet = FULL_FIELDSET,
+) -> List[dict]:
+    """
+    Página de entidades ativas no formato do schema Entity, em uma query
+
+    Nome, email e telefone primários vêm por LEFT JOIN (em vez das
+    properties display_name/email/phone sobre relacionamentos carregados),
+    e só entram na query se foram pedidos.
+    """
+    statement = _entity_select(fieldset).where(Entity.active == True).offset(skip).limit(limit)
+    return [dict(row) for row in db.execute(statement).mappings()]
+
+
+def get_entity_rows(db: Session, ids: List[uuid.UUID], fieldset: FieldSet = FULL_FIELDSET) -> List[dict]:
+    """
+    Entidades de `ids` (WHERE id = ANY(:ids)), ativas ou não, como em
+    GET /entities/{entity_id}; sem ordem definida
+    """
+    statement = _entity_select(fieldset).where(match_any_id(Entity.id, ids))
+    return [dict(row) for row in db.execute(statement).mappings()]
+
+
+def _entity_select(fieldset: FieldSet):
+    selected = [ENTITY_COLUMNS[name] for name in ENTITY_FIELDS if fieldset.wants(name)]
+
+    statement = select(*(column for column, _ in selected)).select_from(Entity)
+    for _, join in selected:
+        if join is not None:
+            statement = statement.outerjoin(*join)
+    return statement
@@ -0,0 +1,388 @@
+"""
+Benchmark dos endpoints quentes da API contra um Postgres local
+
+Sobe a API (uvicorn em subprocesso) apontando para o DATABASE_URL atual,
+espera o /health/ready, busca ids reais no banco (veículos, conversas,
+entidades, moments) e mede, por endpoint, latência p50/p95/p99 e vazão
+com N requisições em --concurrency conexões simultâneas.
+
+O banco deve estar populado (ex.: scripts/generate_synthetic_data.py).
+Atenção: send_message e upload_file gravam dados.
+
+Os resultados vão para benchmarks/results/<data>-<sha>.json (sha do commit
+atual), para comparar regressões entre commits:
+
+Uso:
+    python scripts/benchmark_endpoints.py
+    python scripts/benchmark_endpoints.py --requests 2000 --concurrency 32 --only get_vehicle list_vehicles
+    python scripts/benchmark_endpoints.py --url http://localhost:8000       # API já rodando
+    python scripts/benchmark_endpoints.py --compare antes.json depois.json  # compara dois resultados
+"""
+import os
+import sys
+import json
+import time
+import base64
+import asyncio
+import argparse
+import subprocess
+from datetime import datetime
+
+import httpx
+import psycopg2
+
+# Adicionar o diretório raiz ao path para importar app
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from app.core.config import settings
+from app.core.security import create_entity_access_token
+
+API = "/api/v1"
+DEFAULT_OUTPUT_DIR = os.path.join(ROOT_DIR, "benchmarks", "results")
+
+# PNG 1x1 (upload_file abre a imagem com PIL)
+TINY_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=="
+)
+
+
+# =============================================================================
+# SERVIDOR E DADOS
+# =============================================================================
+
+def git_revision() -> dict:
+    """sha do commit atual e se há alterações não commitadas"""
+    def run(*args):
+        return subprocess.run(["git", *args], cwd=ROOT_DIR, capture_output=True, text=True).stdout.strip()
+
+    return {"sha": run("rev-parse", "--short", "HEAD") or "unknown", "dirty": bool(run("status", "--porcelain"))}
+
+
+def server_command(server: str, port: int, workers: int) -> list:
+    """Linha de comando do uvicorn ou do gunicorn (workers UvicornWorker, como em produção)"""
+    if server == "gunicorn":
+        return [
+            sys.executable, "-m", "gunicorn", "app.main:app",
+            "-k", "uvicorn.workers.UvicornWorker", "-w", str(workers),
+            "--bind", f"127.0.0.1:{port}", "--log-level", "warning",
+        ]
+    return [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning", "--no-access-log",
+    ]
+
+
+def start_server(port: int, workers: int, server: str = "uvicorn", timeout: float = 60.0) -> subprocess.Popen:
+    """Sobe a API e espera /health/ready responder 200"""
+    process = subprocess.Popen(
+        server_command(server, port, workers),
+        cwd=ROOT_DIR,
+        # Mesma SECRET_KEY deste processo: os tokens de auth_headers valem na API
+        env={**os.environ, "DEBUG": "false", "SECRET_KEY": settings.SECRET_KEY},
+    )
+
+    deadline = time.monotonic() + timeout
+    url = f"http://127.0.0.1:{port}/health/ready"
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{server} terminou com código {process.returncode}")
+        try:
+            if httpx.get(url, timeout=2.0).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+
+    stop_server(process)
+    raise RuntimeError(f"API não ficou pronta em {timeout:.0f}s ({url})")
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def load_fixtures(sample: int = 500) -> dict:
+    """Ids reais para montar as requisições (amostra estável: ORDER BY id)"""
+    conn = psycopg2.connect(settings.DATABASE_URL)
+    fixtures = {}
+    queries = {
+        "vehicle_ids": "SELECT id::text FROM vehicles ORDER BY id LIMIT %s",
+        "entity_ids": "SELECT id::text FROM entities WHERE active = true ORDER BY id LIMIT %s",
+        "participants": """
+            SELECT conversation_id::text, entity_id::text
+            FROM conversation_participants
+            WHERE is_active = true AND conversation_id IS NOT NULL AND entity_id IS NOT NULL
+            ORDER BY id LIMIT %s
+        """,
+        "moment_ids": "SELECT id::text FROM moments WHERE active = true ORDER BY id LIMIT %s",
+    }
+    try:
+        for name, query in queries.items():
+            with conn.cursor() as cur:
+                try:
+                    cur.execute(query, (sample,))
+                    rows = cur.fetchall()
+                    fixtures[name] = [row if len(row) > 1 else row[0] for row in rows]
+                except psycopg2.Error:
+                    # Tabela ausente neste schema (ex.: moments): cenário é pulado
+                    conn.rollback()
+                    fixtures[name] = []
+    finally:
+        conn.close()
+    return fixtures
+
+
+# =============================================================================
+# CENÁRIOS
+# =============================================================================
+# Cada cenário recebe (fixtures, i) e devolve (método, caminho, kwargs do httpx),
+# ou None se não houver dados para ele.
+
+def auth_headers(entity_id) -> dict:
+    """Authorization: Bearer de uma entidade das fixtures"""
+    if not entity_id:
+        return {}
+    return {"Authorization": f"Bearer {create_entity_access_token(entity_id)}"}
+
+
+def pick(items, i):
+    return items[i % len(items)] if items else None
+
+
+def scenario_list_vehicles(fx, i):
+    entity_id = pick(fx["entity_ids"], i)
+    return "GET", f"{API}/vehicles/", {"params": {"limit": 20}, "headers": auth_headers(entity_id)}
+
+
+def scenario_get_vehicle(fx, i):
+    vehicle_id = pick(fx["vehicle_ids"], i)
+    return vehicle_id and ("GET", f"{API}/vehicles/{vehicle_id}", {})
+
+
+def scenario_list_conversations(fx, i):
+    participant = pick(fx["participants"], i)
+    return participant and ("GET", f"{API}/conversations", {"params": {"entity_id": participant[1], "limit": 20}})
+
+
+def scenario_send_message(fx, i):
+    participant = pick(fx["participants"], i)
+    if not participant:
+        return None
+    conversation_id, entity_id = participant
+    return "POST", f"{API}/conversations/{conversation_id}/messages", {"json": {
+        "conversation_id": conversation_id,
+        "sender_entity_id": entity_id,
+        "content": f"benchmark message {i}",
+        "message_type": "text",
+    }, "headers": auth_headers(entity_id)}
+
+
+def scenario_vehicles_with_details(fx, i):
+    return "GET", f"{API}/vehicles-with-details", {"params": {"limit": 20}}
+
+
+def scenario_moments_with_details(fx, i):
+    # A lista /moments-with-details não é paginada; mede o detalhe por id
+    moment_id = pick(fx["moment_ids"], i)
+    return moment_id and ("GET", f"{API}/moments-with-details/{moment_id}", {})
+
+
+def scenario_upload_file(fx, i):
+    entity_id = pick(fx["entity_ids"], i)
+    return entity_id and ("POST", f"{API}/upload/upload", {
+        "files": {"file": (f"bench-{i}.png", TINY_PNG, "image/png")},
+        "data": {"uploaded_by_entity_id": entity_id, "source": "benchmark"},
+    })
+
+
+SCENARIOS = {
+    "list_vehicles": scenario_list_vehicles,
+    "get_vehicle": scenario_get_vehicle,
+    "list_conversations": scenario_list_conversations,
+    "send_message": scenario_send_message,
+    "vehicles_with_details": scenario_vehicles_with_details,
+    "moments_with_details": scenario_moments_with_details,
+    "upload_file": scenario_upload_file,
+}
+
+
+# =============================================================================
+# MEDIÇÃO
+# =============================================================================
+
+def percentile(sorted_values, fraction: float) -> float:
+    """Percentil por nearest-rank (valores já ordenados)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(latencies, errors: int, seconds: float) -> dict:
+    """Resumo em ms: p50/p95/p99, média, máximo e vazão"""
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "requests": count,
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "throughput_rps": round(count / seconds, 1) if seconds > 0 else 0.0,
+        "mean_ms": round(sum(ordered) / count * 1000, 2) if count else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2) if count else 0.0,
+    }
+
+
+async def run_scenario(client: httpx.AsyncClient, build, fixtures, requests: int, concurrency: int, warmup: int):
+    """Executa o cenário com `concurrency` tarefas consumindo um contador comum"""
+    if build(fixtures, 0) is None:
+        return None
+
+    for i in range(warmup):
+        method, path, kwargs = build(fixtures, i)
+        await client.request(method, path, **kwargs)
+
+    latencies = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < requests:
+            i = next_index
+            next_index += 1
+            method, path, kwargs = build(fixtures, warmup + i)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run_benchmark(base_url: str, names, fixtures, requests: int, concurrency: int, warmup: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    results = {}
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        for name in names:
+            summary = await run_scenario(client, SCENARIOS[name], fixtures, requests, concurrency, warmup)
+            if summary is None:
+                print(f"   {name:24s} [PULADO] sem dados no banco")
+                continue
+            results[name] = summary
+            print(
+                f"   {name:24s} p50 {summary['p50_ms']:8.2f}  p95 {summary['p95_ms']:8.2f}  "
+                f"p99 {summary['p99_ms']:8.2f} ms  {summary['throughput_rps']:8.1f} req/s  "
+                f"erros {summary['errors']}"
+            )
+    return results
+
+
+# =============================================================================
+# COMPARAÇÃO
+# =============================================================================
+
+def compare(before_path: str, after_path: str, threshold: float) -> bool:
+    """Compara p50/p95/p99 de dois resultados; False se algum piorou além do limite"""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    print(f"   {before['git']['sha']} -> {after['git']['sha']} (regressão: > {threshold:.0%})\n")
+    ok = True
+    for name, new in after["scenarios"].items():
+        old = before["scenarios"].get(name)
+        if not old:
+            continue
+        deltas = []
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            change = (new[metric] - old[metric]) / old[metric] if old[metric] else 0.0
+            marker = " !" if change > threshold else ""
+            ok = ok and change <= threshold
+            deltas.append(f"{metric[:-3]} {old[metric]:7.2f} -> {new[metric]:7.2f} ({change:+.0%}){marker}")
+        print(f"   {name:24s} " + "  ".join(deltas))
+    return ok
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Benchmark dos endpoints quentes (p50/p95/p99)")
+    parser.add_argument("--requests", type=int, default=500, help="Requisições medidas por endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=20, help="Requisições descartadas antes de medir")
+    parser.add_argument("--server", choices=["uvicorn", "gunicorn"], default="uvicorn")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--url", help="Usar uma API já rodando em vez de subir o uvicorn")
+    parser.add_argument("--only", nargs="*", choices=list(SCENARIOS), help="Rodar só estes endpoints")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--compare", nargs=2, metavar=("ANTES", "DEPOIS"), help="Comparar dois resultados JSON")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Piora relativa considerada regressão")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    if args.compare:
+        print("COMPARAÇÃO DE BENCHMARKS")
+        print("=" * 80)
+        ok = compare(args.compare[0], args.compare[1], args.threshold)
+        raise SystemExit(0 if ok else 1)
+
+    revision = git_revision()
+    names = args.only or list(SCENARIOS)
+    print(f"BENCHMARK DE ENDPOINTS ({revision['sha']}{' + alterações' if revision['dirty'] else ''})")
+    print(f"{args.requests} req/endpoint, concorrência {args.concurrency}, {args.server} x {args.workers} worker(s)")
+    print("=" * 80)
+
+    fixtures = load_fixtures()
+    process = None if args.url else start_server(args.port, args.workers, args.server)
+    base_url = args.url or f"http://127.0.0.1:{args.port}"
+    try:
+        scenarios = asyncio.run(run_benchmark(
+            base_url, names, fixtures, args.requests, args.concurrency, args.warmup
+        ))
+    finally:
+        if process:
+            stop_server(process)
+
+    result = {
+        "git": revision,
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "server": args.server,
+            "workers": args.workers,
+            "url": base_url,
+        },
+        "scenarios": scenarios,
+    }
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    output = os.path.join(
+        args.output_dir, f"{datetime.utcnow():%Y%m%d-%H%M%S}-{revision['sha']}.json"
+    )
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print("\n" + "=" * 80)
+    print(f"Resultados salvos em {os.path.relpath(output, ROOT_DIR)}")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: overhead do MetricsMiddleware por requisição
+
+Chama um app ASGI mínimo (resposta fixa, sem banco) diretamente, sem
+servidor HTTP, com e sem o middleware de métricas, e compara o tempo médio
+por requisição. A diferença é o custo das métricas em cada request da API.
+Também mede o tempo de renderizar /metrics com as séries geradas.
+
+Uso:
+    python scripts/benchmark_metrics_overhead.py
+    python scripts/benchmark_metrics_overhead.py --requests 200000 --routers 12
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+# Adicionar o diretório raiz ao path para importar app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.metrics import MetricsMiddleware, MetricsRegistry, DURATION_BUCKETS, SIZE_BUCKETS
+
+BODY = b'{"status": "ok"}' * 16
+
+
+def make_endpoints(count: int):
+    """Funções falsas com __module__ de routers da API"""
+    endpoints = []
+    for index in range(count):
+        def endpoint():
+            return None
+        endpoint.__module__ = f"app.api.v1.endpoints.router_{index}"
+        endpoint.__name__ = f"handler_{index}"
+        endpoints.append(endpoint)
+    return endpoints
+
+
+def make_app(endpoints):
+    """App ASGI que 'roteia' (define scope['endpoint']) e responde 200"""
+    async def app(scope, receive, send):
+        scope["endpoint"] = endpoints[hash(scope["path"]) % len(endpoints)]
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": BODY})
+    return app
+
+
+def make_registry() -> MetricsRegistry:
+    metrics = MetricsRegistry()
+    metrics.counter("http_requests_total", "bench")
+    metrics.gauge("http_requests_in_flight", "bench")
+    metrics.histogram("http_request_duration_seconds", "bench", DURATION_BUCKETS)
+    metrics.histogram("http_request_db_seconds", "bench", DURATION_BUCKETS)
+    metrics.histogram("http_response_size_bytes", "bench", SIZE_BUCKETS)
+    return metrics
+
+
+async def run(app, requests: int, paths) -> float:
+    """Executa as requisições e retorna o tempo médio em microssegundos"""
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        return None
+
+    started = time.perf_counter()
+    for index in range(requests):
+        scope = {"type": "http", "method": "GET", "path": paths[index % len(paths)]}
+        await app(scope, receive, send)
+    return (time.perf_counter() - started) / requests * 1_000_000
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Benchmark: overhead do MetricsMiddleware")
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--routers", type=int, default=8, help="Routers distintos (séries de labels)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    endpoints = make_endpoints(args.routers)
+    paths = [f"/api/v1/path_{index}" for index in range(args.routers * 4)]
+    base_app = make_app(endpoints)
+    metrics = make_registry()
+    instrumented_app = MetricsMiddleware(base_app, metrics=metrics)
+
+    print("=" * 80)
+    print(f"OVERHEAD DO MIDDLEWARE DE MÉTRICAS ({args.requests} requisições x {args.repeat})")
+    print("=" * 80)
+
+    plain = min(asyncio.run(run(base_app, args.requests, paths)) for _ in range(args.repeat))
+    instrumented = min(asyncio.run(run(instrumented_app, args.requests, paths)) for _ in range(args.repeat))
+
+    started = time.perf_counter()
+    output = metrics.render()
+    render_ms = (time.perf_counter() - started) * 1000
+
+    print(f"   Sem métricas:  {plain:8.2f} µs/req")
+    print(f"   Com métricas:  {instrumented:8.2f} µs/req")
+    print(f"   Overhead:      {instrumented - plain:8.2f} µs/req")
+    print(f"   /metrics:      {render_ms:8.2f} ms ({len(output.splitlines())} linhas)")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Benchmark: listagens via ORM versus read models (app/services/read_models.py)
+
+Para cada listagem (veículos, conversas, entidades) monta a mesma página de
+--limit linhas pelos dois caminhos, incluindo a serialização da resposta
+(Pydantic para veículos e entidades, dicts JSON para conversas), e compara:
+- tempo por página (mínimo e mediana de --repeat execuções)
+- memória alocada por página (pico do tracemalloc) e blocos vivos no fim
+- número de queries
+
+Cada execução usa uma sessão nova (identity map vazio), como uma requisição.
+O caminho ORM reproduz as consultas que os endpoints faziam antes dos
+read models.
+
+Uso:
+    python scripts/benchmark_read_models.py
+    python scripts/benchmark_read_models.py --limit 100 --repeat 30 --only vehicles
+"""
+import os
+import sys
+import gc
+import time
+import argparse
+import statistics
+import tracemalloc
+
+# Adicionar o diretório raiz ao path para importar app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import desc
+from sqlalchemy.orm import joinedload
+
+from app.core.database import SessionLocal, engine
+from app.core.profiling import count_queries, install_query_listeners
+from app.models import Vehicle, VehicleColor, Conversation, Entity
+from app.schemas import VehicleWithDetails
+from app.schemas.entity import Entity as EntitySchema
+from app.services import read_models
+from app.services.entity_service import entity_summary_options
+
+
+# =============================================================================
+# CAMINHO ORM (como os endpoints faziam)
+# =============================================================================
+
+def orm_vehicles(db, limit):
+    vehicles = (
+        db.query(Vehicle)
+        .options(
+            joinedload(Vehicle.brand),
+            joinedload(Vehicle.model),
+            joinedload(Vehicle.version),
+            joinedload(Vehicle.plates),
+            joinedload(Vehicle.vehicle_colors).joinedload(VehicleColor.color),
+            joinedload(Vehicle.covers),
+        )
+        .limit(limit)
+        .all()
+    )
+    return [VehicleWithDetails.model_validate(vehicle).model_dump(mode="json") for vehicle in vehicles]
+
+
+def orm_conversations(db, limit):
+    query = db.query(Conversation).options(
+        joinedload(Conversation.primary_vehicle).joinedload(Vehicle.brand),
+        joinedload(Conversation.primary_vehicle).joinedload(Vehicle.model),
+        joinedload(Conversation.primary_vehicle).joinedload(Vehicle.version),
+        joinedload(Conversation.primary_vehicle).joinedload(Vehicle.plates),
+        joinedload(Conversation.primary_vehicle).joinedload(Vehicle.vehicle_colors).joinedload(VehicleColor.color),
+    ).filter(Conversation.deleted_at.is_(None), Conversation.status == "active")
+    query.count()
+
+    result = []
+    for conv in query.order_by(desc(Conversation.last_message_at)).limit(limit).all():
+        vehicle = conv.primary_vehicle
+        result.append({
+            "id": str(conv.id),
+            "conversation_code": conv.conversation_code,
+            "title": conv.title,
+            "status": conv.status,
+            "total_messages": conv.total_messages,
+            "last_message_at": conv.last_message_at.isoformat() if conv.last_message_at else None,
+            "created_at": conv.created_at.isoformat(),
+            "primary_vehicle": vehicle and {
+                "id": str(vehicle.id),
+                "brand": {"id": str(vehicle.brand.id), "name": vehicle.brand.name} if vehicle.brand else None,
+                "model": {"id": str(vehicle.model.id), "name": vehicle.model.name} if vehicle.model else None,
+                "version": {"id": str(vehicle.version.id), "name": vehicle.version.name} if vehicle.version else None,
+                "current_plate": vehicle.current_plate,
+                "current_color": vehicle.current_color,
+                "plates": [{"id": str(p.id), "plate_number": p.plate_number} for p in vehicle.plates],
+                "vehicle_colors": [
+                    {"id": str(vc.id), "color": vc.color.name if vc.color else None} for vc in vehicle.vehicle_colors
+                ],
+            },
+        })
+    return result
+
+
+def orm_entities(db, limit):
+    entities = db.query(Entity).options(*entity_summary_options()).filter(Entity.active == True).limit(limit).all()
+    return [EntitySchema.model_validate(entity).model_dump(mode="json") for entity in entities]
+
+
+# =============================================================================
+# READ MODELS
+# =============================================================================
+
+def dto_vehicles(db, limit):
+    rows = read_models.list_vehicle_rows(db, limit=limit)
+    return [VehicleWithDetails.model_validate(row).model_dump(mode="json") for row in rows]
+
+
+def dto_conversations(db, limit):
+    rows, _ = read_models.list_conversation_rows(db, limit=limit)
+    return rows
+
+
+def dto_entities(db, limit):
+    rows = read_models.list_entity_rows(db, limit=limit)
+    return [EntitySchema.model_validate(row).model_dump(mode="json") for row in rows]
+
+
+CASES = {
+    "vehicles": (orm_vehicles, dto_vehicles),
+    "conversations": (orm_conversations, dto_conversations),
+    "entities": (orm_entities, dto_entities),
+}
+
+
+# =============================================================================
+# MEDIÇÃO
+# =============================================================================
+
+def measure(build, limit: int, repeat: int) -> dict:
+    """Tempo (sem tracemalloc) e memória (com tracemalloc) por página"""
+    timings = []
+    for _ in range(repeat):
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            with count_queries() as stats:
+                rows = build(db, limit)
+            timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            db.close()
+
+    gc.collect()
+    db = SessionLocal()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        rows = build(db, limit)
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+        db.close()
+    live_blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+
+    return {
+        "rows": len(rows),
+        "queries": stats.count,
+        "min_ms": min(timings),
+        "median_ms": statistics.median(timings),
+        "peak_kib": peak / 1024,
+        "live_blocks": live_blocks,
+    }
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Benchmark: ORM versus read models nas listagens")
+    parser.add_argument("--limit", type=int, default=100, help="Linhas por página")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--only", nargs="*", choices=list(CASES))
+    args = parser.parse_args()
+
+    install_query_listeners(engine)
+
+    print("=" * 80)
+    print(f"ORM x READ MODELS (página de {args.limit} linhas, {args.repeat} execuções)")
+    print("=" * 80)
+    print(f"   {'listagem':14s} {'caminho':8s} {'linhas':>6} {'queries':>7} {'min ms':>8} "
+          f"{'med ms':>8} {'pico KiB':>9} {'blocos':>8}")
+
+    for name in args.only or list(CASES):
+        orm_build, dto_build = CASES[name]
+        # Aquecimento: compila as queries e carrega os mappers
+        for build in (orm_build, dto_build):
+            db = SessionLocal()
+            try:
+                build(db, args.limit)
+            finally:
+                db.close()
+
+        results = {}
+        for label, build in (("orm", orm_build), ("dto", dto_build)):
+            result = results[label] = measure(build, args.limit, args.repeat)
+            print(
+                f"   {name:14s} {label:8s} {result['rows']:>6} {result['queries']:>7} "
+                f"{result['min_ms']:>8.2f} {result['median_ms']:>8.2f} "
+                f"{result['peak_kib']:>9.1f} {result['live_blocks']:>8}"
+            )
+
+        orm, dto = results["orm"], results["dto"]
+        if dto["median_ms"] and dto["peak_kib"]:
+            print(
+                f"   {'':14s} {'ganho':8s} {'':>6} {'':>7} {'':>8} "
+                f"{orm['median_ms'] / dto['median_ms']:>7.1f}x {orm['peak_kib'] / dto['peak_kib']:>8.1f}x"
+            )
+
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Benchmark: montagem dos detalhes de veículos com JOINs + json_agg(DISTINCT)
+versus agregações LATERAL por relação
+
+Cria um schema temporário (bench_vehicle_details) com veículos que têm muitas
+placas, cores, combustíveis e vínculos, roda as duas formas da consulta e
+compara tempo médio e quantidade de linhas intermediárias (EXPLAIN ANALYZE).
+O schema é removido no final; nenhum dado real é tocado.
+
+Uso:
+    python scripts/benchmark_vehicle_details.py
+    python scripts/benchmark_vehicle_details.py --vehicles 2000 --plates 6 --colors 6 --fuels 3 --links 8
+"""
+import os
+import sys
+import time
+import argparse
+
+import psycopg2
+
+# Adicionar o diretório raiz ao path para importar app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+
+SCHEMA = "bench_vehicle_details"
+
+SCHEMA_SQL = """
+CREATE SCHEMA {schema};
+SET search_path TO {schema};
+
+CREATE TABLE brands (id UUID PRIMARY KEY DEFAULT gen_random_uuid(), brand TEXT);
+CREATE TABLE models (id UUID PRIMARY KEY DEFAULT gen_random_uuid(), model TEXT);
+CREATE TABLE model_versions (id UUID PRIMARY KEY DEFAULT gen_random_uuid(), version TEXT);
+CREATE TABLE vehicle_categories (id UUID PRIMARY KEY DEFAULT gen_random_uuid(), category TEXT);
+CREATE TABLE fuels (id UUID PRIMARY KEY DEFAULT gen_random_uuid(), name TEXT, type TEXT);
+
+CREATE TABLE vehicles (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  brand_id UUID, model_id UUID, version_id UUID, category_id UUID,
+  chassis TEXT, year_model INTEGER,
+  active BOOLEAN DEFAULT true,
+  created_at TIMESTAMPTZ DEFAULT NOW()
+);
+CREATE TABLE plates (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  vehicle_id UUID, plate TEXT, state TEXT,
+  active BOOLEAN DEFAULT true, created_at TIMESTAMPTZ DEFAULT NOW()
+);
+CREATE TABLE colors (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  vehicle_id UUID, color TEXT,
+  active BOOLEAN DEFAULT true, created_at TIMESTAMPTZ DEFAULT NOW()
+);
+CREATE TABLE vehicle_fuels (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  vehicle_id UUID, fuel_id UUID,
+  active BOOLEAN DEFAULT true, created_at TIMESTAMPTZ DEFAULT NOW()
+);
+CREATE TABLE vehicle_entity_links (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  vehicle_id UUID, relationship_type TEXT, status TEXT,
+  start_date DATE, end_date DATE,
+  active BOOLEAN DEFAULT true
+);
+"""
+
+SEED_SQL = """
+INSERT INTO brands (brand) SELECT 'Marca ' || g FROM generate_series(1, 20) g;
+INSERT INTO models (model) SELECT 'Modelo ' || g FROM generate_series(1, 50) g;
+INSERT INTO model_versions (version) SELECT 'Versao ' || g FROM generate_series(1, 100) g;
+INSERT INTO vehicle_categories (category) SELECT 'Categoria ' || g FROM generate_series(1, 5) g;
+INSERT INTO fuels (name, type) SELECT 'Combustivel ' || g, 'liquid' FROM generate_series(1, 6) g;
+
+-- Catálogo sorteado por veículo (um subselect não correlacionado rodaria
+-- uma vez só e daria a mesma marca/modelo/versão a todos)
+INSERT INTO vehicles (brand_id, model_id, version_id, category_id, chassis, year_model, created_at)
+SELECT
+  b.ids[1 + floor(random() * array_length(b.ids, 1))::int],
+  m.ids[1 + floor(random() * array_length(m.ids, 1))::int],
+  mv.ids[1 + floor(random() * array_length(mv.ids, 1))::int],
+  vc.ids[1 + floor(random() * array_length(vc.ids, 1))::int],
+  md5(g::text), 2000 + g %% 25, NOW() - g * interval '1 minute'
+FROM generate_series(1, %(vehicles)s) g,
+  (SELECT array_agg(id) AS ids FROM brands) b,
+  (SELECT array_agg(id) AS ids FROM models) m,
+  (SELECT array_agg(id) AS ids FROM model_versions) mv,
+  (SELECT array_agg(id) AS ids FROM vehicle_categories) vc;
+
+INSERT INTO plates (vehicle_id, plate, state)
+SELECT v.id, upper(substr(md5(v.id::text || g), 1, 7)), 'SP'
+FROM vehicles v, generate_series(1, %(plates)s) g;
+
+INSERT INTO colors (vehicle_id, color)
+SELECT v.id, 'Cor ' || g
+FROM vehicles v, generate_series(1, %(colors)s) g;
+
+INSERT INTO vehicle_fuels (vehicle_id, fuel_id)
+SELECT v.id, f.id
+FROM vehicles v
+CROSS JOIN LATERAL (SELECT id FROM fuels ORDER BY id LIMIT %(fuels)s) f;
+
+INSERT INTO vehicle_entity_links (vehicle_id, relationship_type, status, start_date)
+SELECT v.id, 'driver', 'active', CURRENT_DATE - g
+FROM vehicles v, generate_series(1, %(links)s) g;
+
+CREATE INDEX ON plates(vehicle_id);
+CREATE INDEX ON colors(vehicle_id);
+CREATE INDEX ON vehicle_fuels(vehicle_id);
+CREATE INDEX ON vehicle_entity_links(vehicle_id);
+ANALYZE;
+"""
+
+# Forma antiga: todas as relações 1:N no mesmo JOIN + json_agg(DISTINCT)
+FANOUT_QUERY = """
+SELECT
+  v.*,
+  json_build_object('id', b.id, 'brand', b.brand) as brands,
+  json_build_object('id', m.id, 'model', m.model) as models,
+  json_build_object('id', mv.id, 'version', mv.version) as model_versions,
+  json_build_object('id', vc.id, 'category', vc.category) as vehicle_categories,
+  COALESCE(json_agg(DISTINCT jsonb_build_object(
+    'id', p.id, 'plate', p.plate, 'state', p.state, 'active', p.active
+  )) FILTER (WHERE p.id IS NOT NULL), '[]'::json) as plates,
+  COALESCE(json_agg(DISTINCT jsonb_build_object(
+    'id', c.id, 'color', c.color, 'active', c.active
+  )) FILTER (WHERE c.id IS NOT NULL), '[]'::json) as colors,
+  COALESCE(json_agg(DISTINCT jsonb_build_object(
+    'id', vf.id, 'active', vf.active,
+    'fuels', jsonb_build_object('id', f.id, 'name', f.name, 'type', f.type)
+  )) FILTER (WHERE vf.id IS NOT NULL), '[]'::json) as vehicle_fuels,
+  COALESCE(json_agg(DISTINCT jsonb_build_object(
+    'id', vel.id, 'relationship_type', vel.relationship_type, 'status', vel.status,
+    'start_date', vel.start_date, 'end_date', vel.end_date, 'active', vel.active
+  )) FILTER (WHERE vel.id IS NOT NULL), '[]'::json) as vehicle_entity_links
+FROM vehicles v
+LEFT JOIN brands b ON v.brand_id = b.id
+LEFT JOIN models m ON v.model_id = m.id
+LEFT JOIN model_versions mv ON v.version_id = mv.id
+LEFT JOIN vehicle_categories vc ON v.category_id = vc.id
+LEFT JOIN plates p ON v.id = p.vehicle_id AND p.active = true
+LEFT JOIN colors c ON v.id = c.vehicle_id AND c.active = true
+LEFT JOIN vehicle_fuels vf ON v.id = vf.vehicle_id AND vf.active = true
+LEFT JOIN fuels f ON vf.fuel_id = f.id
+LEFT JOIN vehicle_entity_links vel ON v.id = vel.vehicle_id AND vel.active = true
+WHERE v.active = true
+GROUP BY v.id, b.id, m.id, mv.id, vc.id
+ORDER BY v.created_at DESC
+"""
+
+# Forma nova: uma agregação LATERAL por relação (igual a build_vehicle_details)
+LATERAL_QUERY = """
+SELECT
+  to_jsonb(v) || jsonb_build_object(
+    'brands', jsonb_build_object('id', b.id, 'brand', b.brand),
+    'models', jsonb_build_object('id', m.id, 'model', m.model),
+    'model_versions', jsonb_build_object('id', mv.id, 'version', mv.version),
+    'vehicle_categories', jsonb_build_object('id', vc.id, 'category', vc.category),
+    'plates', pl.items,
+    'colors', co.items,
+    'vehicle_fuels', fu.items,
+    'vehicle_entity_links', li.items
+  )
+FROM vehicles v
+LEFT JOIN brands b ON v.brand_id = b.id
+LEFT JOIN models m ON v.model_id = m.id
+LEFT JOIN model_versions mv ON v.version_id = mv.id
+LEFT JOIN vehicle_categories vc ON v.category_id = vc.id
+CROSS JOIN LATERAL (
+  SELECT COALESCE(jsonb_agg(jsonb_build_object(
+    'id', p.id, 'plate', p.plate, 'state', p.state, 'active', p.active
+  ) ORDER BY p.created_at, p.id), '[]'::jsonb) AS items
+  FROM plates p WHERE p.vehicle_id = v.id AND p.active = true
+) pl
+CROSS JOIN LATERAL (
+  SELECT COALESCE(jsonb_agg(jsonb_build_object(
+    'id', c.id, 'color', c.color, 'active', c.active
+  ) ORDER BY c.created_at, c.id), '[]'::jsonb) AS items
+  FROM colors c WHERE c.vehicle_id = v.id AND c.active = true
+) co
+CROSS JOIN LATERAL (
+  SELECT COALESCE(jsonb_agg(jsonb_build_object(
+    'id', vf.id, 'active', vf.active,
+    'fuels', jsonb_build_object('id', f.id, 'name', f.name, 'type', f.type)
+  ) ORDER BY vf.created_at, vf.id), '[]'::jsonb) AS items
+  FROM vehicle_fuels vf LEFT JOIN fuels f ON vf.fuel_id = f.id
+  WHERE vf.vehicle_id = v.id AND vf.active = true
+) fu
+CROSS JOIN LATERAL (
+  SELECT COALESCE(jsonb_agg(jsonb_build_object(
+    'id', vel.id, 'relationship_type', vel.relationship_type, 'status', vel.status,
+    'start_date', vel.start_date, 'end_date', vel.end_date, 'active', vel.active
+  ) ORDER BY vel.start_date, vel.id), '[]'::jsonb) AS items
+  FROM vehicle_entity_links vel WHERE vel.vehicle_id = v.id AND vel.active = true
+) li
+WHERE v.active = true
+ORDER BY v.created_at DESC
+"""
+
+
+def time_query(cur, query: str, repeat: int) -> float:
+    """Executa a consulta `repeat` vezes e retorna o tempo médio em ms"""
+    cur.execute(query)
+    cur.fetchall()  # aquecimento
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        cur.execute(query)
+        cur.fetchall()
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def max_intermediate_rows(cur, query: str) -> int:
+    """Maior quantidade de linhas que um nó do plano produziu (EXPLAIN ANALYZE)"""
+    cur.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {query}")
+    plan = cur.fetchone()[0][0]["Plan"]
+
+    def walk(node):
+        rows = node.get("Actual Rows", 0) * node.get("Actual Loops", 1)
+        return max([rows] + [walk(child) for child in node.get("Plans", [])])
+
+    return walk(plan)
+
+
+def run_benchmark(args):
+    conn = psycopg2.connect(settings.DATABASE_URL)
+    conn.autocommit = True
+    cur = conn.cursor()
+
+    try:
+        cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cur.execute(SCHEMA_SQL.format(schema=SCHEMA))
+        print(f"[OK] Schema {SCHEMA} criado")
+
+        cur.execute(SEED_SQL, vars(args))
+        print(
+            f"[OK] {args.vehicles} veiculos com {args.plates} placas, {args.colors} cores, "
+            f"{args.fuels} combustiveis e {args.links} vinculos cada"
+        )
+
+        results = {}
+        for name, query in (("json_agg(DISTINCT)", FANOUT_QUERY), ("LATERAL", LATERAL_QUERY)):
+            results[name] = (time_query(cur, query, args.repeat), max_intermediate_rows(cur, query))
+
+        print("\n" + "=" * 60)
+        print(f"{'Consulta':<22}{'Tempo medio (ms)':>18}{'Linhas intermed.':>20}")
+        for name, (ms, rows) in results.items():
+            print(f"{name:<22}{ms:>18.1f}{rows:>20,}")
+
+        old_ms = results["json_agg(DISTINCT)"][0]
+        new_ms = results["LATERAL"][0]
+        if new_ms > 0:
+            print(f"\nGanho: {old_ms / new_ms:.1f}x")
+        print("=" * 60)
+
+    finally:
+        if not args.keep:
+            cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cur.close()
+        conn.close()
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Benchmark: json_agg(DISTINCT) x LATERAL")
+    parser.add_argument("--vehicles", type=int, default=1000)
+    parser.add_argument("--plates", type=int, default=5)
+    parser.add_argument("--colors", type=int, default=5)
+    parser.add_argument("--fuels", type=int, default=3)
+    parser.add_argument("--links", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=5, help="Execucoes por consulta")
+    parser.add_argument("--keep", action="store_true", help="Nao remover o schema de benchmark")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BENCHMARK: DETALHES DE VEICULOS")
+    print("=" * 60)
+
+    run_benchmark(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""
+Importador em massa dos exports do Supabase para PostgreSQL usando COPY
+
+Diferente de import_all_supabase_data.py (json.load + um INSERT por linha), este script:
+- Lê os arquivos JSON de forma incremental (sem carregar o arquivo inteiro em memória),
+  tanto o dump completo <tabela>.json quanto os blocos <tabela>/*.ndjson.gz gerados
+  pela exportação incremental (export_supabase_data.py)
+- Converte as linhas em lotes e carrega com COPY em tabelas de staging temporárias
+- Faz o upsert com um único INSERT ... SELECT ... ON CONFLICT por lote (set-based)
+- Processa as tabelas em níveis de dependência (FKs), com workers paralelos por nível
+- Reporta linhas por segundo de cada tabela e do total
+
+Uso:
+    python scripts/bulk_import_supabase.py
+    python scripts/bulk_import_supabase.py --workers 4 --batch-size 20000
+    python scripts/bulk_import_supabase.py --tables brands models
+"""
+import os
+import io
+import re
+import sys
+import glob
+import gzip
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import psycopg2
+
+# Adicionar o diretório raiz ao path para importar app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+
+# Diretório com os arquivos JSON exportados
+EXPORT_DIR = "supabase_exports"
+
+# Quantas linhas acumular em staging antes de rodar o upsert
+DEFAULT_BATCH_SIZE = 10000
+DEFAULT_WORKERS = 4
+
+# Tabelas agrupadas em níveis de dependência (respeitando FKs).
+# Tabelas do mesmo nível não dependem entre si e podem ser importadas em paralelo.
+TABLE_LEVELS = [
+    # 1. Tabelas base (sem FK)
+    {
+        "countries": ["id", "name", "iso_code", "iso3_code", "active", "created_at", "updated_at"],
+        "brands": ["id", "brand", "verified", "active", "created_at", "updated_at"],
+        "fuels": ["id", "name", "type", "description", "active", "created_at", "updated_at"],
+        "vehicle_categories": ["id", "category", "description", "active", "created_at", "updated_at"],
+        "entities": ["id", "entity_type", "name", "email", "phone", "document_number", "ai_model", "ai_capabilities", "device_serial", "device_type", "legal_id", "organization_type", "metadata", "active", "created_at", "updated_at"],
+    },
+    # 2. Tabelas com FK de primeiro nível
+    {
+        "models": ["id", "brand_id", "model", "verified", "active", "created_at", "updated_at"],
+        "plate_types": ["id", "country_id", "name", "description", "format_pattern", "valid_from", "valid_until", "active", "created_at", "updated_at"],
+    },
+    # 3. Tabelas com FK de segundo nível
+    {
+        "model_versions": ["id", "model_id", "version", "active", "created_at", "updated_at"],
+    },
+    # 4. Veículos
+    {
+        "vehicles": ["id", "brand_id", "model_id", "version_id", "category_id", "chassis", "model_year", "manufacture_year", "active", "created_at", "updated_at"],
+    },
+    # 5. Dados relacionados a veículos
+    {
+        "vehicle_registrations": ["id", "vehicle_id", "country_id", "registration_number", "registration_type", "start_date", "end_date", "active", "created_at", "updated_at"],
+        "plates": ["id", "vehicle_id", "plate_type_id", "plate", "state", "licensing_country_id", "start_date", "end_date", "active", "created_at", "updated_at"],
+        "colors": ["id", "vehicle_id", "color", "start_date", "end_date", "active", "created_at", "updated_at"],
+        "vehicle_fuels": ["id", "vehicle_id", "fuel_id", "start_date", "end_date", "active", "notes", "created_at", "updated_at"],
+        "conversations": ["id", "vehicle_id", "entity_id", "title", "status", "last_message_at", "last_message_preview", "unread_count", "metadata", "active", "created_at", "updated_at"],
+        "moments": ["id", "vehicle_id", "entity_id", "caption", "type", "location", "tags", "active", "created_at", "updated_at"],
+    },
+    # 6. Mensagens (dependem de conversations)
+    {
+        "messages": ["id", "conversation_id", "sender_id", "message_type", "content", "media_urls", "metadata", "status", "sent_at", "delivered_at", "read_at", "reply_to_message_id", "reactions", "edited", "edited_at", "deleted", "deleted_at", "created_at"],
+    },
+]
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+# =============================================================================
+# LEITURA INCREMENTAL DE JSON
+# =============================================================================
+
+def iter_json_array(filepath: str, chunk_size: int = 64 * 1024):
+    """
+    Itera os objetos de um arquivo JSON no formato [ {...}, {...} ] sem carregar
+    o arquivo inteiro em memória.
+
+    Lê o arquivo em blocos de chunk_size e decodifica um objeto por vez com
+    JSONDecoder.raw_decode, mantendo em memória apenas o bloco atual.
+    """
+    decoder = json.JSONDecoder()
+
+    with open(filepath, "r", encoding="utf-8") as f:
+        buffer = f.read(chunk_size)
+        eof = not buffer
+        pos = _WHITESPACE.match(buffer, 0).end()
+
+        if pos >= len(buffer):
+            return
+        if buffer[pos] != "[":
+            raise ValueError(f"{filepath}: esperado um array JSON")
+        pos += 1
+
+        while True:
+            pos = _WHITESPACE.match(buffer, pos).end()
+
+            # Descartar a parte já consumida e ler mais dados se necessário
+            if len(buffer) - pos < chunk_size and not eof:
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = _WHITESPACE.match(buffer, 0).end()
+
+            if pos >= len(buffer):
+                if eof:
+                    raise ValueError(f"{filepath}: array JSON truncado")
+                continue
+
+            char = buffer[pos]
+            if char == "]":
+                return
+            if char == ",":
+                pos += 1
+                continue
+
+            try:
+                obj, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Objeto maior que o bloco atual: ler mais e tentar de novo
+                if eof:
+                    raise
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+
+            yield obj
+
+
+def iter_ndjson_gz(filepath: str):
+    """Itera os objetos de um bloco NDJSON comprimido com gzip (um objeto por linha)"""
+    with gzip.open(filepath, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def iter_table_records(table_name: str):
+    """
+    Itera todos os registros exportados de uma tabela, em ordem de exportação:
+    primeiro o dump completo (se existir), depois os blocos incrementais.
+    """
+    filepath = os.path.join(EXPORT_DIR, f"{table_name}.json")
+    if os.path.exists(filepath):
+        yield from iter_json_array(filepath)
+
+    for chunk_path in sorted(glob.glob(os.path.join(EXPORT_DIR, table_name, "*.ndjson.gz"))):
+        yield from iter_ndjson_gz(chunk_path)
+
+
+def has_export(table_name: str) -> bool:
+    """Verifica se existe dump completo ou blocos incrementais para a tabela"""
+    return (
+        os.path.exists(os.path.join(EXPORT_DIR, f"{table_name}.json"))
+        or bool(glob.glob(os.path.join(EXPORT_DIR, table_name, "*.ndjson.gz")))
+    )
+
+
+def iter_batches(records, batch_size: int):
+    """Agrupa um iterador de registros em listas de até batch_size itens"""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# =============================================================================
+# COPY
+# =============================================================================
+
+def encode_copy_value(value) -> str:
+    """Converte um valor Python para o formato texto do COPY do PostgreSQL"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False)
+    else:
+        value = str(value)
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_rows(cur, table_name: str, columns, rows) -> int:
+    """
+    Carrega linhas (sequências de valores na ordem de columns) com COPY FROM STDIN
+
+    Returns:
+        Quantidade de linhas enviadas
+    """
+    buffer = io.StringIO()
+    count = 0
+    for row in rows:
+        buffer.write("\t".join(encode_copy_value(value) for value in row))
+        buffer.write("\n")
+        count += 1
+
+    if count:
+        buffer.seek(0)
+        cur.copy_expert(
+            f"COPY {table_name} ({','.join(columns)}) FROM STDIN WITH (FORMAT text)",
+            buffer,
+        )
+    return count
+
+
+def upsert_from_staging(cur, table_name: str, staging_name: str, columns) -> int:
+    """
+    Move as linhas da staging para a tabela final com um único INSERT ... SELECT
+
+    DISTINCT ON (id) evita o erro "ON CONFLICT DO UPDATE command cannot affect
+    row a second time" quando o export tem o mesmo id repetido. A coluna _seq
+    da staging preserva a ordem de carga, então a versão exportada por último vence.
+    """
+    column_list = ",".join(columns)
+    updates = ",".join(f"{col} = EXCLUDED.{col}" for col in columns if col != "id")
+    on_conflict = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+
+    cur.execute(f"""
+        INSERT INTO {table_name} ({column_list})
+        SELECT DISTINCT ON (id) {column_list}
+        FROM {staging_name}
+        ORDER BY id, _seq DESC
+        ON CONFLICT (id) {on_conflict}
+    """)
+    inserted = cur.rowcount
+    cur.execute(f"TRUNCATE {staging_name}")
+    return inserted
+
+
+# =============================================================================
+# IMPORTAÇÃO
+# =============================================================================
+
+def import_table(table_name: str, columns, batch_size: int) -> dict:
+    """
+    Importa uma tabela: stream do JSON -> COPY na staging -> upsert set-based
+
+    Cada tabela usa sua própria conexão, para permitir workers paralelos.
+    """
+    if not has_export(table_name):
+        print(f"[SKIP] {table_name}: nenhum export encontrado")
+        return {"table": table_name, "rows": 0, "seconds": 0.0}
+
+    started = time.perf_counter()
+    records = iter_table_records(table_name)
+
+    # Usar apenas as colunas configuradas que existem no export
+    first = next(records, None)
+    if first is None:
+        print(f"[SKIP] {table_name}: sem dados")
+        return {"table": table_name, "rows": 0, "seconds": 0.0}
+    available_cols = [col for col in columns if col in first]
+
+    def all_records():
+        yield first
+        yield from records
+
+    staging_name = f"stg_{table_name}"
+    conn = psycopg2.connect(settings.DATABASE_URL)
+    total = 0
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"""
+                CREATE TEMP TABLE {staging_name}
+                (LIKE {table_name} INCLUDING DEFAULTS)
+                ON COMMIT DROP
+            """)
+            cur.execute(f"ALTER TABLE {staging_name} ADD COLUMN _seq bigserial")
+
+            for batch in iter_batches(all_records(), batch_size):
+                copy_rows(
+                    cur,
+                    staging_name,
+                    available_cols,
+                    ([item.get(col) for col in available_cols] for item in batch),
+                )
+                upsert_from_staging(cur, table_name, staging_name, available_cols)
+                total += len(batch)
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    seconds = time.perf_counter() - started
+    rate = total / seconds if seconds > 0 else 0
+    print(f"[OK] {table_name}: {total} registros em {seconds:.2f}s ({rate:,.0f} linhas/s)")
+    return {"table": table_name, "rows": total, "seconds": seconds}
+
+
+def run_import(workers: int, batch_size: int, only_tables=None) -> int:
+    """Importa todos os níveis em ordem, com tabelas do mesmo nível em paralelo"""
+    total_rows = 0
+    started = time.perf_counter()
+
+    for level_number, level in enumerate(TABLE_LEVELS, start=1):
+        tables = {
+            name: cols for name, cols in level.items()
+            if not only_tables or name in only_tables
+        }
+        if not tables:
+            continue
+
+        print(f"\n--- Nivel {level_number}: {', '.join(tables)} ---")
+
+        with ThreadPoolExecutor(max_workers=min(workers, len(tables))) as executor:
+            futures = {
+                executor.submit(import_table, name, cols, batch_size): name
+                for name, cols in tables.items()
+            }
+            # Um nível só termina quando todas as suas tabelas terminarem,
+            # pois o próximo nível depende delas
+            for future in as_completed(futures):
+                total_rows += future.result()["rows"]
+
+    seconds = time.perf_counter() - started
+    rate = total_rows / seconds if seconds > 0 else 0
+    print("\n" + "=" * 60)
+    print("IMPORTACAO CONCLUIDA")
+    print(f"Total de registros: {total_rows}")
+    print(f"Tempo total: {seconds:.2f}s ({rate:,.0f} linhas/s)")
+    print("=" * 60)
+    return total_rows
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Importa os exports do Supabase usando COPY")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Tabelas importadas em paralelo por nivel")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Linhas por lote de COPY/upsert")
+    parser.add_argument("--tables", nargs="*", help="Importar apenas estas tabelas")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("IMPORTACAO EM MASSA (COPY) DE DADOS DO SUPABASE")
+    print("=" * 60)
+
+    run_import(args.workers, args.batch_size, set(args.tables) if args.tables else None)
+
+
+if __name__ == "__main__":
+    main()
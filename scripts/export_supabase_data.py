@@ -1,8 +1,29 @@
 """
-Script para exportar dados do Supabase para arquivos JSON
+Script para exportar dados do Supabase de forma incremental
+
+Cada tabela é exportada a partir de uma marca d'água (watermark) em updated_at,
+guardada em um arquivo de estado. Apenas as linhas alteradas desde a última
+execução são baixadas. Linhas com updated_at NULL não têm como entrar na
+watermark: vão num passo separado (ordenado por id), inteiras a cada execução.
+
+Tabelas sem updated_at (SNAPSHOT_TABLES) não têm watermark confiável (uma em
+created_at perderia as edições) e são exportadas inteiras a cada execução.
+
+Saída: blocos NDJSON comprimidos com gzip em supabase_exports/<tabela>/
+O estado é salvo após cada bloco gravado, então uma execução interrompida
+continua de onde parou na próxima vez (os snapshots recomeçam do início).
+
+Uso:
+    python scripts/export_supabase_data.py
+    python scripts/export_supabase_data.py --tables vehicles plates
+    python scripts/export_supabase_data.py --full   # ignora watermarks e exporta tudo
+
+NOTA: exclusões físicas no Supabase não são capturadas pelas watermarks.
 """
 import os
+import gzip
 import json
+import argparse
 from supabase import create_client, Client
 from datetime import datetime
 
@@ -17,24 +38,196 @@ supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 EXPORT_DIR = "supabase_exports"
 os.makedirs(EXPORT_DIR, exist_ok=True)
 
+# Arquivo com as watermarks de cada tabela
+STATE_FILE = os.path.join(EXPORT_DIR, "export_state.json")
+
+# Linhas por bloco NDJSON (e por página da API)
+CHUNK_SIZE = 1000
+
+# Coluna usada como watermark
+WATERMARK_COLUMN = "updated_at"
+
+# Tabelas editáveis sem updated_at: exportadas inteiras (snapshot) a cada execução
+SNAPSHOT_TABLES = {"messages", "conversation_contexts"}
+
+
+def load_state() -> dict:
+    """Carrega o arquivo de estado com as watermarks"""
+    if not os.path.exists(STATE_FILE):
+        return {}
+    with open(STATE_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(state: dict):
+    """Salva o estado de forma atômica (grava em .tmp e renomeia)"""
+    tmp_path = f"{STATE_FILE}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, STATE_FILE)
+
+
+def fetch_page(table_name: str, column: str, watermark, last_id):
+    """
+    Busca a próxima página ordenada por (watermark, id)
+
+    A paginação é por keyset: (coluna > watermark) OU (coluna = watermark E id > last_id),
+    o que é estável mesmo com várias linhas com o mesmo timestamp. Só linhas
+    com a coluna preenchida (as NULL ficam para fetch_page_by_id).
+    """
+    query = supabase.table(table_name).select("*").filter(column, "not.is", "null")
+
+    if watermark is not None:
+        if last_id is not None:
+            query = query.or_(
+                f'{column}.gt."{watermark}",'
+                f'and({column}.eq."{watermark}",id.gt.{last_id})'
+            )
+        else:
+            query = query.gt(column, watermark)
+
+    response = (
+        query.order(column)
+        .order("id")
+        .limit(CHUNK_SIZE)
+        .execute()
+    )
+    return response.data
+
+
+def fetch_page_by_id(table_name: str, last_id, null_column: str = None):
+    """
+    Busca a próxima página ordenada só por id (snapshots e linhas sem watermark)
+
+    Com null_column, só as linhas em que essa coluna é NULL.
+    """
+    query = supabase.table(table_name).select("*")
+    if null_column:
+        query = query.is_(null_column, "null")
+    if last_id is not None:
+        query = query.gt("id", last_id)
+
+    response = query.order("id").limit(CHUNK_SIZE).execute()
+    return response.data
+
+
+def write_chunk(table_name: str, run_id: str, chunk_number: int, rows) -> str:
+    """Grava um bloco NDJSON comprimido (grava em .tmp e renomeia)"""
+    table_dir = os.path.join(EXPORT_DIR, table_name)
+    os.makedirs(table_dir, exist_ok=True)
 
-def export_table(table_name: str):
-    """Exporta uma tabela do Supabase para JSON"""
+    filename = os.path.join(table_dir, f"{run_id}-{chunk_number:05d}.ndjson.gz")
+    tmp_path = f"{filename}.tmp"
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False, default=str))
+            f.write("\n")
+    os.replace(tmp_path, filename)
+    return filename
+
+
+def export_by_id(table_name: str, run_id: str, chunk_number: int, null_column: str = None,
+                 on_chunk=None):
+    """
+    Exporta as linhas da tabela (ou só as de null_column NULL) em ordem de id
+
+    on_chunk(chunk_number) é chamado após cada bloco gravado.
+    Retorna (linhas exportadas, número do último bloco).
+    """
+    last_id = None
+    exported = 0
+    while True:
+        rows = fetch_page_by_id(table_name, last_id, null_column)
+        if not rows:
+            break
+
+        chunk_number += 1
+        write_chunk(table_name, run_id, chunk_number, rows)
+        exported += len(rows)
+        last_id = rows[-1]["id"]
+        if on_chunk:
+            on_chunk(chunk_number)
+
+        if len(rows) < CHUNK_SIZE:
+            break
+    return exported, chunk_number
+
+
+def export_table(table_name: str, state: dict, run_id: str, full: bool = False):
+    """Exporta as linhas novas/alteradas de uma tabela desde a última watermark"""
     print(f"\nExportando tabela: {table_name}")
 
+    if table_name in SNAPSHOT_TABLES:
+        return export_snapshot(table_name, state, run_id)
+
+    column = WATERMARK_COLUMN
+    table_state = {} if full else state.get(table_name, {})
+    if table_state.get("column") not in (None, column):
+        table_state = {}
+
+    watermark = table_state.get("watermark")
+    last_id = table_state.get("last_id")
+    chunk_number = table_state.get("chunks", 0)
+    exported = 0
+
     try:
-        # Buscar todos os registros da tabela
-        response = supabase.table(table_name).select("*").execute()
-        data = response.data
+        while True:
+            rows = fetch_page(table_name, column, watermark, last_id)
+            if not rows:
+                break
+
+            chunk_number += 1
+            write_chunk(table_name, run_id, chunk_number, rows)
+            exported += len(rows)
 
-        # Salvar em arquivo JSON
-        filename = f"{EXPORT_DIR}/{table_name}.json"
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+            # Avançar a watermark só depois que o bloco está gravado em disco
+            watermark = rows[-1][column]
+            last_id = rows[-1]["id"]
+            state[table_name] = {
+                "column": column,
+                "watermark": watermark,
+                "last_id": last_id,
+                "chunks": chunk_number,
+                "last_run_at": datetime.utcnow().isoformat(),
+            }
+            save_state(state)
 
-        print(f"[OK] {table_name}: {len(data)} registros exportados")
-        return len(data)
+            if len(rows) < CHUNK_SIZE:
+                break
+
+        # Linhas sem watermark: não há como saber se mudaram, vão todas
+        null_rows, chunk_number = export_by_id(table_name, run_id, chunk_number, null_column=column)
+        if null_rows:
+            exported += null_rows
+            state.setdefault(table_name, {"column": column, "watermark": watermark, "last_id": last_id})
+            state[table_name].update({"chunks": chunk_number, "last_run_at": datetime.utcnow().isoformat()})
+            save_state(state)
+
+        print(f"[OK] {table_name}: {exported} registros exportados "
+              f"(watermark: {watermark}, {null_rows} sem {column})")
+        return exported
 
+    except Exception as e:
+        print(f"[SKIP] {table_name}: {str(e)[:100]}")
+        return exported
+
+
+def export_snapshot(table_name: str, state: dict, run_id: str):
+    """Exporta a tabela inteira (SNAPSHOT_TABLES)"""
+    chunk_number = state.get(table_name, {}).get("chunks", 0)
+
+    def on_chunk(number):
+        state[table_name] = {
+            "mode": "snapshot",
+            "chunks": number,
+            "last_run_at": datetime.utcnow().isoformat(),
+        }
+        save_state(state)
+
+    try:
+        exported, _ = export_by_id(table_name, run_id, chunk_number, on_chunk=on_chunk)
+        print(f"[OK] {table_name}: {exported} registros exportados (snapshot completo)")
+        return exported
     except Exception as e:
         print(f"[SKIP] {table_name}: {str(e)[:100]}")
         return 0
@@ -42,8 +235,13 @@ def export_table(table_name: str):
 
 def main():
     """Função principal"""
+    parser = argparse.ArgumentParser(description="Exportação incremental do Supabase")
+    parser.add_argument("--tables", nargs="*", help="Exportar apenas estas tabelas")
+    parser.add_argument("--full", action="store_true", help="Ignorar watermarks e exportar tudo")
+    args = parser.parse_args()
+
     print("=" * 60)
-    print("EXPORTACAO DE DADOS DO SUPABASE")
+    print("EXPORTACAO INCREMENTAL DE DADOS DO SUPABASE")
     print("=" * 60)
 
     # Lista de tabelas para exportar (na ordem correta devido às FKs)
@@ -88,21 +286,27 @@ def main():
         # Momentos (se existir)
         "moments",
     ]
+    if args.tables:
+        tables = [table for table in tables if table in args.tables]
+
+    state = load_state()
+    run_id = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
 
     total_records = 0
     successful_tables = 0
 
     for table in tables:
-        count = export_table(table)
+        count = export_table(table, state, run_id, full=args.full)
         if count > 0:
             successful_tables += 1
             total_records += count
 
     print("\n" + "=" * 60)
     print(f"EXPORTACAO CONCLUIDA")
-    print(f"Tabelas exportadas: {successful_tables}")
+    print(f"Tabelas com alteracoes: {successful_tables}")
     print(f"Total de registros: {total_records}")
-    print(f"Arquivos salvos em: {EXPORT_DIR}/")
+    print(f"Arquivos salvos em: {EXPORT_DIR}/<tabela>/")
+    print(f"Estado salvo em: {STATE_FILE}")
     print("=" * 60)
 
 
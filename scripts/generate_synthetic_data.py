@@ -0,0 +1,619 @@
+"""
+Gerador de dados sintéticos em escala de produção (carga via COPY)
+
+populate_simple.py / populate_entities.py e os exports do Supabase só geram
+algumas dezenas de linhas: os planos de execução locais não se parecem com
+os de produção. Este script gera volumes realistas, de forma determinística
+(mesma --seed => mesmos ids, textos e datas), e carrega tudo com COPY:
+
+- entidades com nomes e contatos (email/telefone únicos, para o índice de lookup)
+- veículos com histórico de placas e cores
+- vínculos (um proprietário por veículo + vínculos extras em vários status)
+- conversas com participantes e históricos longos de mensagens (cauda longa)
+- vehicle_events espalhados por --years anos (cria as partições trimestrais
+  que faltarem com create_vehicle_events_partition)
+
+Os ids são uuid5(seed, "<tabela>:<índice>"): nenhum id precisa ficar em
+memória para montar as FKs das tabelas filhas. Todas as linhas geradas são
+marcadas (entity_code/vin/link_code/conversation_code começando com SYN-)
+e podem ser removidas com --cleanup.
+
+Os triggers de eventos automáticos de plates e links (trg_plate_event,
+trg_link_event) ficam desligados durante a carga: os vehicle_events são
+gerados aqui mesmo. Os outros triggers (ex.: os da projeção
+vehicle_details_projection) continuam ligados.
+
+Pré-requisitos: migrations aplicadas; plate_types e link_types populados
+(populate_plate_types_br.py) para placas e vínculos terem tipo.
+
+Uso:
+    python scripts/generate_synthetic_data.py --vehicles 100000
+    python scripts/generate_synthetic_data.py --vehicles 2000000 --messages 300 --years 4 --seed 7
+    python scripts/generate_synthetic_data.py --cleanup
+"""
+import os
+import sys
+import time
+import uuid
+import random
+import argparse
+from datetime import datetime, timedelta
+
+import psycopg2
+
+# Adicionar o diretório raiz ao path para importar app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from bulk_import_supabase import copy_rows
+
+TAG = "SYN"
+
+FIRST_NAMES = [
+    "Ana", "Bruno", "Carla", "Diego", "Eduarda", "Felipe", "Gabriela", "Henrique",
+    "Isabela", "João", "Karina", "Lucas", "Mariana", "Nicolas", "Olívia", "Pedro",
+    "Rafaela", "Samuel", "Tatiane", "Vinícius",
+]
+LAST_NAMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves",
+    "Pereira", "Lima", "Gomes", "Costa", "Ribeiro", "Martins", "Carvalho",
+]
+COLORS = [
+    ("Branco", "#FFFFFF"), ("Preto", "#000000"), ("Prata", "#C0C0C0"),
+    ("Cinza", "#808080"), ("Vermelho", "#B22222"), ("Azul", "#1E3A8A"),
+    ("Verde", "#14532D"), ("Bege", "#D6C6A5"),
+]
+STATES = [
+    ("SP", "São Paulo"), ("RJ", "Rio de Janeiro"), ("MG", "Belo Horizonte"),
+    ("PR", "Curitiba"), ("RS", "Porto Alegre"), ("BA", "Salvador"), ("PE", "Recife"),
+]
+EXTRA_LINK_STATUSES = ["active", "active", "terminated", "terminated", "pending_request", "revoked", "pending_validation"]
+EVENT_TYPES = [
+    ("maintenance", "oil_change", "info", "Troca de óleo"),
+    ("maintenance", "tire_rotation", "info", "Rodízio de pneus"),
+    ("refuel", "refuel", "info", "Abastecimento"),
+    ("mileage", "mileage_update", "info", "Quilometragem atualizada"),
+    ("incident", "fine", "warning", "Multa registrada"),
+    ("incident", "accident", "critical", "Sinistro registrado"),
+    ("document", "licensing", "info", "Licenciamento"),
+]
+MESSAGE_SNIPPETS = [
+    "Quando foi a última troca de óleo?",
+    "Registrei o abastecimento de hoje.",
+    "O carro está fazendo um barulho na suspensão.",
+    "Pode agendar a revisão para a próxima semana?",
+    "Paguei o IPVA, segue o comprovante.",
+    "Quanto está a média de consumo este mês?",
+    "Troquei os pneus dianteiros.",
+    "Vou usar o carro no fim de semana.",
+]
+
+
+# =============================================================================
+# DETERMINISMO
+# =============================================================================
+
+class Ids:
+    """uuid5 determinístico por (seed, tabela, índice)"""
+
+    def __init__(self, seed: int):
+        self.namespace = uuid.uuid5(uuid.NAMESPACE_URL, f"mobistory-synthetic:{seed}")
+
+    def __call__(self, table: str, *index) -> uuid.UUID:
+        return uuid.uuid5(self.namespace, f"{table}:{':'.join(str(part) for part in index)}")
+
+
+def rng_for(seed: int, stream: str) -> random.Random:
+    """Um gerador independente por tabela: gerar uma tabela não altera as outras"""
+    return random.Random(f"{seed}:{stream}")
+
+
+def long_tail(rng: random.Random, average: float, maximum: int) -> int:
+    """Contagem com cauda longa (muitos valores pequenos, poucos muito grandes)"""
+    if average <= 0:
+        return 0
+    return min(int(rng.expovariate(1.0 / average)), maximum)
+
+
+class Plan:
+    """Parâmetros da geração e funções derivadas (datas, donos)"""
+
+    def __init__(self, args):
+        self.seed = args.seed
+        self.vehicles = args.vehicles
+        self.entities = args.entities or max(int(args.vehicles * 0.8), 1)
+        self.conversations = args.conversations if args.conversations is not None else self.entities // 4
+        self.plates = args.plates
+        self.colors = args.colors
+        self.links = args.links
+        self.messages = args.messages
+        self.events = args.events
+        self.end = datetime.strptime(args.end_date, "%Y-%m-%d")
+        self.start = self.end - timedelta(days=365 * args.years)
+        self.span = (self.end - self.start).total_seconds()
+        self.ids = Ids(args.seed)
+
+    def created_at(self, index: int, total: int) -> datetime:
+        """Cadastros crescem ao longo do período (índice maior = mais recente)"""
+        jitter = (index * 7919) % 3600
+        return self.start + timedelta(seconds=self.span * index / max(total, 1) + jitter)
+
+    def owner_of(self, vehicle_index: int) -> int:
+        """Entidade proprietária do veículo (espalhamento multiplicativo)"""
+        return (vehicle_index * 2654435761 + self.seed) % self.entities
+
+    def random_time_after(self, rng: random.Random, start: datetime) -> datetime:
+        remaining = max((self.end - start).total_seconds(), 1)
+        return start + timedelta(seconds=rng.random() * remaining)
+
+
+# =============================================================================
+# GERADORES DE LINHAS
+# =============================================================================
+
+ENTITY_COLUMNS = ["id", "entity_code", "is_anonymous", "verified", "active", "created_at", "updated_at"]
+NAME_COLUMNS = ["id", "entity_id", "name_type", "name_value", "is_current", "start_date", "created_at"]
+CONTACT_COLUMNS = [
+    "id", "entity_id", "contact_type", "contact_value", "is_verified", "is_primary", "is_public",
+    "use_for_login", "use_for_recovery", "use_for_notifications", "use_for_2fa", "is_active",
+    "start_date", "created_at",
+]
+VEHICLE_COLUMNS = [
+    "id", "vin", "brand_id", "model_id", "version_id", "manufacturing_year", "model_year",
+    "visibility", "created_at", "updated_at",
+]
+PLATE_COLUMNS = [
+    "id", "vehicle_id", "plate_type_id", "plate_number", "state", "city", "status", "active",
+    "end_date", "created_at", "updated_at",
+]
+COLOR_COLUMNS = ["id", "vehicle_id", "color", "hex_code", "start_date", "end_date", "active", "created_at", "updated_at"]
+LINK_COLUMNS = [
+    "id", "link_code", "entity_id", "vehicle_id", "link_type_id", "status", "start_date", "end_date",
+    "requested_by_entity_id", "created_at", "updated_at",
+]
+CONVERSATION_COLUMNS = [
+    "id", "conversation_code", "primary_vehicle_id", "conversation_type", "title", "status",
+    "total_participants", "active_participants", "total_messages", "started_at", "last_message_at",
+    "created_at", "updated_at",
+]
+PARTICIPANT_COLUMNS = [
+    "id", "conversation_id", "entity_id", "role", "participant_type", "joined_at", "is_active",
+    "unread_count", "created_at", "updated_at",
+]
+MESSAGE_COLUMNS = [
+    "id", "conversation_id", "sender_entity_id", "sender_participant_id", "content", "message_type", "created_at",
+]
+EVENT_COLUMNS = [
+    "id", "vehicle_id", "entity_id", "event_category", "event_type", "event_timestamp", "severity",
+    "title", "description", "event_data", "source_table", "is_public", "created_at",
+]
+
+
+def entity_rows(plan: Plan):
+    rng = rng_for(plan.seed, "entities")
+    for index in range(plan.entities):
+        created_at = plan.created_at(index, plan.entities)
+        yield (
+            plan.ids("entity", index), f"{TAG}-E{index:010d}",
+            rng.random() < 0.05, rng.random() < 0.5, True, created_at, created_at,
+        )
+
+
+def entity_name_rows(plan: Plan):
+    rng = rng_for(plan.seed, "entity_names")
+    for index in range(plan.entities):
+        created_at = plan.created_at(index, plan.entities)
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+        yield (plan.ids("entity_name", index), plan.ids("entity", index), "display_name", name, True, created_at.date(), created_at)
+
+
+def entity_contact_rows(plan: Plan):
+    rng = rng_for(plan.seed, "entity_contacts")
+    for index in range(plan.entities):
+        created_at = plan.created_at(index, plan.entities)
+        entity_id = plan.ids("entity", index)
+        verified = rng.random() < 0.7
+        # Valores únicos por índice (índice único de contatos ativos)
+        if rng.random() < 0.9:
+            yield (
+                plan.ids("entity_contact", index, "email"), entity_id, "email",
+                f"{TAG.lower()}.user{index}@example.test", verified, True, False,
+                True, True, True, False, True, created_at.date(), created_at,
+            )
+        if rng.random() < 0.7:
+            yield (
+                plan.ids("entity_contact", index, "phone"), entity_id, "phone",
+                f"+55 11 9{index:010d}", verified, True, False,
+                True, True, True, rng.random() < 0.2, True, created_at.date(), created_at,
+            )
+
+
+def vehicle_rows(plan: Plan, catalog: list):
+    rng = rng_for(plan.seed, "vehicles")
+    for index in range(plan.vehicles):
+        created_at = plan.created_at(index, plan.vehicles)
+        brand_id, model_id, version_id = rng.choice(catalog) if catalog else (None, None, None)
+        year = rng.randint(created_at.year - 15, created_at.year)
+        yield (
+            plan.ids("vehicle", index), f"{TAG}{index:014d}", brand_id, model_id, version_id,
+            year, year + (1 if rng.random() < 0.4 else 0),
+            "public" if rng.random() < 0.1 else "private", created_at, created_at,
+        )
+
+
+def plate_number(rng: random.Random) -> str:
+    """Placa no formato Mercosul (AAA9A99)"""
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    return (
+        "".join(rng.choice(letters) for _ in range(3)) + str(rng.randint(0, 9))
+        + rng.choice(letters) + f"{rng.randint(0, 99):02d}"
+    )
+
+
+def history(plan: Plan, rng: random.Random, created_at: datetime, count: int):
+    """Intervalos (início, fim) consecutivos; o último fica em aberto (atual)"""
+    starts = sorted(plan.random_time_after(rng, created_at) for _ in range(count - 1))
+    starts.insert(0, created_at)
+    for position, start in enumerate(starts):
+        end = starts[position + 1] if position + 1 < len(starts) else None
+        yield position, start, end
+
+
+def plate_rows(plan: Plan, plate_type_ids: list):
+    rng = rng_for(plan.seed, "plates")
+    for index in range(plan.vehicles):
+        created_at = plan.created_at(index, plan.vehicles)
+        count = 1 + long_tail(rng, plan.plates - 1, 20)
+        state, city = rng.choice(STATES)
+        for position, start, end in history(plan, rng, created_at, count):
+            yield (
+                plan.ids("plate", index, position), plan.ids("vehicle", index), rng.choice(plate_type_ids),
+                plate_number(rng), state, city, "ACTIVE" if end is None else "REPLACED", end is None,
+                end.date() if end else None, start, end or start,
+            )
+
+
+def color_rows(plan: Plan):
+    rng = rng_for(plan.seed, "colors")
+    for index in range(plan.vehicles):
+        created_at = plan.created_at(index, plan.vehicles)
+        count = 1 + long_tail(rng, plan.colors - 1, 10)
+        for position, start, end in history(plan, rng, created_at, count):
+            color, hex_code = rng.choice(COLORS)
+            yield (
+                plan.ids("color", index, position), plan.ids("vehicle", index), color, hex_code,
+                start.date(), end.date() if end else None, end is None, start, end or start,
+            )
+
+
+def link_rows(plan: Plan, link_type_ids: list):
+    rng = rng_for(plan.seed, "links")
+    owner_type = link_type_ids[0] if link_type_ids else None
+    for index in range(plan.vehicles):
+        created_at = plan.created_at(index, plan.vehicles)
+        vehicle_id = plan.ids("vehicle", index)
+        owner_id = plan.ids("entity", plan.owner_of(index))
+
+        # Proprietário
+        yield (
+            plan.ids("link", index, 0), f"{TAG}-L{index:010d}-0", owner_id, vehicle_id, owner_type,
+            "active", created_at.date(), None, None, created_at, created_at,
+        )
+
+        for position in range(1, 1 + long_tail(rng, plan.links - 1, 50)):
+            status = rng.choice(EXTRA_LINK_STATUSES)
+            start = plan.random_time_after(rng, created_at)
+            end = plan.random_time_after(rng, start) if status in ("terminated", "revoked") else None
+            entity_index = rng.randrange(plan.entities)
+            yield (
+                plan.ids("link", index, position), f"{TAG}-L{index:010d}-{position}",
+                plan.ids("entity", entity_index), vehicle_id,
+                rng.choice(link_type_ids) if link_type_ids else None,
+                status, start.date(), end.date() if end else None,
+                owner_id if status == "pending_request" else None,
+                start, end or start,
+            )
+
+
+def conversation_plan(plan: Plan, rng: random.Random, index: int):
+    """(veículo, participantes, qtd. de mensagens, início) de uma conversa"""
+    vehicle_index = rng.randrange(plan.vehicles)
+    owner_index = plan.owner_of(vehicle_index)
+    others = [rng.randrange(plan.entities) for _ in range(rng.randint(1, 3))]
+    participants = [owner_index] + [other for other in others if other != owner_index]
+    messages = 1 + long_tail(rng, plan.messages, plan.messages * 20)
+    started_at = plan.random_time_after(rng, plan.created_at(vehicle_index, plan.vehicles))
+    return vehicle_index, participants, messages, started_at
+
+
+def message_times(plan: Plan, rng: random.Random, started_at: datetime, count: int):
+    """Horários crescentes das mensagens, limitados ao fim do período"""
+    current = started_at
+    for _ in range(count):
+        current = min(current + timedelta(seconds=rng.expovariate(1 / 3600.0)), plan.end)
+        yield current
+
+
+def conversation_rows(plan: Plan):
+    """Conversas, participantes e mensagens (um único fluxo determinístico)"""
+    rng = rng_for(plan.seed, "conversations")
+    for index in range(plan.conversations):
+        vehicle_index, participants, message_count, started_at = conversation_plan(plan, rng, index)
+        conversation_id = plan.ids("conversation", index)
+        times = list(message_times(plan, rng, started_at, message_count))
+
+        conversation = (
+            conversation_id, f"{TAG}-C{index:010d}", plan.ids("vehicle", vehicle_index),
+            "private" if len(participants) == 1 else "group", f"Conversa {index}", "active",
+            len(participants), len(participants), message_count, started_at, times[-1],
+            started_at, times[-1],
+        )
+
+        participant_rows = [
+            (
+                plan.ids("participant", index, position), conversation_id, plan.ids("entity", entity_index),
+                "owner" if position == 0 else "viewer", "human", started_at, True,
+                0, started_at, started_at,
+            )
+            for position, entity_index in enumerate(participants)
+        ]
+
+        message_rows = []
+        for number, sent_at in enumerate(times):
+            position = rng.randrange(len(participants))
+            message_rows.append((
+                plan.ids("message", index, number), conversation_id,
+                plan.ids("entity", participants[position]), plan.ids("participant", index, position),
+                rng.choice(MESSAGE_SNIPPETS), "text", sent_at,
+            ))
+
+        yield conversation, participant_rows, message_rows
+
+
+def event_rows(plan: Plan):
+    rng = rng_for(plan.seed, "vehicle_events")
+    for index in range(plan.vehicles):
+        created_at = plan.created_at(index, plan.vehicles)
+        vehicle_id = plan.ids("vehicle", index)
+        owner_id = plan.ids("entity", plan.owner_of(index))
+        for number in range(long_tail(rng, plan.events, plan.events * 20)):
+            category, event_type, severity, title = rng.choice(EVENT_TYPES)
+            happened_at = plan.random_time_after(rng, created_at)
+            yield (
+                plan.ids("vehicle_event", index, number), vehicle_id, owner_id, category, event_type,
+                happened_at, severity, title, None, {"synthetic": True, "sequence": number},
+                None, "owner_only", happened_at,
+            )
+
+
+# =============================================================================
+# CARGA
+# =============================================================================
+
+def load(conn, table: str, columns, rows, batch_size: int) -> int:
+    """COPY em lotes de batch_size linhas, com commit e progresso por lote"""
+    started = time.perf_counter()
+    total = 0
+    batch = []
+    with conn.cursor() as cur:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                total += copy_rows(cur, table, columns, batch)
+                conn.commit()
+                batch = []
+        total += copy_rows(cur, table, columns, batch)
+    conn.commit()
+
+    seconds = time.perf_counter() - started
+    rate = total / seconds if seconds > 0 else 0
+    print(f"   {table:28s} {total:>12,} linhas  {seconds:8.1f}s  ({rate:,.0f} linhas/s)")
+    return total
+
+
+def load_conversations(conn, plan: Plan, batch_size: int) -> int:
+    """Conversas/participantes/mensagens vêm do mesmo fluxo: três buffers de COPY"""
+    started = time.perf_counter()
+    buffers = {"conversations": [], "conversation_participants": [], "conversation_messages": []}
+    columns = {
+        "conversations": CONVERSATION_COLUMNS,
+        "conversation_participants": PARTICIPANT_COLUMNS,
+        "conversation_messages": MESSAGE_COLUMNS,
+    }
+    totals = dict.fromkeys(buffers, 0)
+
+    def flush(cur):
+        # Ordem das FKs: conversa -> participante -> mensagem
+        for table in buffers:
+            totals[table] += copy_rows(cur, table, columns[table], buffers[table])
+            buffers[table] = []
+        conn.commit()
+
+    with conn.cursor() as cur:
+        for conversation, participants, messages in conversation_rows(plan):
+            buffers["conversations"].append(conversation)
+            buffers["conversation_participants"].extend(participants)
+            buffers["conversation_messages"].extend(messages)
+            if len(buffers["conversation_messages"]) >= batch_size:
+                flush(cur)
+        flush(cur)
+
+    seconds = time.perf_counter() - started
+    for table, total in totals.items():
+        print(f"   {table:28s} {total:>12,} linhas")
+    print(f"   {'(conversas)':28s} {'':>12}        {seconds:8.1f}s")
+    return sum(totals.values())
+
+
+def fetch_catalog(cur):
+    """Catálogo existente: (brand, model, version), plate_types e link_types"""
+    cur.execute("""
+        SELECT m.brand_id, m.id, mv.id
+        FROM models m
+        LEFT JOIN model_versions mv ON mv.model_id = m.id
+        LIMIT 5000
+    """)
+    catalog = cur.fetchall()
+
+    cur.execute("SELECT id FROM plate_types ORDER BY code")
+    plate_type_ids = [row[0] for row in cur.fetchall()]
+
+    # Proprietário primeiro (usado no vínculo principal de cada veículo)
+    cur.execute("SELECT id FROM link_types ORDER BY (code = 'owner') DESC, code")
+    link_type_ids = [row[0] for row in cur.fetchall()]
+    return catalog, plate_type_ids, link_type_ids
+
+
+def ensure_event_partitions(cur, plan: Plan) -> None:
+    """Cria as partições trimestrais de vehicle_events do período gerado"""
+    year, quarter = plan.start.year, (plan.start.month - 1) // 3 + 1
+    while (year, quarter) <= (plan.end.year, (plan.end.month - 1) // 3 + 1):
+        cur.execute("SELECT public.create_vehicle_events_partition(%s, %s)", (year, quarter))
+        quarter += 1
+        if quarter > 4:
+            year, quarter = year + 1, 1
+
+
+def set_entity_primary_refs(cur) -> None:
+    """Aponta primary_name/email/phone das entidades sintéticas (set-based)"""
+    cur.execute(f"""
+        UPDATE entities e
+        SET primary_name_id = n.id
+        FROM entity_names n
+        WHERE n.entity_id = e.id AND n.is_current AND e.entity_code LIKE '{TAG}-%%'
+    """)
+    for contact_type in ("email", "phone"):
+        cur.execute(f"""
+            UPDATE entities e
+            SET primary_{contact_type}_contact_id = c.id
+            FROM entity_contacts c
+            WHERE c.entity_id = e.id AND c.contact_type = %s AND c.is_primary
+              AND e.entity_code LIKE '{TAG}-%%'
+        """, (contact_type,))
+
+
+# Triggers que gravam vehicle_events (migration a1709c643048); só eles são
+# desligados: DISABLE TRIGGER USER desligaria também os da projeção
+EVENT_TRIGGERS = (("plates", "trg_plate_event"), ("links", "trg_link_event"))
+
+
+def set_event_triggers(cur, enabled: bool) -> None:
+    action = "ENABLE" if enabled else "DISABLE"
+    for table, trigger in EVENT_TRIGGERS:
+        cur.execute(f"ALTER TABLE {table} {action} TRIGGER {trigger}")
+
+
+def generate(plan: Plan, batch_size: int) -> None:
+    conn = psycopg2.connect(settings.DATABASE_URL)
+    started = time.perf_counter()
+    total = 0
+    try:
+        with conn.cursor() as cur:
+            catalog, plate_type_ids, link_type_ids = fetch_catalog(cur)
+            ensure_event_partitions(cur, plan)
+            set_event_triggers(cur, enabled=False)
+        conn.commit()
+
+        if not plate_type_ids:
+            print("   [AVISO] Nenhum plate_type: placas não serão geradas (rode populate_plate_types_br.py)")
+        if not link_type_ids:
+            print("   [AVISO] Nenhum link_type: vínculos ficarão sem tipo")
+
+        total += load(conn, "entities", ENTITY_COLUMNS, entity_rows(plan), batch_size)
+        total += load(conn, "entity_names", NAME_COLUMNS, entity_name_rows(plan), batch_size)
+        total += load(conn, "entity_contacts", CONTACT_COLUMNS, entity_contact_rows(plan), batch_size)
+        with conn.cursor() as cur:
+            set_entity_primary_refs(cur)
+        conn.commit()
+
+        total += load(conn, "vehicles", VEHICLE_COLUMNS, vehicle_rows(plan, catalog), batch_size)
+        if plate_type_ids:
+            total += load(conn, "plates", PLATE_COLUMNS, plate_rows(plan, plate_type_ids), batch_size)
+        total += load(conn, "colors", COLOR_COLUMNS, color_rows(plan), batch_size)
+        total += load(conn, "links", LINK_COLUMNS, link_rows(plan, link_type_ids), batch_size)
+        total += load_conversations(conn, plan, batch_size)
+        total += load(conn, "vehicle_events", EVENT_COLUMNS, event_rows(plan), batch_size)
+
+        print("\n   ANALYZE...")
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE")
+    finally:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            set_event_triggers(cur, enabled=True)
+        conn.close()
+
+    seconds = time.perf_counter() - started
+    print("\n" + "=" * 80)
+    print(f"Total: {total:,} linhas em {seconds:.1f}s ({total / seconds if seconds else 0:,.0f} linhas/s)")
+    print("=" * 80)
+
+
+def cleanup() -> None:
+    """Remove todas as linhas sintéticas (marcadas com o prefixo SYN)"""
+    conn = psycopg2.connect(settings.DATABASE_URL)
+    statements = [
+        ("vehicle_events", f"DELETE FROM vehicle_events WHERE vehicle_id IN (SELECT id FROM vehicles WHERE vin LIKE '{TAG}%%')"),
+        ("conversation_messages", f"DELETE FROM conversation_messages WHERE conversation_id IN (SELECT id FROM conversations WHERE conversation_code LIKE '{TAG}-%%')"),
+        ("conversation_participants", f"DELETE FROM conversation_participants WHERE conversation_id IN (SELECT id FROM conversations WHERE conversation_code LIKE '{TAG}-%%')"),
+        ("conversations", f"DELETE FROM conversations WHERE conversation_code LIKE '{TAG}-%%'"),
+        ("links", f"DELETE FROM links WHERE link_code LIKE '{TAG}-%%'"),
+        ("colors", f"DELETE FROM colors WHERE vehicle_id IN (SELECT id FROM vehicles WHERE vin LIKE '{TAG}%%')"),
+        ("plates", f"DELETE FROM plates WHERE vehicle_id IN (SELECT id FROM vehicles WHERE vin LIKE '{TAG}%%')"),
+        ("vehicles", f"DELETE FROM vehicles WHERE vin LIKE '{TAG}%%'"),
+        ("entities (refs)", f"""
+            UPDATE entities SET primary_name_id = NULL, primary_email_contact_id = NULL, primary_phone_contact_id = NULL
+            WHERE entity_code LIKE '{TAG}-%%'
+        """),
+        ("entity_contacts", f"DELETE FROM entity_contacts WHERE entity_id IN (SELECT id FROM entities WHERE entity_code LIKE '{TAG}-%%')"),
+        ("entity_names", f"DELETE FROM entity_names WHERE entity_id IN (SELECT id FROM entities WHERE entity_code LIKE '{TAG}-%%')"),
+        ("entities", f"DELETE FROM entities WHERE entity_code LIKE '{TAG}-%%'"),
+    ]
+    try:
+        with conn.cursor() as cur:
+            set_event_triggers(cur, enabled=False)
+            for name, statement in statements:
+                cur.execute(statement, ())
+                print(f"   {name:28s} {cur.rowcount:>12,} linhas")
+            set_event_triggers(cur, enabled=True)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos em escala e carrega com COPY")
+    parser.add_argument("--seed", type=int, default=42, help="Mesma seed => mesmos dados")
+    parser.add_argument("--vehicles", type=int, default=100000)
+    parser.add_argument("--entities", type=int, default=None, help="Padrão: 80%% do número de veículos")
+    parser.add_argument("--plates", type=float, default=1.5, help="Média de placas por veículo (histórico)")
+    parser.add_argument("--colors", type=float, default=1.3, help="Média de cores por veículo (histórico)")
+    parser.add_argument("--links", type=float, default=2.0, help="Média de vínculos por veículo")
+    parser.add_argument("--conversations", type=int, default=None, help="Padrão: entidades / 4")
+    parser.add_argument("--messages", type=float, default=80, help="Média de mensagens por conversa (cauda longa)")
+    parser.add_argument("--events", type=float, default=30, help="Média de vehicle_events por veículo")
+    parser.add_argument("--years", type=int, default=3, help="Anos de histórico")
+    parser.add_argument("--end-date", default="2026-06-30", help="Fim do período (fixo para ser determinístico)")
+    parser.add_argument("--batch-size", type=int, default=50000, help="Linhas por COPY/commit")
+    parser.add_argument("--cleanup", action="store_true", help="Remove os dados sintéticos e sai")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    if args.cleanup:
+        print("REMOÇÃO DOS DADOS SINTÉTICOS")
+        print("=" * 80)
+        cleanup()
+        return
+
+    plan = Plan(args)
+    print("GERAÇÃO DE DADOS SINTÉTICOS (COPY)")
+    print(f"seed={plan.seed} veículos={plan.vehicles:,} entidades={plan.entities:,} "
+          f"conversas={plan.conversations:,} período={plan.start.date()}..{plan.end.date()}")
+    print("=" * 80)
+    generate(plan, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""
+Teste de carga com sessões simuladas do app mobile
+
+Cada usuário virtual repete jornadas completas do app, escolhidas por peso:
+- open_app: entidade anônima do dispositivo + catálogos (marcas, tipos de placa) + feed de momentos
+- browse_vehicles: lista de veículos, detalhe de dois veículos, vehicles-with-details
+- chat: lista de conversas, abre uma conversa, carrega mensagens, envia mensagens
+- upload_cover: envia a foto de capa de um veículo
+
+A carga é aplicada em degraus de concorrência (--levels), cada um por
+--duration segundos, com usuários em loop fechado (a próxima requisição só
+sai quando a anterior termina). Para cada degrau o relatório mostra vazão
+(req/s e jornadas/s), p50/p95/p99 das requisições e das jornadas e a taxa de
+erro; o ponto de saturação é o degrau a partir do qual mais concorrência
+deixa de aumentar a vazão e só aumenta a latência.
+
+Usa o mesmo servidor, fixtures e resumo de scripts/benchmark_endpoints.py.
+Atenção: cria entidades anônimas (deviceId "loadtest-*"), mensagens e arquivos.
+
+Uso:
+    python scripts/load_test_sessions.py
+    python scripts/load_test_sessions.py --levels 1 4 16 64 --duration 30 --workers 4
+    python scripts/load_test_sessions.py --server gunicorn --workers 8
+    python scripts/load_test_sessions.py --url http://localhost:8000 --think-ms 500
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from datetime import datetime
+
+import httpx
+
+# Adicionar o diretório raiz ao path para importar app e os helpers do benchmark
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SCRIPTS_DIR))
+sys.path.insert(0, SCRIPTS_DIR)
+
+from benchmark_endpoints import (
+    API, DEFAULT_OUTPUT_DIR, ROOT_DIR, TINY_PNG,
+    auth_headers, git_revision, load_fixtures, start_server, stop_server, summarize,
+)
+
+# Dispositivos distintos simulados (a maioria das aberturas é de quem já usa o app)
+DEVICE_POOL = 2000
+
+
+class Recorder:
+    """Latências por passo e por jornada de um degrau de concorrência"""
+
+    def __init__(self):
+        self.requests = []
+        self.request_errors = 0
+        self.steps = {}
+        self.journeys = {}
+        self.journey_errors = 0
+
+    async def call(self, client: httpx.AsyncClient, step: str, method: str, path: str, **kwargs):
+        """Executa uma requisição e registra a latência; None em caso de erro"""
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        elapsed = time.perf_counter() - started
+
+        self.requests.append(elapsed)
+        self.steps.setdefault(step, []).append(elapsed)
+        if response is None or response.status_code >= 400:
+            self.request_errors += 1
+            return None
+        return response
+
+
+# =============================================================================
+# JORNADAS
+# =============================================================================
+# Cada jornada recebe (client, recorder, fixtures, rng) e retorna False se
+# algum passo falhou.
+
+async def journey_open_app(client, rec, fx, rng):
+    device_id = f"loadtest-{rng.randrange(DEVICE_POOL)}"
+    response = await rec.call(client, "create_anonymous_entity", "POST", f"{API}/entities/anonymous", json={
+        "device_fingerprint": {
+            "deviceId": device_id,
+            "deviceType": "phone",
+            "osName": rng.choice(["android", "ios"]),
+            "appVersion": "1.0.0",
+            "locale": "pt-BR",
+            "timezone": "America/Sao_Paulo",
+        },
+    })
+    ok = response is not None
+    ok &= await rec.call(client, "list_brands", "GET", f"{API}/brands/") is not None
+    ok &= await rec.call(client, "list_plate_types", "GET", f"{API}/plate-types/") is not None
+    ok &= await rec.call(client, "moments_feed", "GET", f"{API}/moments-feed", params={"limit": 20}) is not None
+    return ok
+
+
+async def journey_browse_vehicles(client, rec, fx, rng):
+    headers = auth_headers(rng.choice(fx["entity_ids"])) if fx["entity_ids"] else {}
+    ok = await rec.call(
+        client, "list_vehicles", "GET", f"{API}/vehicles/", params={"limit": 20}, headers=headers
+    ) is not None
+    for vehicle_id in rng.sample(fx["vehicle_ids"], min(2, len(fx["vehicle_ids"]))):
+        ok &= await rec.call(client, "get_vehicle", "GET", f"{API}/vehicles/{vehicle_id}") is not None
+    ok &= await rec.call(
+        client, "vehicles_with_details", "GET", f"{API}/vehicles-with-details", params={"limit": 20}
+    ) is not None
+    return ok
+
+
+async def journey_chat(client, rec, fx, rng):
+    conversation_id, entity_id = rng.choice(fx["participants"])
+    headers = auth_headers(entity_id)
+    ok = await rec.call(
+        client, "list_conversations", "GET", f"{API}/conversations", params={"entity_id": entity_id, "limit": 20}
+    ) is not None
+    ok &= await rec.call(
+        client, "get_conversation", "GET", f"{API}/conversations/{conversation_id}",
+        params={"include_messages": "false"}, headers=headers,
+    ) is not None
+    ok &= await rec.call(
+        client, "list_messages", "GET", f"{API}/conversations/{conversation_id}/messages",
+        params={"limit": 50}, headers=headers,
+    ) is not None
+    for index in range(rng.randint(1, 3)):
+        ok &= await rec.call(
+            client, "send_message", "POST", f"{API}/conversations/{conversation_id}/messages", json={
+                "conversation_id": conversation_id,
+                "sender_entity_id": entity_id,
+                "content": f"load test {index}",
+                "message_type": "text",
+            }, headers=headers,
+        ) is not None
+    return ok
+
+
+async def journey_upload_cover(client, rec, fx, rng):
+    data = {"uploaded_by_entity_id": rng.choice(fx["entity_ids"]), "source": "mobile"}
+    if fx["vehicle_ids"]:
+        data["vehicle_id"] = rng.choice(fx["vehicle_ids"])
+    return await rec.call(
+        client, "upload_file", "POST", f"{API}/upload/upload",
+        files={"file": ("cover.png", TINY_PNG, "image/png")}, data=data,
+    ) is not None
+
+
+# (jornada, peso, fixtures necessárias)
+JOURNEYS = {
+    "open_app": (journey_open_app, 3, ()),
+    "browse_vehicles": (journey_browse_vehicles, 4, ("vehicle_ids",)),
+    "chat": (journey_chat, 3, ("participants",)),
+    "upload_cover": (journey_upload_cover, 1, ("entity_ids",)),
+}
+
+
+# =============================================================================
+# EXECUÇÃO
+# =============================================================================
+
+async def run_level(base_url: str, journeys, fixtures, concurrency: int, duration: float,
+                    think_seconds: float, seed: int) -> dict:
+    """Roda `concurrency` usuários em loop fechado por `duration` segundos"""
+    names = list(journeys)
+    weights = [journeys[name][1] for name in names]
+    rec = Recorder()
+    journey_latencies = {name: [] for name in names}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        deadline = time.perf_counter() + duration
+
+        async def user(index: int):
+            rng = random.Random(f"{seed}:{concurrency}:{index}")
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights)[0]
+                started = time.perf_counter()
+                ok = await journeys[name][0](client, rec, fixtures, rng)
+                journey_latencies[name].append(time.perf_counter() - started)
+                if not ok:
+                    rec.journey_errors += 1
+                if think_seconds:
+                    await asyncio.sleep(rng.expovariate(1 / think_seconds))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user(index) for index in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    all_journeys = [latency for latencies in journey_latencies.values() for latency in latencies]
+    return {
+        "concurrency": concurrency,
+        "requests": summarize(rec.requests, rec.request_errors, elapsed),
+        "journeys": summarize(all_journeys, rec.journey_errors, elapsed),
+        "by_journey": {
+            name: summarize(latencies, 0, elapsed)
+            for name, latencies in journey_latencies.items() if latencies
+        },
+        "by_step": {
+            name: summarize(latencies, 0, elapsed)
+            for name, latencies in sorted(rec.steps.items())
+        },
+    }
+
+
+def find_saturation(levels, min_gain: float) -> dict:
+    """
+    Primeiro degrau em que dobrar a concorrência rende menos que `min_gain`
+    de vazão a mais: a partir dele a fila cresce e só a latência sobe
+    """
+    best = max(levels, key=lambda level: level["requests"]["throughput_rps"])
+    for previous, current in zip(levels, levels[1:]):
+        before = previous["requests"]["throughput_rps"]
+        after = current["requests"]["throughput_rps"]
+        growth = current["concurrency"] / previous["concurrency"]
+        gain = (after - before) / before if before else 0.0
+        # ganho proporcional ao aumento de concorrência (dobrar = 100%)
+        if gain < min_gain * (growth - 1):
+            return {
+                "concurrency": previous["concurrency"],
+                "throughput_rps": before,
+                "p99_ms": previous["requests"]["p99_ms"],
+                "peak_concurrency": best["concurrency"],
+                "peak_throughput_rps": best["requests"]["throughput_rps"],
+            }
+    return {
+        "concurrency": None,
+        "peak_concurrency": best["concurrency"],
+        "peak_throughput_rps": best["requests"]["throughput_rps"],
+    }
+
+
+def print_curve(levels) -> None:
+    """Tabela da curva vazão x latência, com barra proporcional à vazão"""
+    peak = max(level["requests"]["throughput_rps"] for level in levels) or 1.0
+    print(f"   {'conc':>5} {'req/s':>9} {'jorn/s':>8} {'p50':>8} {'p95':>8} {'p99':>9} {'erros':>7}")
+    for level in levels:
+        req = level["requests"]
+        jor = level["journeys"]
+        error_rate = req["errors"] / req["requests"] if req["requests"] else 0.0
+        bar = "#" * int(round(req["throughput_rps"] / peak * 30))
+        print(
+            f"   {level['concurrency']:>5} {req['throughput_rps']:>9.1f} {jor['throughput_rps']:>8.1f} "
+            f"{req['p50_ms']:>8.1f} {req['p95_ms']:>8.1f} {req['p99_ms']:>9.1f} {error_rate:>6.1%}  {bar}"
+        )
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Teste de carga com jornadas do app mobile")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64],
+                        help="Degraus de concorrência (usuários simultâneos)")
+    parser.add_argument("--duration", type=float, default=20.0, help="Segundos por degrau")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Pausa média entre jornadas (0 = carga máxima)")
+    parser.add_argument("--only", nargs="*", choices=list(JOURNEYS), help="Rodar só estas jornadas")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--min-gain", type=float, default=0.10,
+                        help="Ganho de vazão mínimo (por dobra de concorrência) antes de considerar saturado")
+    parser.add_argument("--server", choices=["uvicorn", "gunicorn"], default="uvicorn")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--url", help="Usar uma API já rodando em vez de subir o servidor")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    args = parser.parse_args()
+
+    revision = git_revision()
+    fixtures = load_fixtures()
+    journeys = {}
+    for name in args.only or list(JOURNEYS):
+        missing = [key for key in JOURNEYS[name][2] if not fixtures[key]]
+        if missing:
+            print(f"[PULADO] jornada {name}: sem dados no banco ({', '.join(missing)})")
+            continue
+        journeys[name] = JOURNEYS[name]
+    if not journeys:
+        raise SystemExit("Nenhuma jornada com dados suficientes; popule o banco antes")
+
+    print("=" * 80)
+    print(f"TESTE DE CARGA - SESSÕES DO APP ({revision['sha']}{' + alterações' if revision['dirty'] else ''})")
+    target = args.url or f"{args.server} x {args.workers} worker(s)"
+    print(f"{target}, degraus {args.levels}, {args.duration:.0f}s cada, jornadas: {', '.join(journeys)}")
+    print("=" * 80)
+
+    process = None if args.url else start_server(args.port, args.workers, args.server)
+    base_url = args.url or f"http://127.0.0.1:{args.port}"
+    levels = []
+    try:
+        for concurrency in args.levels:
+            print(f"\n>> {concurrency} usuário(s) simultâneo(s)...")
+            level = asyncio.run(run_level(
+                base_url, journeys, fixtures, concurrency, args.duration, args.think_ms / 1000, args.seed
+            ))
+            levels.append(level)
+            req = level["requests"]
+            print(f"   {req['throughput_rps']:.1f} req/s, p99 {req['p99_ms']:.1f} ms, erros {req['errors']}")
+    finally:
+        if process:
+            stop_server(process)
+
+    saturation = find_saturation(levels, args.min_gain)
+
+    print("\n" + "=" * 80)
+    print("CURVA VAZÃO x LATÊNCIA (ms)")
+    print("=" * 80)
+    print_curve(levels)
+    print()
+    if saturation["concurrency"] is not None:
+        print(
+            f"Saturação em ~{saturation['concurrency']} usuários "
+            f"({saturation['throughput_rps']:.1f} req/s, p99 {saturation['p99_ms']:.1f} ms); "
+            f"pico de {saturation['peak_throughput_rps']:.1f} req/s com {saturation['peak_concurrency']}"
+        )
+    else:
+        print(f"Sem saturação nos degraus testados (pico {saturation['peak_throughput_rps']:.1f} req/s); aumente --levels")
+
+    result = {
+        "git": revision,
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "config": {
+            "server": args.server,
+            "workers": args.workers,
+            "url": base_url,
+            "levels": args.levels,
+            "duration": args.duration,
+            "think_ms": args.think_ms,
+            "journeys": {name: journeys[name][1] for name in journeys},
+            "seed": args.seed,
+        },
+        "saturation": saturation,
+        "levels": levels,
+    }
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    output = os.path.join(
+        args.output_dir, f"{datetime.utcnow():%Y%m%d-%H%M%S}-{revision['sha']}-sessions.json"
+    )
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"Resultados salvos em {os.path.relpath(output, ROOT_DIR)}")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
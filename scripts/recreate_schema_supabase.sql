@@ -1,5 +1,8 @@
 -- =====================================================
 -- RECREATE SCHEMA IGUAL AO SUPABASE
+--
+-- Rodar com psql (o final inclui a projeção de veículos):
+--   psql $DATABASE_URL -f scripts/recreate_schema_supabase.sql
 -- =====================================================
 
 -- Dropar tudo
@@ -312,6 +315,10 @@ CREATE INDEX idx_conversations_vehicle ON conversations(vehicle_id);
 CREATE INDEX idx_conversations_entity ON conversations(entity_id);
 CREATE INDEX idx_messages_conversation ON messages(conversation_id);
 CREATE INDEX idx_moments_vehicle ON moments(vehicle_id);
+CREATE INDEX idx_moments_feed ON moments(created_at DESC NULLS LAST, id DESC) WHERE active = true;
+CREATE INDEX idx_moments_vehicle_feed ON moments(vehicle_id, created_at DESC NULLS LAST, id DESC) WHERE active = true;
+CREATE INDEX idx_moments_entity_feed ON moments(entity_id, created_at DESC NULLS LAST, id DESC) WHERE active = true;
+CREATE INDEX idx_moment_comments_moment ON moment_comments(moment_id);
 CREATE INDEX idx_moment_images_moment ON moment_images(moment_id);
 CREATE INDEX idx_vehicle_images_vehicle ON vehicle_images(vehicle_id);
 
@@ -333,3 +340,6 @@ CREATE TRIGGER update_vehicle_links_updated_at BEFORE UPDATE ON vehicle_entity_l
 CREATE TRIGGER update_moments_updated_at BEFORE UPDATE ON moments FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 CREATE TRIGGER update_moment_comments_updated_at BEFORE UPDATE ON moment_comments FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 CREATE TRIGGER update_conversations_updated_at BEFORE UPDATE ON conversations FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Projeção lida por /vehicles-with-details (tabela, funções, triggers e carga inicial)
+\ir vehicle_details_projection.sql
@@ -0,0 +1,303 @@
+-- =====================================================
+-- PROJEÇÃO: vehicle_details_projection
+-- Documento JSON pronto de cada veículo, servido por
+-- /vehicles-with-details e /vehicles-with-details/{id}
+--
+-- Incluído no fim de recreate_schema_supabase.sql. Em um banco já
+-- existente (idempotente):
+--   psql $DATABASE_URL -f scripts/vehicle_details_projection.sql
+--
+-- A projeção é atualizada por veículo, via triggers, sempre que
+-- vehicles, plates, colors, vehicle_fuels, vehicle_entity_links
+-- ou os catálogos (brands, models, model_versions, vehicle_categories,
+-- fuels) mudam. A leitura vira uma única busca indexada.
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS vehicle_details_projection (
+  vehicle_id UUID PRIMARY KEY REFERENCES vehicles(id) ON DELETE CASCADE,
+  created_at TIMESTAMPTZ,
+  active BOOLEAN NOT NULL DEFAULT true,
+  document JSONB NOT NULL,
+  entity_links JSONB NOT NULL DEFAULT '[]'::jsonb,
+  refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Ordem de /vehicles-with-details: created_at NULL (veículos antigos) no fim
+DROP INDEX IF EXISTS idx_vehicle_details_projection_created;
+CREATE INDEX IF NOT EXISTS idx_vehicle_details_projection_feed
+  ON vehicle_details_projection (created_at DESC NULLS LAST, vehicle_id DESC)
+  WHERE active = true;
+
+-- Índices usados pelos triggers de catálogo para achar os veículos afetados
+CREATE INDEX IF NOT EXISTS idx_vehicles_brand_id ON vehicles(brand_id);
+CREATE INDEX IF NOT EXISTS idx_vehicles_model_id ON vehicles(model_id);
+CREATE INDEX IF NOT EXISTS idx_vehicles_version_id ON vehicles(version_id);
+CREATE INDEX IF NOT EXISTS idx_vehicles_category_id ON vehicles(category_id);
+CREATE INDEX IF NOT EXISTS idx_vehicle_fuels_fuel_id ON vehicle_fuels(fuel_id);
+
+
+-- -----------------------------------------------------
+-- Monta os documentos de um conjunto de veículos
+--
+-- Cada relação 1:N (plates, colors, vehicle_fuels, vehicle_entity_links)
+-- é agregada no seu próprio LATERAL. Assim as linhas intermediárias
+-- não se multiplicam (plates x colors x fuels x links) e não é preciso
+-- json_agg(DISTINCT ...) para desfazer o produto.
+-- -----------------------------------------------------
+CREATE OR REPLACE FUNCTION build_vehicle_details(p_vehicle_ids UUID[])
+RETURNS TABLE (
+  vehicle_id UUID,
+  created_at TIMESTAMPTZ,
+  active BOOLEAN,
+  document JSONB,
+  entity_links JSONB
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    v.id,
+    v.created_at,
+    COALESCE(v.active, false),
+    to_jsonb(v) || jsonb_build_object(
+      'brands', jsonb_build_object('id', b.id, 'brand', b.brand),
+      'models', jsonb_build_object('id', m.id, 'model', m.model),
+      'model_versions', jsonb_build_object('id', mv.id, 'version', mv.version),
+      'vehicle_categories', jsonb_build_object('id', vc.id, 'category', vc.category),
+      'plates', pl.items,
+      'colors', co.items,
+      'vehicle_fuels', fu.items
+    ),
+    li.items
+  FROM vehicles v
+  LEFT JOIN brands b ON v.brand_id = b.id
+  LEFT JOIN models m ON v.model_id = m.id
+  LEFT JOIN model_versions mv ON v.version_id = mv.id
+  LEFT JOIN vehicle_categories vc ON v.category_id = vc.id
+  CROSS JOIN LATERAL (
+    SELECT COALESCE(jsonb_agg(jsonb_build_object(
+      'id', p.id,
+      'plate', p.plate,
+      'state', p.state,
+      'active', p.active
+    ) ORDER BY p.created_at, p.id), '[]'::jsonb) AS items
+    FROM plates p
+    WHERE p.vehicle_id = v.id AND p.active = true
+  ) pl
+  CROSS JOIN LATERAL (
+    SELECT COALESCE(jsonb_agg(jsonb_build_object(
+      'id', c.id,
+      'color', c.color,
+      'active', c.active
+    ) ORDER BY c.created_at, c.id), '[]'::jsonb) AS items
+    FROM colors c
+    WHERE c.vehicle_id = v.id AND c.active = true
+  ) co
+  CROSS JOIN LATERAL (
+    SELECT COALESCE(jsonb_agg(jsonb_build_object(
+      'id', vf.id,
+      'active', vf.active,
+      'fuels', jsonb_build_object(
+        'id', f.id,
+        'name', f.name,
+        'type', f.type
+      )
+    ) ORDER BY vf.created_at, vf.id), '[]'::jsonb) AS items
+    FROM vehicle_fuels vf
+    LEFT JOIN fuels f ON vf.fuel_id = f.id
+    WHERE vf.vehicle_id = v.id AND vf.active = true
+  ) fu
+  CROSS JOIN LATERAL (
+    SELECT COALESCE(jsonb_agg(jsonb_build_object(
+      'id', vel.id,
+      'relationship_type', vel.relationship_type,
+      'status', vel.status,
+      'start_date', vel.start_date,
+      'end_date', vel.end_date,
+      'active', vel.active
+    ) ORDER BY vel.start_date, vel.id), '[]'::jsonb) AS items
+    FROM vehicle_entity_links vel
+    WHERE vel.vehicle_id = v.id AND vel.active = true
+  ) li
+  WHERE v.id = ANY(p_vehicle_ids)
+$$;
+
+
+-- -----------------------------------------------------
+-- Atualiza a projeção de um conjunto de veículos
+-- -----------------------------------------------------
+CREATE OR REPLACE FUNCTION refresh_vehicle_details(p_vehicle_ids UUID[])
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF p_vehicle_ids IS NULL OR cardinality(p_vehicle_ids) = 0 THEN
+    RETURN;
+  END IF;
+
+  INSERT INTO vehicle_details_projection AS vdp (
+    vehicle_id, created_at, active, document, entity_links, refreshed_at
+  )
+  SELECT d.vehicle_id, d.created_at, d.active, d.document, d.entity_links, NOW()
+  FROM build_vehicle_details(p_vehicle_ids) d
+  ON CONFLICT (vehicle_id) DO UPDATE SET
+    created_at = EXCLUDED.created_at,
+    active = EXCLUDED.active,
+    document = EXCLUDED.document,
+    entity_links = EXCLUDED.entity_links,
+    refreshed_at = EXCLUDED.refreshed_at;
+END;
+$$;
+
+
+-- -----------------------------------------------------
+-- Triggers (por comando, com transition tables: um bulk
+-- import de N linhas faz um único refresh de conjunto)
+-- -----------------------------------------------------
+
+-- vehicles
+CREATE OR REPLACE FUNCTION trigger_vehicle_details_vehicles()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  PERFORM refresh_vehicle_details(ARRAY(SELECT DISTINCT id FROM new_rows));
+  RETURN NULL;
+END;
+$$;
+
+-- Tabelas filhas com coluna vehicle_id
+CREATE OR REPLACE FUNCTION trigger_vehicle_details_children()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM refresh_vehicle_details(ARRAY(SELECT DISTINCT vehicle_id FROM new_rows));
+  ELSIF TG_OP = 'UPDATE' THEN
+    PERFORM refresh_vehicle_details(ARRAY(
+      SELECT vehicle_id FROM new_rows
+      UNION
+      SELECT vehicle_id FROM old_rows
+    ));
+  ELSE
+    PERFORM refresh_vehicle_details(ARRAY(SELECT DISTINCT vehicle_id FROM old_rows));
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+-- Catálogos: TG_ARGV[0] é a coluna de vehicles que referencia o catálogo
+CREATE OR REPLACE FUNCTION trigger_vehicle_details_catalog()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_ids UUID[];
+BEGIN
+  EXECUTE format(
+    'SELECT ARRAY(SELECT v.id FROM vehicles v JOIN new_rows n ON n.id = v.%I)',
+    TG_ARGV[0]
+  ) INTO v_ids;
+  PERFORM refresh_vehicle_details(v_ids);
+  RETURN NULL;
+END;
+$$;
+
+-- fuels (ligado ao veículo via vehicle_fuels)
+CREATE OR REPLACE FUNCTION trigger_vehicle_details_fuels()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  PERFORM refresh_vehicle_details(ARRAY(
+    SELECT DISTINCT vf.vehicle_id
+    FROM vehicle_fuels vf
+    JOIN new_rows n ON n.id = vf.fuel_id
+  ));
+  RETURN NULL;
+END;
+$$;
+
+DO $$
+DECLARE
+  v_table TEXT;
+BEGIN
+  -- vehicles: INSERT e UPDATE (DELETE é tratado pelo ON DELETE CASCADE)
+  DROP TRIGGER IF EXISTS trg_vehicle_details_insert ON vehicles;
+  CREATE TRIGGER trg_vehicle_details_insert
+    AFTER INSERT ON vehicles
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_vehicle_details_vehicles();
+
+  DROP TRIGGER IF EXISTS trg_vehicle_details_update ON vehicles;
+  CREATE TRIGGER trg_vehicle_details_update
+    AFTER UPDATE ON vehicles
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_vehicle_details_vehicles();
+
+  -- Tabelas filhas
+  FOREACH v_table IN ARRAY ARRAY['plates', 'colors', 'vehicle_fuels', 'vehicle_entity_links'] LOOP
+    EXECUTE format('DROP TRIGGER IF EXISTS trg_vehicle_details_insert ON %I', v_table);
+    EXECUTE format(
+      'CREATE TRIGGER trg_vehicle_details_insert AFTER INSERT ON %I
+         REFERENCING NEW TABLE AS new_rows
+         FOR EACH STATEMENT EXECUTE FUNCTION trigger_vehicle_details_children()',
+      v_table
+    );
+
+    EXECUTE format('DROP TRIGGER IF EXISTS trg_vehicle_details_update ON %I', v_table);
+    EXECUTE format(
+      'CREATE TRIGGER trg_vehicle_details_update AFTER UPDATE ON %I
+         REFERENCING NEW TABLE AS new_rows OLD TABLE AS old_rows
+         FOR EACH STATEMENT EXECUTE FUNCTION trigger_vehicle_details_children()',
+      v_table
+    );
+
+    EXECUTE format('DROP TRIGGER IF EXISTS trg_vehicle_details_delete ON %I', v_table);
+    EXECUTE format(
+      'CREATE TRIGGER trg_vehicle_details_delete AFTER DELETE ON %I
+         REFERENCING OLD TABLE AS old_rows
+         FOR EACH STATEMENT EXECUTE FUNCTION trigger_vehicle_details_children()',
+      v_table
+    );
+  END LOOP;
+
+  -- Catálogos (só UPDATE altera documentos já existentes)
+  DROP TRIGGER IF EXISTS trg_vehicle_details_update ON brands;
+  CREATE TRIGGER trg_vehicle_details_update
+    AFTER UPDATE ON brands
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_vehicle_details_catalog('brand_id');
+
+  DROP TRIGGER IF EXISTS trg_vehicle_details_update ON models;
+  CREATE TRIGGER trg_vehicle_details_update
+    AFTER UPDATE ON models
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_vehicle_details_catalog('model_id');
+
+  DROP TRIGGER IF EXISTS trg_vehicle_details_update ON model_versions;
+  CREATE TRIGGER trg_vehicle_details_update
+    AFTER UPDATE ON model_versions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_vehicle_details_catalog('version_id');
+
+  DROP TRIGGER IF EXISTS trg_vehicle_details_update ON vehicle_categories;
+  CREATE TRIGGER trg_vehicle_details_update
+    AFTER UPDATE ON vehicle_categories
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_vehicle_details_catalog('category_id');
+
+  DROP TRIGGER IF EXISTS trg_vehicle_details_update ON fuels;
+  CREATE TRIGGER trg_vehicle_details_update
+    AFTER UPDATE ON fuels
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_vehicle_details_fuels();
+END;
+$$;
+
+
+-- -----------------------------------------------------
+-- Carga inicial
+-- -----------------------------------------------------
+SELECT refresh_vehicle_details(ARRAY(SELECT id FROM vehicles));
@@ -0,0 +1,180 @@
+"""
+Script de verificação dos índices de vínculos (links)
+
+Popula entidades, veículos e vínculos com as cardinalidades do gerador de
+dados sintéticos (scripts/generate_synthetic_data.py: um proprietário por
+veículo, vínculos extras em cauda longa espalhados pelas entidades) dentro
+de uma transação, roda EXPLAIN nas consultas dos fluxos de vínculos
+(permissão, listagens por veículo/entidade, solicitações, reivindicações)
+e verifica que nenhuma delas cai em Seq Scan sobre links. Ao final a
+transação é desfeita (ROLLBACK): nenhum dado fica no banco.
+
+As linhas usam o prefixo VERIFY (não colidem com as SYN do gerador) e uma
+seed própria para os ids.
+
+Uso:
+    python verify_link_indexes.py
+    python verify_link_indexes.py --vehicles 250000 --links 3
+"""
+import argparse
+import os
+import sys
+from sqlalchemy import text
+from app.core.database import engine
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+
+from bulk_import_supabase import copy_rows
+from generate_synthetic_data import (
+    ENTITY_COLUMNS, LINK_COLUMNS, TAG, VEHICLE_COLUMNS,
+    Plan, entity_rows, fetch_catalog, link_rows, vehicle_rows,
+)
+
+VERIFY_TAG = "VERIFY"
+
+
+# Consultas equivalentes às do PermissionResolver, VehicleEntityLinkService
+# e dos endpoints de solicitação/reivindicação em entities.py
+QUERIES = {
+    "permissao (entidade + veiculo + active)": """
+        SELECT link_type_id, start_date, end_date
+        FROM links
+        WHERE entity_id = :entity_id AND vehicle_id = :vehicle_id AND status = 'active'
+    """,
+    "check_link_permission()": """
+        SELECT 1
+        FROM links l
+        JOIN link_type_permissions ltp ON ltp.link_type_id = l.link_type_id
+        JOIN permissions p ON p.id = ltp.permission_id
+        WHERE l.entity_id = :entity_id
+          AND l.vehicle_id = :vehicle_id
+          AND l.status = 'active'
+          AND (l.end_date IS NULL OR l.end_date >= CURRENT_DATE)
+          AND l.start_date <= CURRENT_DATE
+          AND p.code = 'vehicle.edit'
+          AND p.active = true
+    """,
+    "get_vehicle_links": """
+        SELECT * FROM links
+        WHERE vehicle_id = :vehicle_id AND status <> 'terminated'
+    """,
+    "get_active_vehicle_links_count": """
+        SELECT count(*) FROM links
+        WHERE vehicle_id = :vehicle_id AND status <> 'terminated'
+    """,
+    "get_entity_links": """
+        SELECT * FROM links
+        WHERE entity_id = :entity_id AND status <> 'terminated'
+    """,
+    "solicitacoes recebidas": """
+        SELECT * FROM links
+        WHERE entity_id = :entity_id AND status = 'pending_request'
+        ORDER BY created_at DESC, id DESC
+        LIMIT 51
+    """,
+    "solicitacoes enviadas": """
+        SELECT * FROM links
+        WHERE requested_by_entity_id = :entity_id AND status = 'pending_request'
+        ORDER BY created_at DESC, id DESC
+        LIMIT 51
+    """,
+    "reivindicacoes pendentes": """
+        SELECT * FROM links
+        WHERE status = 'pending_validation'
+    """,
+}
+
+
+def seq_scans_on_links(plan: dict) -> list:
+    """Retorna os nós Seq Scan sobre links encontrados no plano"""
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") == "links":
+        found.append(plan)
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans_on_links(child))
+    return found
+
+
+def retag(rows):
+    """Troca o prefixo SYN do código (segunda coluna) por VERIFY"""
+    for row in rows:
+        yield (row[0], VERIFY_TAG + row[1][len(TAG):]) + tuple(row[2:])
+
+
+def synthetic_plan(vehicles: int, links: float, seed: int) -> Plan:
+    """Plan do gerador só com entidades, veículos e vínculos"""
+    return Plan(argparse.Namespace(
+        seed=seed, vehicles=vehicles, entities=None, conversations=0,
+        plates=0, colors=0, links=links, messages=0, events=0,
+        years=3, end_date="2026-06-30",
+    ))
+
+
+def verify_indexes(vehicles: int, links: float, seed: int):
+    """Popula entidades/veículos/links, roda EXPLAIN em cada consulta e verifica os planos"""
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            print("=" * 80)
+            print("VERIFICAÇÃO DOS ÍNDICES DE VÍNCULOS")
+            print("=" * 80)
+
+            # 1. Popular com o gerador, na transação desta conexão (COPY
+            # pelo cursor do driver). Sem eventos em vehicle_events para os
+            # vínculos de teste (DDL transacional: volta ao normal no ROLLBACK)
+            synthetic = synthetic_plan(vehicles, links, seed)
+            print(f"\n1. Inserindo {synthetic.entities} entidades, {synthetic.vehicles} veículos "
+                  f"e ~{int(synthetic.vehicles * links)} vínculos de teste...")
+            conn.execute(text("ALTER TABLE links DISABLE TRIGGER USER"))
+            cur = conn.connection.cursor()
+            catalog, _, link_type_ids = fetch_catalog(cur)
+            copy_rows(cur, "entities", ENTITY_COLUMNS, retag(entity_rows(synthetic)))
+            copy_rows(cur, "vehicles", VEHICLE_COLUMNS, retag(vehicle_rows(synthetic, catalog)))
+            total = copy_rows(cur, "links", LINK_COLUMNS, retag(link_rows(synthetic, link_type_ids)))
+            print(f"   {total} vínculos inseridos")
+
+            conn.execute(text("ANALYZE entities"))
+            conn.execute(text("ANALYZE vehicles"))
+            conn.execute(text("ANALYZE links"))
+            print("   [OK] Dados inseridos e estatísticas atualizadas")
+
+            # 2. Consultas sobre o primeiro veículo gerado e o seu proprietário
+            entity_id = synthetic.ids("entity", synthetic.owner_of(0))
+            vehicle_id = synthetic.ids("vehicle", 0)
+
+            # 3. EXPLAIN de cada consulta
+            print("\n2. Verificando planos de execução...")
+            params = {"entity_id": str(entity_id), "vehicle_id": str(vehicle_id)}
+            failures = 0
+            for name, query in QUERIES.items():
+                plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {query}"), params).scalar()[0]["Plan"]
+                scans = seq_scans_on_links(plan)
+                if scans:
+                    failures += 1
+                    print(f"   [ERRO] {name}: Seq Scan em links")
+                else:
+                    print(f"   [OK] {name}: {plan['Node Type']} (custo {plan['Total Cost']:.1f})")
+
+            print("\n" + "=" * 80)
+            if failures:
+                print(f"[ERRO] {failures} consulta(s) sem índice adequado")
+            else:
+                print("[OK] Todas as consultas usam índices")
+            print("=" * 80)
+            return failures == 0
+
+        finally:
+            # Nada do que foi inserido fica no banco
+            trans.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verifica os índices de links com EXPLAIN")
+    parser.add_argument("--vehicles", type=int, default=100000, help="Veículos de teste (entidades: 80%%)")
+    parser.add_argument("--links", type=float, default=2.0, help="Média de vínculos por veículo")
+    parser.add_argument("--seed", type=int, default=7341, help="Seed dos ids (diferente da usada no gerador)")
+    args = parser.parse_args()
+
+    ok = verify_indexes(args.vehicles, args.links, args.seed)
+    raise SystemExit(0 if ok else 1)
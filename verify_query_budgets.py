@@ -0,0 +1,165 @@
+"""
+Script de verificação do número de queries dos endpoints quentes
+
+Chama cada endpoint pela própria aplicação (httpx.ASGITransport, sem
+servidor) dentro de assert_max_queries(n) e falha se alguma requisição
+passar do orçamento. As listagens rodam com duas páginas de tamanhos
+diferentes sob o mesmo orçamento: um N+1 faz a página maior estourar.
+
+Os caches de leitura (hot_reads, vehicle_cache) são invalidados antes de
+cada chamada, então a contagem é sempre a de uma leitura fria.
+
+Usa ids reais do banco (um veículo, uma conversa com participante, uma
+entidade ativa); endpoints sem dados para montar a requisição são pulados.
+
+Uso:
+    python verify_query_budgets.py
+"""
+import asyncio
+import sys
+
+import httpx
+from sqlalchemy import text
+
+from app.core.database import engine
+from app.core.profiling import assert_max_queries, install_query_listeners
+from app.core.security import create_entity_access_token
+from app.main import app
+from app.services import hot_reads
+
+API = "/api/v1"
+
+# Tamanhos de página das listagens (mesmo orçamento para os dois)
+PAGE_SIZES = (5, 50)
+
+
+def load_fixtures() -> dict:
+    """Um id de cada recurso (None se a tabela estiver vazia)"""
+    queries = {
+        "vehicle_id": "SELECT id::text FROM vehicles ORDER BY id LIMIT 1",
+        "entity_id": "SELECT id::text FROM entities WHERE active = true ORDER BY id LIMIT 1",
+        "participant": """
+            SELECT conversation_id::text, entity_id::text
+            FROM conversation_participants
+            WHERE is_active = true
+            ORDER BY id LIMIT 1
+        """,
+    }
+    fixtures = {}
+    with engine.connect() as conn:
+        for name, query in queries.items():
+            row = conn.execute(text(query)).first()
+            fixtures[name] = (tuple(row) if len(row) > 1 else row[0]) if row else None
+    return fixtures
+
+
+def auth(entity_id) -> dict:
+    return {"Authorization": f"Bearer {create_entity_access_token(entity_id)}"}
+
+
+def build_checks(fx: dict) -> list:
+    """
+    (nome, caminho, params, headers, orçamento, paginado)
+
+    Orçamentos:
+    - vehicles: página + capas
+    - vehicle detail: veículo (com joins) + placa/cor/km atuais (properties)
+    - vehicles-with-details / moments-feed: uma query na projeção / no feed
+    - conversations: total + página + veículos principais (+ placas e cores)
+    - conversation detail: conversa + participantes (com o resumo de cada
+      entidade) + mensagens + participante de quem pede
+    - messages: participante + página
+    - link requests: página + entidades (com o resumo)
+    """
+    checks = [
+        ("GET /vehicles/", f"{API}/vehicles/", {}, {}, 2, True),
+        ("GET /vehicles-with-details", f"{API}/vehicles-with-details", {}, {}, 1, True),
+        ("GET /moments-feed", f"{API}/moments-feed", {}, {}, 1, True),
+        ("GET /entities/entities", f"{API}/entities/entities", {}, {}, 1, True),
+        ("GET /brands/", f"{API}/brands/", {}, {}, 1, True),
+        ("GET /plate-types/", f"{API}/plate-types/", {}, {}, 1, False),
+    ]
+
+    if fx["vehicle_id"]:
+        checks.append(("GET /vehicles/{id}", f"{API}/vehicles/{fx['vehicle_id']}", {}, {}, 6, False))
+
+    if fx["participant"]:
+        conversation_id, entity_id = fx["participant"]
+        headers = auth(entity_id)
+        checks += [
+            ("GET /conversations", f"{API}/conversations", {"entity_id": entity_id}, {}, 5, True),
+            ("GET /conversations/{id}", f"{API}/conversations/{conversation_id}", {}, headers, 12, False),
+            (
+                "GET /conversations/{id}/messages",
+                f"{API}/conversations/{conversation_id}/messages", {}, headers, 2, True,
+            ),
+        ]
+
+    if fx["entity_id"]:
+        checks.append((
+            "GET /entities/entities/{id}/link-requests/received",
+            f"{API}/entities/entities/{fx['entity_id']}/link-requests/received",
+            {}, auth(fx["entity_id"]), 6, True,
+        ))
+
+    return checks
+
+
+def clear_read_caches(fx: dict) -> None:
+    hot_reads.hot_reads.clear()
+    if fx["vehicle_id"]:
+        hot_reads.invalidate_vehicle(fx["vehicle_id"])
+
+
+async def run_checks(checks: list, fx: dict) -> int:
+    failures = 0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://verify") as client:
+        for name, path, params, headers, budget, paginated in checks:
+            for size in (PAGE_SIZES if paginated else (None,)):
+                request_params = dict(params, limit=size) if size else params
+                label = f"{name} (limit={size})" if size else name
+                clear_read_caches(fx)
+                try:
+                    with assert_max_queries(budget) as stats:
+                        response = await client.get(path, params=request_params, headers=headers)
+                except AssertionError as exc:
+                    failures += 1
+                    print(f"   [ERRO] {label}: {exc}")
+                    continue
+
+                if response.status_code >= 400:
+                    failures += 1
+                    print(f"   [ERRO] {label}: HTTP {response.status_code} {response.text[:200]}")
+                    continue
+
+                print(f"   [OK] {label}: {stats.count}/{budget} queries")
+    return failures
+
+
+def verify_query_budgets() -> bool:
+    print("=" * 80)
+    print("VERIFICAÇÃO DO NÚMERO DE QUERIES POR ENDPOINT")
+    print("=" * 80)
+
+    # Idempotente: o main já instala se QUERY_PROFILER_ENABLED
+    install_query_listeners(engine)
+
+    fixtures = load_fixtures()
+    missing = [name for name, value in fixtures.items() if value is None]
+    if missing:
+        print(f"\n[AVISO] Sem dados para: {', '.join(missing)} (endpoints correspondentes pulados)")
+
+    print()
+    failures = asyncio.run(run_checks(build_checks(fixtures), fixtures))
+
+    print("\n" + "=" * 80)
+    if failures:
+        print(f"[ERRO] {failures} requisição(ões) fora do orçamento ou com erro")
+        return False
+    print("[OK] Todos os endpoints dentro do orçamento de queries")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if verify_query_budgets() else 1)